@@ -0,0 +1,110 @@
+"""Subdomain dedup throughput and memory: plain set versus DomainSet.
+
+Generates raw enumeration output the way several tools report it (mixed
+case, wildcard prefixes, trailing dots, duplicates across tools and some
+out-of-scope names), then merges it with the set-of-raw-strings approach
+SubdomainModule used before, with a per-name normalize-then-set loop and
+with DomainSet. Throughput is timed on an untraced run; memory is the
+tracemalloc peak while building and the size retained afterwards,
+measured on a second run.
+
+    python benchmarks/bench_domain_dedup.py --names 1000000 --tools 3
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.domains import DomainSet  # noqa: E402
+
+TARGET = 'example.com'
+
+def generate(names: int, tools: int, seed: int = 1):
+    rng = random.Random(seed)
+    unique = [f'{"".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789-") for _ in range(rng.randint(4, 14))).strip("-") or "x"}'
+              f'.{rng.choice(("api", "dev", "corp", "int", "eu", "us"))}.{TARGET}' for _ in range(names)]
+    outputs = []
+    for _ in range(tools):
+        lines = []
+        for name in rng.sample(unique, int(names * 0.7)):
+            roll = rng.random()
+            if roll < 0.1:
+                name = name.upper()
+            elif roll < 0.15:
+                name = f'*.{name}'
+            elif roll < 0.2:
+                name = f'{name}.'
+            elif roll < 0.22:
+                name = name.replace(TARGET, 'example.net')
+            lines.append(name)
+        outputs.append(lines)
+    return outputs
+
+def naive_normalize(name: str):
+    name = name.strip().lower()
+    while name.startswith('*.'):
+        name = name[2:]
+    name = name.rstrip('.')
+    if name == TARGET or name.endswith('.' + TARGET):
+        return name
+    return None
+
+def build_raw_set(outputs):
+    merged = set()
+    for lines in outputs:
+        merged.update(lines)
+    return merged
+
+def build_normalized_set(outputs):
+    merged = set()
+    for lines in outputs:
+        for line in lines:
+            name = naive_normalize(line)
+            if name is not None:
+                merged.add(name)
+    return merged
+
+def build_domain_set(outputs):
+    merged = DomainSet(TARGET)
+    for lines in outputs:
+        merged.add_many(lines)
+    merged.compact()
+    return merged
+
+def measure(build, outputs):
+    gc.collect()
+    start = time.perf_counter()
+    result = build(outputs)
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build(outputs)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=1000000, help='unique subdomains')
+    parser.add_argument('--tools', type=int, default=3, help='tool outputs to merge')
+    args = parser.parse_args()
+
+    outputs = generate(args.names, args.tools)
+    lines = sum(len(lines) for lines in outputs)
+    print(f'{lines} raw lines, {args.names} unique names')
+    print(f'{"approach":<22}{"names":>10}{"lines/s":>12}{"peak MB":>10}{"kept MB":>10}')
+    for label, build in (('set (raw, no cleanup)', build_raw_set),
+                         ('set (normalized)', build_normalized_set),
+                         ('DomainSet', build_domain_set)):
+        result, elapsed, peak, retained = measure(build, outputs)
+        print(f'{label:<22}{len(result):>10}{lines / elapsed:>12,.0f}{peak / 2**20:>10.1f}{retained / 2**20:>10.1f}')
+        del result
+
+if __name__ == '__main__':
+    main()
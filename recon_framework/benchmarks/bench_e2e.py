@@ -0,0 +1,287 @@
+"""End-to-end scan benchmark against simulated tools.
+
+Installs fake subfinder, amass, assetfinder, httpx and nuclei executables
+(benchmarks/fake_tools.py) on PATH, then runs a full scan through
+FullReconEngine in a child process, through the `recon scan` and
+`recon report` CLI commands and as a `recon scan --distributed`
+coordinator with --workers `recon worker` processes. For each run it
+reports the wall time of every stage, peak RSS of the scanning process,
+database write rates per table and report render time.
+
+Results are written as JSON together with the git commit, so runs on two
+commits can be diffed:
+
+    python benchmarks/bench_e2e.py --subdomains 100000 --findings 20000 --save before.json
+    git checkout my-branch
+    python benchmarks/bench_e2e.py --subdomains 100000 --findings 20000 --save after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_TOOLS = Path(__file__).resolve().parent / 'fake_tools.py'
+TOOLS = ('subfinder', 'amass', 'assetfinder', 'httpx', 'nuclei')
+TARGET = 'bench.example.com'
+
+def install_tools(bin_dir: Path):
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool in TOOLS:
+        path = bin_dir / tool
+        path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TOOLS}" {tool} "$@"\n')
+        path.chmod(0o755)
+
+def tool_env(args, bin_dir: Path):
+    live = args.subdomains * args.live_ratio
+    return {
+        **os.environ,
+        'PATH': f'{bin_dir}{os.pathsep}{os.environ.get("PATH", "")}',
+        'PYTHONPATH': str(ROOT),
+        'RECON_FAKE_SUBDOMAINS': str(args.subdomains),
+        'RECON_FAKE_LIVE_RATIO': str(args.live_ratio),
+        'RECON_FAKE_FINDINGS': str(args.findings / live if live else 0),
+        'RECON_FAKE_LATENCY': str(args.latency),
+        'RECON_FAKE_LINES_PER_SEC': str(args.lines_per_sec),
+    }
+
+def write_config(path: Path, args, output_dir: Path):
+    # JSON is valid YAML, so ScanConfig.from_file reads it as is.
+    config = {
+        'target': TARGET,
+        'mode': 'aggressive',
+        'output_dir': str(output_dir),
+        'threads': args.threads,
+        'rate_limit': 0,
+        'stages': args.stages,
+        'stage_workers': args.stage_workers,
+        'resolve_dns': False,
+        'cache_enabled': False,
+        'json_backend': args.json_backend,
+        'output_formats': ['json', 'html'],
+        'probe_batch_size': args.probe_batch_size,
+        'job_poll_interval': 0.1,
+        'job_concurrency': args.workers,
+    }
+    path.write_text(json.dumps(config, indent=2))
+
+def run_child(command, cwd: Path, env, verbose: bool):
+    """Run command and return (wall seconds, stdout); raises if it fails."""
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.PIPE,
+                          stderr=None if verbose else subprocess.DEVNULL, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f'{" ".join(command)} exited with {proc.returncode}')
+    return elapsed, proc.stdout
+
+def summarize(results, wall_time: float):
+    """Reduce a scan's results to the numbers compared between runs."""
+    metrics = results['metrics']
+    stages = {m['name']: round(m['wall_time'], 3) for m in metrics if m['kind'] == 'stage'}
+    db = {}
+    for m in metrics:
+        if m['kind'] == 'db' and m['items_in']:
+            db[m['name']] = {
+                'rows': m['items_in'], 'seconds': round(m['wall_time'], 3),
+                'rows_per_sec': round(m['items_in'] / m['wall_time']) if m['wall_time'] else None
+            }
+    rows = sum(entry['rows'] for entry in db.values())
+    seconds = sum(entry['seconds'] for entry in db.values())
+    return {
+        'wall_time': round(wall_time, 3),
+        'peak_rss_mb': round(max(m['max_rss_kb'] for m in metrics if m['kind'] == 'stage') / 1024, 1),
+        'stages': stages,
+        'report_time': stages.get('report'),
+        'db': db,
+        'db_rows_per_sec': round(rows / seconds) if seconds else None,
+        'counts': {
+            'subdomains': results.get('subdomain_results', {}).get('total_count'),
+            'live_hosts': results.get('http_results', {}).get('total_live'),
+            'findings': results.get('vulnerability_results', {}).get('total_vulns'),
+        },
+    }
+
+def child_engine(config_path: str):
+    """Runs inside the child process started by bench_engine."""
+    sys.path.insert(0, str(ROOT))
+    from core.config import ScanConfig
+    from core.database import ReconDatabase
+    from engines.full import FullReconEngine
+
+    cfg = ScanConfig.from_file(config_path)
+    Path(cfg.output_dir).mkdir(parents=True, exist_ok=True)
+    db = ReconDatabase(f'{cfg.output_dir}/recon.db', persistent=True, synchronous=cfg.db_synchronous)
+    try:
+        results = FullReconEngine(cfg, db).run()
+    finally:
+        db.close()
+    keys = ('subdomain_results', 'http_results', 'vulnerability_results')
+    print(json.dumps({
+        'metrics': results['metrics'],
+        **{key: {k: v for k, v in results[key].items() if k.startswith('total_')} for key in keys if key in results}
+    }))
+
+def bench_engine(args, work: Path, env):
+    run_dir = work / 'engine'
+    run_dir.mkdir()
+    config = run_dir / 'config.yaml'
+    write_config(config, args, run_dir / 'results')
+    elapsed, output = run_child([sys.executable, __file__, '--child', str(config)], run_dir, env, args.verbose)
+    return summarize(json.loads(output), elapsed)
+
+def bench_cli(args, work: Path, env):
+    run_dir = work / 'cli'
+    run_dir.mkdir()
+    config = run_dir / 'config.yaml'
+    # `recon report` reads ./results/recon.db.
+    write_config(config, args, Path('results'))
+    recon = [sys.executable, '-m', 'cli.main']
+    elapsed, _ = run_child(recon + ['scan', TARGET, '-c', str(config), '-m', 'aggressive', '-t', str(args.threads),
+                                    '-o', 'results', '--no-resolve', '--no-cache'], run_dir, env, args.verbose)
+    with open(run_dir / 'results' / 'results.json') as f:
+        summary = summarize(json.load(f), elapsed)
+    summary['report_command'] = {}
+    for fmt in ('html', 'json'):
+        seconds, _ = run_child(recon + ['report', TARGET, '-f', fmt, '-o', 'reports'], run_dir, env, args.verbose)
+        summary['report_command'][fmt] = round(seconds, 3)
+    return summary
+
+def bench_distributed(args, work: Path, env):
+    run_dir = work / 'distributed'
+    run_dir.mkdir()
+    config = run_dir / 'config.yaml'
+    write_config(config, args, Path('results'))
+    recon = [sys.executable, '-m', 'cli.main']
+    output = None if args.verbose else subprocess.DEVNULL
+    start = time.perf_counter()
+    coordinator = subprocess.Popen(
+        recon + ['scan', TARGET, '-c', str(config), '-m', 'aggressive', '-t', str(args.threads),
+                 '-o', 'results', '--no-resolve', '--no-cache', '--distributed'],
+        cwd=run_dir, env=env, stdout=output, stderr=output
+    )
+    db_path = run_dir / 'results' / 'recon.db'
+    while not db_path.exists() and coordinator.poll() is None:
+        time.sleep(0.05)
+    workers = [
+        subprocess.Popen(recon + ['worker', '--db', str(db_path), '--poll-interval', '0.1'],
+                         cwd=run_dir, env=env, stdout=output, stderr=output)
+        for _ in range(args.workers)
+    ]
+    try:
+        coordinator.wait()
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    elapsed = time.perf_counter() - start
+    if coordinator.returncode != 0:
+        raise RuntimeError(f'distributed scan exited with {coordinator.returncode}')
+    with open(run_dir / 'results' / 'results.json') as f:
+        summary = summarize(json.load(f), elapsed)
+    summary['workers'] = args.workers
+    return summary
+
+RUNS = {'engine': bench_engine, 'cli': bench_cli, 'distributed': bench_distributed}
+
+def git_commit():
+    def git(*command):
+        return subprocess.run(['git', *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {'commit': git('rev-parse', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def flatten(value, prefix=''):
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f'{prefix}.{key}' if prefix else key))
+        return items
+    return {prefix: value}
+
+def compare(baseline, current):
+    old = flatten(baseline['runs'])
+    new = flatten(current['runs'])
+    print(f'\ncompared with {(baseline.get("commit") or "?")[:12]} ({baseline.get("created_at", "?")})')
+    changed = sorted(key for key in set(baseline['params']) | set(current['params'])
+                     if baseline['params'].get(key) != current['params'].get(key))
+    if changed:
+        print(f'warning: parameters differ ({", ".join(changed)}), numbers are not directly comparable')
+    print(f'{"metric":<44}{"before":>12}{"after":>12}{"change":>9}')
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            continue
+        change = f'{(after - before) / before * 100:+.0f}%' if before else ''
+        print(f'{key:<44}{before:>12}{after:>12}{change:>9}')
+
+def print_run(name: str, run):
+    print(f'\n{name}: {run["wall_time"]:.1f}s wall, peak RSS {run["peak_rss_mb"]} MB, '
+          f'{run["counts"]["subdomains"]} subdomains, {run["counts"]["live_hosts"]} live, {run["counts"]["findings"]} findings')
+    for stage, seconds in run['stages'].items():
+        print(f'  stage {stage:<14}{seconds:>9.2f}s')
+    for table, entry in run['db'].items():
+        print(f'  db    {table:<14}{entry["rows"]:>9} rows {entry["seconds"]:>8.2f}s {entry["rows_per_sec"] or 0:>10,} rows/s')
+    for fmt, seconds in run.get('report_command', {}).items():
+        print(f'  recon report -f {fmt:<6}{seconds:>7.2f}s')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subdomains', type=int, default=100000)
+    parser.add_argument('--live-ratio', type=float, default=0.5, help='share of subdomains httpx reports as live')
+    parser.add_argument('--findings', type=int, default=20000, help='total nuclei findings')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds each tool waits before its first line')
+    parser.add_argument('--lines-per-sec', type=float, default=0, help='output rate cap per tool process (0 = unlimited)')
+    parser.add_argument('--stages', nargs='+', default=['enumerate', 'probe', 'scan'])
+    parser.add_argument('--stage-workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=10)
+    parser.add_argument('--json-backend', default='auto')
+    parser.add_argument('--workers', type=int, default=4, help='recon worker processes for the distributed run')
+    parser.add_argument('--probe-batch-size', type=int, default=500, help='hosts per probe job in the distributed run')
+    parser.add_argument('--runs', nargs='+', choices=list(RUNS), default=['engine', 'cli'])
+    parser.add_argument('--save', help='write the results as JSON to this path')
+    parser.add_argument('--compare', help='results JSON of an earlier run to diff against')
+    parser.add_argument('--keep', action='store_true', help='keep the work directory (databases, reports, logs)')
+    parser.add_argument('--verbose', action='store_true', help='show scan logs')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_engine(args.child)
+        return
+
+    work = Path(tempfile.mkdtemp(prefix='recon-bench-'))
+    try:
+        install_tools(work / 'bin')
+        env = tool_env(args, work / 'bin')
+        results = {
+            **git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'params': {key: value for key, value in vars(args).items() if key not in ('save', 'compare', 'keep', 'verbose', 'child')},
+            'runs': {}
+        }
+        for name in args.runs:
+            results['runs'][name] = RUNS[name](args, work, env)
+            print_run(name, results['runs'][name])
+    finally:
+        if args.keep:
+            print(f'\nwork directory: {work}')
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""recon export versus the JSON report on a large database.
+
+Builds a database with many scans (hosts recorded through the asset
+inventory, findings with realistic raw nuclei output), then measures in a
+child process each: the JSON report of one target's latest scan, the
+export of that same scan, and the export of every scan in the database,
+in each available format. Reports wall time, rows per second, output size
+and peak RSS (from wait4).
+
+    python benchmarks/bench_export.py --scans 20 --hosts 50000 --vulns 10000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.database import ReconDatabase  # noqa: E402
+from core.records import Finding, LiveHost, Subdomain  # noqa: E402
+from reports.exporter import ScanExporter, load_arrow  # noqa: E402
+
+SEVERITIES = ('info', 'low', 'medium', 'high', 'critical')
+STARTED = datetime(2024, 1, 1)
+
+def populate(db: ReconDatabase, scans: int, hosts: int, vulns: int, targets: int):
+    rng = random.Random(1)
+    with db.get_connection() as conn:
+        for n in range(scans):
+            target = f'target{n % targets}.com'
+            started = STARTED + timedelta(days=n)
+            scan_id = conn.execute(
+                "INSERT INTO scans (target, scan_type, status, started_at) VALUES (?, 'full_recon', 'completed', ?)",
+                (target, started)
+            ).lastrowid
+            # Each scan sees most of the target's estate; a few titles change between scans.
+            names = [f'h{i}.{target}' for i in rng.sample(range(int(hosts * 1.2)), hosts)]
+            ReconDatabase._upsert_hosts(conn, scan_id, target, started, (
+                LiveHost(f'https://{name}', input=name, status_code=200, title=f'Title {rng.randrange(50)}',
+                         technologies=['nginx', 'PHP'], content_length=1024, probed_at=started)
+                if i % 2 else Subdomain(name, '10.0.0.1', started)
+                for i, name in enumerate(names)
+            ))
+            findings = []
+            for i in range(vulns):
+                host = f'https://{names[i % len(names)]}'
+                template = f'template-{rng.randrange(3000)}'
+                data = {
+                    'template-id': template, 'template-path': f'/root/nuclei-templates/http/{template}.yaml',
+                    'info': {'name': f'Finding {template}', 'author': ['someone'], 'tags': ['cve', 'misconfig'],
+                             'severity': rng.choice(SEVERITIES), 'description': 'Detected something worth a look.'},
+                    'type': 'http', 'host': host, 'matched-at': f'{host}/path/{i}', 'ip': '10.0.0.1',
+                    'timestamp': '2024-01-01T00:00:00.000000000Z', 'matcher-status': True
+                }
+                findings.append(Finding.from_dict(data, raw=json.dumps(data)))
+            ReconDatabase._insert_vulnerabilities(conn, scan_id, findings)
+            conn.commit()
+
+def run_json_report(db_path: str, out: str, target: str):
+    from reports.generator import ReportGenerator
+    path = ReportGenerator(ReconDatabase(db_path)).generate_report(target, out, 'json')
+    with open(path) as f:
+        data = json.load(f)
+    return len(data['subdomains']) + len(data['vulnerabilities']), [path]
+
+def run_export(db_path: str, out: str, format: str, target: str = None, since: str = None):
+    manifest = ScanExporter(ReconDatabase(db_path)).export(
+        out, format, targets=[target] if target else (), since=datetime.fromisoformat(since) if since else None
+    )
+    datasets = manifest['datasets'].values()
+    return sum(d['rows'] for d in datasets), [path for d in datasets for path in d['files']]
+
+def child(spec: dict):
+    start = time.perf_counter()
+    if spec['kind'] == 'report':
+        rows, files = run_json_report(spec['db'], spec['out'], spec['target'])
+    else:
+        rows, files = run_export(spec['db'], spec['out'], spec['format'], spec.get('target'), spec.get('since'))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'elapsed': elapsed, 'rows': rows, 'bytes': sum(os.path.getsize(f) for f in files)}))
+
+def measure(spec: dict):
+    proc = subprocess.Popen([sys.executable, __file__, '--child', json.dumps(spec)], stdout=subprocess.PIPE)
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f'{spec} failed')
+    return json.loads(output), usage.ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scans', type=int, default=20)
+    parser.add_argument('--hosts', type=int, default=50000, help='hosts observed per scan')
+    parser.add_argument('--vulns', type=int, default=10000, help='findings per scan')
+    parser.add_argument('--targets', type=int, default=4)
+    parser.add_argument('--db', help='database to reuse, built if it does not exist (default: temp file)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(json.loads(args.child))
+        return
+
+    work = tempfile.mkdtemp(prefix='recon-export-')
+    try:
+        db_path = args.db or os.path.join(work, 'bench.db')
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            db = ReconDatabase(db_path, persistent=True, synchronous='OFF')
+            populate(db, args.scans, args.hosts, args.vulns, args.targets)
+            db.close()
+            print(f'populated {args.scans} scans x {args.hosts} hosts, {args.vulns} findings in {time.perf_counter() - start:.1f}s')
+        print(f'database {db_path}: {os.path.getsize(db_path) / 2**20:.0f} MB')
+
+        db = ReconDatabase(db_path)
+        with db.get_connection() as conn:
+            latest = conn.execute("SELECT target, started_at FROM scans ORDER BY started_at DESC LIMIT 1").fetchone()
+        target, since = latest['target'], str(latest['started_at'])
+        formats = ['jsonl'] + (['parquet', 'arrow'] if load_arrow() is not None else [])
+        runs = [(f'JSON report ({target}, latest scan)', {'kind': 'report', 'target': target})]
+        runs += [(f'export {fmt} (same scan)', {'kind': 'export', 'format': fmt, 'target': target, 'since': since}) for fmt in formats]
+        runs += [(f'export {fmt} (all scans)', {'kind': 'export', 'format': fmt}) for fmt in formats]
+
+        print(f'{"run":<40}{"rows":>10}{"seconds":>9}{"rows/s":>10}{"MB out":>8}{"peak RSS MB":>13}')
+        for n, (name, spec) in enumerate(runs):
+            spec.update(db=db_path, out=os.path.join(work, f'out{n}'))
+            result, peak = measure(spec)
+            print(f'{name:<40}{result["rows"]:>10}{result["elapsed"]:>9.2f}{result["rows"] / result["elapsed"]:>10,.0f}'
+                  f'{result["bytes"] / 2**20:>8.1f}{peak:>13.0f}')
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""CLI startup cost, measured with python -X importtime.
+
+Imports each entry module in a fresh interpreter several times, reports
+the median cumulative import time and the slowest modules it pulled in,
+and exits non-zero when a median exceeds its budget so the check can run
+in CI.
+
+    python benchmarks/bench_import_time.py --budget-ms 80
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that the light commands (--help, report) must not import.
+HEAVY_MODULES = ['requests', 'loguru', 'jinja2', 'yaml', 'engines.full', 'modules.base_module']
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def import_profile(module: str):
+    """Return (cumulative microseconds for module, {module it imported: cumulative microseconds})."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    entries = [match.groups() for match in map(LINE_RE.match, proc.stderr.splitlines()) if match]
+    # Children are printed before their parent, indented one level deeper;
+    # interpreter startup (site and friends) comes first and is skipped.
+    for position in range(len(entries) - 1, -1, -1):
+        _, cumulative, indent, name = entries[position]
+        if name == module and len(indent) == 1:
+            break
+    else:
+        raise RuntimeError(f'{module} not found in -X importtime output')
+    children = {}
+    for _, child_cumulative, child_indent, child in reversed(entries[:position]):
+        if len(child_indent) <= 1:
+            break
+        children[child] = int(child_cumulative)
+    return int(cumulative), children
+
+def loaded_heavy_modules(module: str):
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return [m for m in out.strip().split(',') if m]
+
+def time_help(repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'cli.main', '--help'], cwd=ROOT, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', action='append', help='module to import (default: cli.main)')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--top', type=int, default=10, help='slowest imported modules to list')
+    parser.add_argument('--budget-ms', type=float, default=80.0, help='fail if the median import time exceeds this')
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or ['cli.main']:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        median = statistics.median(total for total, _ in runs) / 1000
+        print(f'{module}: median import {median:.1f} ms over {args.repeat} runs (budget {args.budget_ms:.0f} ms)')
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative in [item for item in slowest if item[0] != module][:args.top]:
+            print(f'  {cumulative / 1000:8.1f} ms  {name}')
+        heavy = loaded_heavy_modules(module)
+        if heavy:
+            print(f'  imports heavy modules eagerly: {", ".join(heavy)}')
+            failed = True
+        if median > args.budget_ms:
+            print(f'  over budget by {median - args.budget_ms:.1f} ms')
+            failed = True
+
+    print(f'recon --help: median wall time {time_help(args.repeat) * 1000:.0f} ms')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
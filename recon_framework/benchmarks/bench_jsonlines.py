@@ -0,0 +1,149 @@
+"""Parsing nuclei JSON-lines output: split-and-loads versus JSONLinesParser.
+
+Writes (or reuses) a fixture of nuclei findings with a small share of
+malformed lines, then parses it into Finding records with the old
+BaseModule.parse_json_output approach (decode, strip, split into a list,
+json.loads and a warning per bad line) and with JSONLinesParser on a bytes
+buffer and on a binary stream, with each available backend. Every
+approach runs in a child process, so its peak RSS (from wait4) is
+measured alone.
+
+    python benchmarks/bench_jsonlines.py --lines 1000000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.records import Finding  # noqa: E402
+from utils.jsonlines import JSONLinesParser, iter_lines  # noqa: E402
+
+SEVERITIES = ('info', 'low', 'medium', 'high', 'critical')
+
+class CountingLogger:
+    def __init__(self):
+        self.warnings = 0
+
+    def warning(self, message):
+        self.warnings += 1
+
+def write_fixture(path: str, lines: int, malformed: float, seed: int = 1):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for n in range(lines):
+            if rng.random() < malformed:
+                f.write('[WRN] Could not execute request for template: context deadline exceeded\n')
+                continue
+            host = f'https://h{n % 5000}.example.com'
+            template = f'template-{rng.randrange(3000)}'
+            f.write(json.dumps({
+                'template-id': template,
+                'template-path': f'/root/nuclei-templates/http/{template}.yaml',
+                'info': {
+                    'name': f'Finding {template}', 'author': ['someone'], 'tags': ['cve', 'tech', 'misconfig'],
+                    'severity': rng.choice(SEVERITIES), 'description': 'Detected something worth a look.',
+                    'reference': ['https://example.org/advisory']
+                },
+                'type': 'http',
+                'host': host,
+                'matched-at': f'{host}/path/{n}',
+                'ip': f'10.0.{n % 256}.{n % 250 + 1}',
+                'timestamp': '2024-01-01T00:00:00.000000000Z',
+                'matcher-status': True
+            }))
+            f.write('\n')
+
+def run_split(path: str):
+    logger = CountingLogger()
+    with open(path) as f:
+        output = f.read()
+    count = 0
+    for line in output.strip().split('\n'):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f'Failed to parse line: {line}')
+            continue
+        Finding.from_dict(data, raw=line)
+        count += 1
+    return count, logger.warnings
+
+def run_parser(path: str, backend: str, stream: bool):
+    logger = CountingLogger()
+    parser = JSONLinesParser(Finding.JSON_FIELDS, backend=backend, logger=logger, name='nuclei')
+    count = 0
+    with open(path, 'rb') as f:
+        lines = f if stream else iter_lines(f.read())
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            data = parser.parse_line(line)
+            if data is not None:
+                Finding.from_parsed(data, line)
+                count += 1
+    parser.log_summary()
+    return count, logger.warnings
+
+APPROACHES = {
+    'split + json.loads': lambda path: run_split(path),
+    'parser buffer (json)': lambda path: run_parser(path, 'json', stream=False),
+    'parser stream (json)': lambda path: run_parser(path, 'json', stream=True),
+    'parser buffer (orjson)': lambda path: run_parser(path, 'orjson', stream=False),
+    'parser stream (orjson)': lambda path: run_parser(path, 'orjson', stream=True),
+}
+
+def child(approach: str, path: str):
+    start = time.perf_counter()
+    count, warnings = APPROACHES[approach](path)
+    print(json.dumps({'elapsed': time.perf_counter() - start, 'records': count, 'warnings': warnings}))
+
+def measure(approach: str, path: str):
+    proc = subprocess.Popen([sys.executable, __file__, '--child', approach, '--fixture', path], stdout=subprocess.PIPE)
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        return None
+    return json.loads(output), usage.ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--malformed', type=float, default=0.001, help='share of non-JSON lines')
+    parser.add_argument('--fixture', help='fixture path, generated if it does not exist (default: temp file)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.fixture)
+        return
+
+    path = args.fixture or os.path.join(tempfile.gettempdir(), f'nuclei_{args.lines}.jsonl')
+    if not os.path.exists(path):
+        write_fixture(path, args.lines, args.malformed)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    print(f'fixture {path}: {lines} lines, {size / 2**20:.0f} MB')
+    print(f'{"approach":<24}{"records":>10}{"lines/s":>12}{"MB/s":>8}{"peak RSS MB":>13}{"warnings":>10}')
+    for approach in APPROACHES:
+        measured = measure(approach, path)
+        if measured is None:
+            print(f'{approach:<24}  unavailable')
+            continue
+        result, peak = measured
+        elapsed = result['elapsed']
+        print(f'{approach:<24}{result["records"]:>10}{lines / elapsed:>12,.0f}{size / 2**20 / elapsed:>8.0f}'
+              f'{peak:>13.0f}{result["warnings"]:>10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Latency of the report and incremental-scan queries with and without their indexes.
+
+Builds a database with many host-bearing scans for a handful of targets
+plus a long history of scan rows for other targets, as a database that
+has served nightly batches for a while would hold. Each query is timed
+on its own, on the migrated schema and then with the indexes it relies
+on dropped, so one slow query does not hide the effect of the others.
+Host rows of a scan are read through the asset_observations primary key,
+which cannot be dropped; that query is timed for reference only.
+
+    python benchmarks/bench_report_queries.py --scans 50 --hosts 40000 --vulns 2000 --history 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.database import ReconDatabase, SEVERITY_RANKS  # noqa: E402
+from core.records import Subdomain, LiveHost  # noqa: E402
+
+SCAN_INDEXES = ('idx_scans_target_started', 'idx_scans_target_status')
+
+# (label, query, parameter names, indexes the query relies on)
+QUERIES = [
+    ('latest scan (report)', 'SELECT * FROM scans WHERE target = ? ORDER BY started_at DESC LIMIT 1',
+     ('target',), SCAN_INDEXES),
+    ('last completed scan (incremental)',
+     "SELECT * FROM scans WHERE target = ? AND status = 'completed' ORDER BY started_at DESC LIMIT 1",
+     ('target',), SCAN_INDEXES),
+    ('findings by severity (report)', 'SELECT * FROM vulnerabilities WHERE scan_id = ? ORDER BY severity_rank DESC',
+     ('scan_id',), ('idx_vulnerabilities_scan_severity',)),
+    ('asset history', 'SELECT scan_id, http_state_id, probed_at FROM asset_observations WHERE asset_id = ? ORDER BY scan_id',
+     ('asset_id',), ('idx_asset_observations_asset',)),
+    ('scan hosts (report)', 'SELECT * FROM scan_hosts WHERE scan_id = ? ORDER BY name', ('scan_id',), ()),
+]
+
+def populate(db: ReconDatabase, scans: int, hosts: int, vulns: int, targets: int, history: int):
+    severities = list(SEVERITY_RANKS)
+    started = datetime(2024, 1, 1)
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO scans (target, scan_type, status, started_at, batch_id) VALUES (?, 'full_recon', ?, ?, ?)",
+            ((f'other{n % 1000}.com', random.choice(('completed', 'completed', 'partial', 'failed')),
+              started - timedelta(minutes=n), f'batch{n // 1000}') for n in range(history))
+        )
+        conn.commit()
+        for n in range(scans):
+            target = f'target{n % targets}.com'
+            cur = conn.execute(
+                "INSERT INTO scans (target, scan_type, status, started_at) VALUES (?, 'full_recon', 'completed', ?)",
+                (target, started + timedelta(hours=n))
+            )
+            scan_id = cur.lastrowid
+            # Each scan sees a random half of the target's estate.
+            names = (f'h{n}.{target}' for n in random.sample(range(hosts * 2), hosts))
+            ReconDatabase._upsert_hosts(conn, scan_id, target, started + timedelta(hours=n), (
+                Subdomain(name) if random.random() < 0.5 else LiveHost(f'https://{name}', input=name, status_code=random.choice((200, 403)))
+                for name in names
+            ))
+            conn.executemany(
+                'INSERT INTO vulnerabilities (scan_id, target, severity, severity_rank) VALUES (?, ?, ?, ?)',
+                ((scan_id, target, sev, SEVERITY_RANKS[sev]) for sev in (random.choice(severities) for _ in range(vulns)))
+            )
+            conn.commit()
+
+def time_queries(db: ReconDatabase, params: dict, repeat: int) -> list:
+    """Best time of each query in QUERIES, in seconds."""
+    timings = []
+    with db.get_connection() as conn:
+        for _, query, names, _ in QUERIES:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(query, tuple(params[name] for name in names)).fetchall()
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scans', type=int, default=50)
+    parser.add_argument('--hosts', type=int, default=40000, help='hosts observed per scan')
+    parser.add_argument('--vulns', type=int, default=2000, help='vulnerability rows per scan')
+    parser.add_argument('--targets', type=int, default=5)
+    parser.add_argument('--history', type=int, default=200000, help='extra scan rows of other targets, without hosts')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ReconDatabase(os.path.join(tmp, 'bench.db'), persistent=True, synchronous='OFF')
+        start = time.perf_counter()
+        populate(db, args.scans, args.hosts, args.vulns, args.targets, args.history)
+        print(f'populated {args.scans + args.history} scans, {args.scans * args.hosts} host observations, '
+              f'{args.scans * args.vulns} vulnerabilities in {time.perf_counter() - start:.1f}s')
+
+        with db.get_connection() as conn:
+            target = 'target0.com'
+            scan_id = conn.execute('SELECT max(id) FROM scans WHERE target = ?', (target,)).fetchone()[0]
+            # An asset seen in most scans of the target.
+            asset_id = conn.execute(
+                'SELECT asset_id FROM asset_observations WHERE scan_id = ? LIMIT 1', (scan_id,)
+            ).fetchone()[0]
+        params = {'target': target, 'scan_id': scan_id, 'asset_id': asset_id}
+        indexed = time_queries(db, params, args.repeat)
+        with db.get_connection() as conn:
+            for name in sorted({index for *_, indexes in QUERIES for index in indexes}):
+                conn.execute(f'DROP INDEX {name}')
+            conn.commit()
+        unindexed = time_queries(db, params, args.repeat)
+        db.close()
+
+    print(f'{"query":<36}{"indexed ms":>12}{"dropped ms":>12}{"speedup":>9}')
+    for (label, _, _, indexes), fast, slow in zip(QUERIES, indexed, unindexed):
+        speedup = f'{slow / fast:>8.1f}x' if indexes else f'{"-":>9}'
+        print(f'{label:<36}{fast * 1000:>12.3f}{slow * 1000:>12.3f}{speedup}')
+
+if __name__ == '__main__':
+    main()
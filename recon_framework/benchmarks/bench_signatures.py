@@ -0,0 +1,144 @@
+"""Per-host cost of HTTP response classification as the signature count grows.
+
+Generates signature sets of increasing size (title, technology and server
+substrings, some combined with status codes or content length ranges)
+and a fixed set of probed hosts, then classifies every host with:
+
+  naive     every signature checked in turn, substring tests per pattern
+  regex     one alternation regex per field with a named group per pattern
+            (reference only: it misses overlapping matches)
+  compiled  SignatureSet: one automaton pass per host plus a status index
+
+Reports microseconds per host (the naive and regex runs on a sample of
+the hosts), matches per host and the time to compile each set.
+
+    python benchmarks/bench_signatures.py --hosts 20000 --rules 10 100 1000 5000 10000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.records import LiveHost  # noqa: E402
+from utils.signatures import TEXT_FIELDS, Signature, SignatureSet  # noqa: E402
+
+TITLES = ('Login', 'Welcome to nginx!', 'Dashboard', '404 Not Found', 'Home', 'Sign in to your account', 'Index of /',
+          'Admin Panel', 'Just another WordPress site', 'Grafana', 'Jenkins', 'Apache2 Ubuntu Default Page', 'Coming soon',
+          'Access Denied', 'Example Domain', 'Redirecting...', 'Portal', 'Kibana', 'Service Unavailable', '')
+TECHNOLOGIES = ('PHP:7.4', 'Nginx:1.18.0', 'jQuery:3.5.1', 'WordPress:6.1', 'Bootstrap', 'Google Analytics', 'React',
+                'Apache HTTP Server:2.4.41', 'Cloudflare', 'Ubuntu', 'Java', 'Express', 'Node.js', 'Vue.js', 'HSTS')
+SERVERS = ('nginx', 'Apache', 'cloudflare', 'Microsoft-IIS/10.0', 'gunicorn', 'openresty', None)
+
+def word(rng: random.Random) -> str:
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(6, 10)))
+
+def generate_signatures(count: int, rng: random.Random):
+    signatures = []
+    for n in range(count):
+        roll = rng.random()
+        conditions = {}
+        if roll < 0.6:
+            conditions['title'] = [word(rng) for _ in range(rng.randint(1, 3))]
+            if rng.random() < 0.3:
+                conditions['status'] = rng.choice([200, [200, 401, 403], '500-599'])
+        elif roll < 0.85:
+            conditions['tech'] = [word(rng) for _ in range(rng.randint(1, 2))]
+        elif roll < 0.95:
+            conditions['webserver'] = word(rng)
+        else:
+            # A page of a known size, e.g. a vendor's default error page.
+            low = rng.randrange(0, 100000)
+            conditions['status'] = rng.choice([200, 401, 403, 500])
+            conditions['content_length'] = {'min': low, 'max': low + 50}
+        signatures.append(Signature(f'rule-{n}', **conditions))
+    return signatures
+
+def generate_hosts(count: int, markers, rng: random.Random):
+    """Hosts with realistic titles and stacks; a few carry a marker some signature matches."""
+    hosts = []
+    for n in range(count):
+        title = rng.choice(TITLES)
+        technologies = rng.sample(TECHNOLOGIES, rng.randint(0, 4))
+        if rng.random() < 0.05:
+            title = f'{title} {rng.choice(markers)}'
+        hosts.append(LiveHost(f'https://h{n}.example.com', status_code=rng.choice([200, 200, 301, 403, 404, 500]),
+                              title=title, technologies=technologies, webserver=rng.choice(SERVERS),
+                              content_length=rng.randrange(0, 100000)))
+    return hosts
+
+def classify_naive(signatures, host):
+    values = {'title': (host.title or '').lower(), 'webserver': (host.webserver or '').lower()}
+    techs = [tech.lower() for tech in host.technologies]
+    reasons = []
+    for signature in signatures:
+        matched = 0
+        for bit, field in enumerate(TEXT_FIELDS):
+            patterns = signature.text.get(field)
+            if patterns is None:
+                continue
+            if field == 'tech':
+                found = any(p in tech for tech in techs for p in patterns)
+            else:
+                found = any(p in values[field] for p in patterns)
+            if found:
+                matched |= 1 << bit
+        if signature.accepts(host, matched):
+            reasons.append(signature.describe(host))
+    return reasons
+
+def build_regexes(signatures):
+    regexes = {}
+    for field in TEXT_FIELDS:
+        patterns = sorted({p for signature in signatures for p in signature.text.get(field, ())})
+        if patterns:
+            regexes[field] = re.compile('|'.join(f'(?P<p{n}>{re.escape(p)})' for n, p in enumerate(patterns)))
+    return regexes
+
+def classify_regex(regexes, host):
+    found = []
+    for field, value in (('title', host.title), ('tech', '\x01'.join(host.technologies)), ('webserver', host.webserver)):
+        regex = regexes.get(field)
+        if regex is not None and value:
+            found.extend(match.lastgroup for match in regex.finditer(value.lower()))
+    return found
+
+def per_host(classify, hosts) -> float:
+    start = time.perf_counter()
+    for host in hosts:
+        classify(host)
+    return (time.perf_counter() - start) / len(hosts) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=20000)
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 1000, 5000, 10000])
+    parser.add_argument('--sample', type=int, default=1000, help='hosts the naive and regex runs classify')
+    parser.add_argument('--regex-limit', type=int, default=2000, help='skip the regex run above this many signatures')
+    args = parser.parse_args()
+
+    print(f'{"signatures":>10}{"compile ms":>12}{"naive us":>10}{"regex us":>10}{"compiled us":>13}{"matches/host":>14}')
+    # Each set is a prefix of the largest, and hosts only carry markers of
+    # its first signatures, so matches per host stay the same across sets.
+    generated = generate_signatures(max(args.rules), random.Random(1))
+    markers = [p for signature in generated[:min(args.rules)] for p in signature.text.get('title', ())]
+    hosts = generate_hosts(args.hosts, markers or ['none'], random.Random(2))
+    for count in args.rules:
+        signatures = generated[:count]
+        start = time.perf_counter()
+        compiled = SignatureSet(signatures)
+        compile_ms = (time.perf_counter() - start) * 1000
+        regexes = build_regexes(signatures)
+        sample = hosts[:args.sample]
+        naive = per_host(lambda host: classify_naive(signatures, host), sample)
+        regex = per_host(lambda host: classify_regex(regexes, host), sample) if count <= args.regex_limit else None
+        fast = per_host(compiled.classify, hosts)
+        matches = sum(len(compiled.match(host)) for host in hosts)
+        regex_text = f'{regex:>10.1f}' if regex is not None else f'{"-":>10}'
+        print(f'{count:>10}{compile_ms:>12.1f}{naive:>10.1f}{regex_text}{fast:>13.1f}{matches / len(hosts):>14.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Stand-ins for subfinder, amass, assetfinder, httpx and nuclei.
+
+Run as `fake_tools.py <tool> <tool arguments>`; bench_e2e.py installs a
+wrapper per tool on PATH. Output is deterministic JSON lines shaped like
+the real tools' and is driven by environment variables:
+
+    RECON_FAKE_SUBDOMAINS     distinct subdomains across all enumeration tools
+    RECON_FAKE_LIVE_RATIO     share of probed hosts httpx reports as live
+    RECON_FAKE_FINDINGS       nuclei findings per live host (may be fractional)
+    RECON_FAKE_LATENCY        seconds each tool waits before its first line
+    RECON_FAKE_LINES_PER_SEC  output rate cap per process (0 = unlimited)
+"""
+import json
+import os
+import sys
+import time
+import zlib
+
+SEVERITIES = ('info', 'info', 'low', 'medium', 'high', 'critical')
+TECHNOLOGIES = ('nginx', 'Apache', 'PHP', 'React', 'WordPress', 'jQuery', 'Cloudflare', 'Envoy')
+TITLES = ('Welcome', 'Admin Login', '404 Not Found', 'Dashboard', 'API Gateway', 'Coming soon')
+
+# Share of the subdomain range each enumeration tool reports; they overlap.
+ENUMERATION_RANGES = {
+    'subfinder': (0.0, 0.8),
+    'amass': (0.5, 1.0),
+    'assetfinder': (0.0, 0.1),
+}
+
+def setting(name: str, default: float) -> float:
+    return float(os.environ.get(f'RECON_FAKE_{name}', default))
+
+def option(args, flag: str):
+    return args[args.index(flag) + 1] if flag in args else None
+
+def bucket(value: str, modulo: int = 1000) -> int:
+    return zlib.crc32(value.encode()) % modulo
+
+class Output:
+    """Writes lines to stdout, optionally capped at a lines-per-second rate."""
+    def __init__(self):
+        self.rate = setting('LINES_PER_SEC', 0)
+        self.start = time.monotonic()
+        self.lines = 0
+        time.sleep(setting('LATENCY', 0))
+
+    def write(self, line: str):
+        sys.stdout.write(line + '\n')
+        self.lines += 1
+        if self.rate and self.lines % 100 == 0:
+            sys.stdout.flush()
+            ahead = self.lines / self.rate - (time.monotonic() - self.start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+def read_targets(args):
+    with open(option(args, '-l')) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def enumerate_tool(tool: str, args):
+    target = option(args, '-d') or args[-1]
+    total = int(setting('SUBDOMAINS', 1000))
+    low, high = ENUMERATION_RANGES[tool]
+    out = Output()
+    for n in range(int(total * low), int(total * high)):
+        out.write(f'h{n}.{target}')
+
+def httpx(args):
+    live = setting('LIVE_RATIO', 0.5) * 1000
+    out = Output()
+    for host in read_targets(args):
+        if bucket(host) >= live:
+            continue
+        scheme = 'https' if bucket(host, 3) else 'http'
+        techs = [TECHNOLOGIES[(bucket(host, 97) + i) % len(TECHNOLOGIES)] for i in range(bucket(host, 4))]
+        out.write(json.dumps({
+            'timestamp': '2024-01-01T00:00:00.000000000Z',
+            'url': f'{scheme}://{host}', 'input': host, 'host': '10.0.0.1', 'port': '443' if scheme == 'https' else '80',
+            'scheme': scheme, 'webserver': techs[0] if techs else 'nginx', 'content_type': 'text/html',
+            'method': 'GET', 'path': '/', 'status_code': (200, 200, 301, 403, 404)[bucket(host, 5)],
+            'title': TITLES[bucket(host, len(TITLES))], 'content_length': 512 + bucket(host, 50000),
+            'tech': techs, 'technologies': techs, 'words': 120, 'lines': 40, 'failed': False
+        }))
+
+def nuclei(args):
+    per_host = setting('FINDINGS', 1.0)
+    whole, fraction = int(per_host), per_host - int(per_host)
+    out = Output()
+    for url in read_targets(args):
+        count = whole + (1 if bucket(url) < fraction * 1000 else 0)
+        for n in range(count):
+            template = f'template-{bucket(f"{url}#{n}", 3000)}'
+            out.write(json.dumps({
+                'template-id': template,
+                'template-path': f'/root/nuclei-templates/http/{template}.yaml',
+                'info': {
+                    'name': f'Finding {template}', 'author': ['someone'], 'tags': ['cve', 'tech', 'misconfig'],
+                    'severity': SEVERITIES[bucket(template, len(SEVERITIES))],
+                    'description': 'Detected something worth a look.', 'reference': ['https://example.org/advisory']
+                },
+                'type': 'http', 'host': url, 'matched-at': f'{url}/path/{n}', 'ip': '10.0.0.1',
+                'timestamp': '2024-01-01T00:00:00.000000000Z', 'matcher-status': True
+            }))
+
+def main():
+    tool, args = sys.argv[1], sys.argv[2:]
+    if tool in ENUMERATION_RANGES:
+        enumerate_tool(tool, args)
+    elif tool == 'httpx':
+        httpx(args)
+    elif tool == 'nuclei':
+        nuclei(args)
+    else:
+        sys.exit(f'unknown tool: {tool}')
+
+if __name__ == '__main__':
+    main()
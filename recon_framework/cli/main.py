@@ -1,10 +1,12 @@
 import json
+import os
+from datetime import datetime
 from pathlib import Path
 import click
 from core.config import ScanConfig
-from core.logger import get_logger
-from core.database import ReconDatabase
-from engines.full import FullReconEngine
+
+# Engines, modules and their dependencies are imported inside the commands
+# that need them so that --help and light commands start quickly.
 
 @click.group()
 @click.version_option(version='1.0.0')
@@ -12,15 +14,29 @@ def cli():
     """Recon framework"""
     pass
 
-@cli.command()
-@click.argument('target')
-@click.option('--mode', '-m', default='normal', type=click.Choice(['stealth', 'normal', 'aggressive']))
-@click.option('--profile', '-p')
-@click.option('--config', '-c')
-@click.option('--output', '-o', default='./results')
-@click.option('--threads', '-t', default=10)
-@click.option('--timeout', default=30)
-def scan(target, mode, profile, config, output, threads, timeout):
+def scan_options(func):
+    """Options shared by the single-target and batch scan commands."""
+    options = [
+        click.option('--mode', '-m', default='normal', type=click.Choice(['stealth', 'normal', 'aggressive'])),
+        click.option('--profile', '-p'),
+        click.option('--config', '-c'),
+        click.option('--output', '-o', default='./results'),
+        click.option('--threads', '-t', default=10),
+        click.option('--timeout', default=30),
+        click.option('--incremental', is_flag=True, help='Only re-probe new or stale hosts since the last completed scan'),
+        click.option('--http-backend', type=click.Choice(['httpx', 'native']), help='Probe with the httpx binary or the in-process prober'),
+        click.option('--resolver', 'resolvers', multiple=True, help='DNS resolver (host[:port]) used to pre-filter dead subdomains'),
+        click.option('--no-resolve', is_flag=True, help='Probe every enumerated subdomain without DNS pre-filtering'),
+        click.option('--no-cache', is_flag=True, help='Always run tools instead of reusing cached output'),
+        click.option('--rate-limit', type=float, help='Requests per second against the target, shared by all tools (0 = unlimited)'),
+        click.option('--metrics-file', help='Export stage and tool metrics (.prom for Prometheus text, otherwise JSON lines)'),
+        click.option('--stages', help='Comma-separated stages to run, e.g. enumerate,resolve,probe,scan,secrets'),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+def build_config(target, mode, profile, config, output, threads, timeout, incremental, http_backend, resolvers, no_resolve, no_cache, rate_limit, metrics_file, stages) -> ScanConfig:
     if config:
         cfg = ScanConfig.from_file(config)
     elif profile:
@@ -33,22 +49,212 @@ def scan(target, mode, profile, config, output, threads, timeout):
     cfg.output_dir = output
     cfg.threads = threads
     cfg.timeout = timeout
+    cfg.incremental = cfg.incremental or incremental
+    if http_backend:
+        cfg.http_backend = http_backend
+    if resolvers:
+        cfg.dns_resolvers = list(resolvers)
+    if no_resolve:
+        cfg.resolve_dns = False
+    if no_cache:
+        cfg.cache_enabled = False
+    if rate_limit is not None:
+        cfg.rate_limit = rate_limit
+    if metrics_file:
+        cfg.metrics_file = metrics_file
+    if stages:
+        cfg.stages = [stage.strip() for stage in stages.split(',') if stage.strip()]
+    return cfg
+
+@cli.command()
+@click.argument('target')
+@scan_options
+@click.option('--pipeline', is_flag=True, help='Stream hosts between stages in micro-batches')
+@click.option('--distributed', is_flag=True, help='Queue tool runs as jobs for `recon worker` processes')
+@click.option('--job-concurrency', type=int,
+              help='With --distributed, jobs run at once across all workers; each gets an equal share of the rate limit')
+def scan(target, pipeline, distributed, job_concurrency, **options):
+    from core.logger import get_logger
+    from core.database import ReconDatabase
+    from core.records import json_default
+    from engines.full import FullReconEngine
+    from engines.pipeline import PipelinedReconEngine
+    from engines.distributed import DistributedReconEngine
+
+    cfg = build_config(target, **options)
+    cfg.pipeline = cfg.pipeline or pipeline
+    cfg.distributed = cfg.distributed or distributed
+    if job_concurrency is not None:
+        cfg.job_concurrency = job_concurrency
+    if cfg.job_concurrency < 1:
+        raise click.UsageError('--job-concurrency must be at least 1')
+    if cfg.pipeline and cfg.incremental:
+        raise click.UsageError('--pipeline and --incremental cannot be combined')
+    if cfg.distributed and (cfg.pipeline or cfg.incremental):
+        raise click.UsageError('--distributed cannot be combined with --pipeline or --incremental')
+    output = cfg.output_dir
 
     Path(output).mkdir(parents=True, exist_ok=True)
 
     logger = get_logger('ReconFramework')
-    db = ReconDatabase(f"{output}/recon.db")
-    engine = FullReconEngine(cfg, db)
+    db = ReconDatabase(f"{output}/recon.db", persistent=True, synchronous=cfg.db_synchronous)
+    if cfg.distributed:
+        engine = DistributedReconEngine(cfg, db)
+        click.echo(f"Waiting for workers: recon worker --db {output}/recon.db")
+    elif cfg.pipeline:
+        try:
+            engine = PipelinedReconEngine(cfg, db)
+        except ValueError as e:
+            db.close()
+            raise click.UsageError(str(e))
+    else:
+        engine = FullReconEngine(cfg, db)
 
     try:
         logger.info(f"Starting scan on {target}")
         results = engine.run()
         with open(f"{output}/results.json", 'w') as f:
-            json.dump(results, f, indent=2)
+            json.dump(results, f, indent=2, default=json_default)
         click.echo(f"Results saved to {output}/results.json")
+        if results.get('status') == 'partial':
+            click.echo(f"Stages with failures: {', '.join(results['incomplete_stages'])}", err=True)
+            click.echo(f"Resume with: recon resume {engine.scan_id} -o {output}", err=True)
     except Exception as e:
         logger.error(f"Scan failed: {e}")
         click.echo(f"Error: {e}", err=True)
+        if engine.scan_id is not None and not cfg.pipeline:
+            click.echo(f"Resume with: recon resume {engine.scan_id} -o {output}", err=True)
+    finally:
+        db.close()
+
+@cli.command()
+@click.argument('scan_id', type=int)
+@click.option('--output', '-o', default='./results', help='Directory holding the recon.db of the scan')
+def resume(scan_id, output):
+    """Continue an interrupted or partial scan from its last completed stage or shard."""
+    from core.logger import get_logger
+    from core.database import ReconDatabase
+    from core.records import json_default
+    from engines.full import FullReconEngine
+    from engines.distributed import DistributedReconEngine
+
+    db_path = Path(output) / 'recon.db'
+    if not db_path.exists():
+        click.echo('No scan results found', err=True)
+        return
+    logger = get_logger('ReconFramework')
+    db = ReconDatabase(str(db_path), persistent=True)
+    try:
+        scan = db.get_scan(scan_id)
+        if scan is None:
+            raise click.UsageError(f'No scan with id {scan_id}')
+        if scan['status'] == 'completed':
+            click.echo(f"Scan {scan_id} already completed")
+            return
+        cfg = ScanConfig.from_dict(json.loads(scan['config'] or '{}'))
+        if cfg.pipeline:
+            raise click.UsageError('Pipelined scans are not checkpointed; start a new scan instead')
+        cfg.output_dir = output
+        engine = DistributedReconEngine(cfg, db) if cfg.distributed else FullReconEngine(cfg, db)
+        logger.info(f"Resuming scan {scan_id} on {cfg.target}")
+        results = engine.resume(scan_id)
+        with open(f"{output}/results.json", 'w') as f:
+            json.dump(results, f, indent=2, default=json_default)
+        click.echo(f"Results saved to {output}/results.json")
+        if results['status'] == 'partial':
+            click.echo(f"Stages with failures: {', '.join(results['incomplete_stages'])}", err=True)
+            click.echo(f"Resume with: recon resume {scan_id} -o {output}", err=True)
+    except click.UsageError:
+        raise
+    except Exception as e:
+        logger.error(f"Resume failed: {e}")
+        click.echo(f"Error: {e}", err=True)
+        click.echo(f"Resume with: recon resume {scan_id} -o {output}", err=True)
+    finally:
+        db.close()
+
+@cli.command()
+@click.option('--db', 'db_path', default='./results/recon.db', show_default=True, help='Database of the distributed scans')
+@click.option('--name', help='Name recorded with the jobs this worker runs (default: host:pid)')
+@click.option('--lease', default=60.0, show_default=True, help='Seconds a job stays claimed without a heartbeat')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between queue polls while idle')
+@click.option('--max-idle', default=0.0, help='Exit after this many seconds without work (default: run until stopped)')
+def worker(db_path, name, lease, poll_interval, max_idle):
+    """Run the jobs of scans started with --distributed.
+
+    Start as many workers as the machine (or machines sharing the
+    database file) can take; SIGTERM lets the running job finish first.
+    """
+    import signal
+    from core.database import ReconDatabase
+    from engines.worker import ScanWorker
+
+    if not Path(db_path).exists():
+        click.echo(f'No database at {db_path}; start a scan with --distributed first', err=True)
+        return
+    db = ReconDatabase(db_path, persistent=True)
+    scan_worker = ScanWorker(db, name, lease=lease, poll_interval=poll_interval, max_idle=max_idle)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scan_worker.stop())
+    try:
+        scan_worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    click.echo(f"Worker {scan_worker.name} processed {scan_worker.processed} jobs")
+
+@cli.command('scan-batch')
+@click.argument('targets_file', type=click.Path(exists=True, dir_okay=False))
+@scan_options
+@click.option('--workers', '-w', default=4,
+              help='Threads advancing targets in turn; each target also runs its own stages on up to '
+                   'stage_workers threads, so only --max-processes caps total tool load')
+@click.option('--max-processes', type=int, help='Limit on concurrent tool processes across all targets (default: threads)')
+@click.option('--resume', is_flag=True, help='Continue the last batch in the output directory, skipping targets it completed')
+def scan_batch(targets_file, workers, max_processes, resume, **options):
+    """Scan every target listed in TARGETS_FILE."""
+    from core.logger import get_logger
+    from core.database import ReconDatabase
+    from core.records import json_default
+    from engines.batch import BatchScheduler
+
+    with open(targets_file) as f:
+        targets = list(dict.fromkeys(line.strip() for line in f if line.strip() and not line.startswith('#')))
+    if not targets:
+        raise click.UsageError(f'No targets in {targets_file}')
+    cfg = build_config(targets[0], **options)
+    if cfg.metrics_file.endswith('.prom'):
+        raise click.UsageError('scan-batch appends metrics per target; use a JSON lines --metrics-file')
+    output = cfg.output_dir
+    Path(output).mkdir(parents=True, exist_ok=True)
+
+    logger = get_logger('ReconFramework')
+    db = ReconDatabase(f"{output}/recon.db", persistent=True, synchronous=cfg.db_synchronous)
+    if resume:
+        cfg.batch_id = db.get_last_batch_id()
+        if cfg.batch_id is None:
+            db.close()
+            raise click.UsageError(f'No batch to resume in {output}')
+    else:
+        cfg.batch_id = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+    def save_results(target, results):
+        with open(f"{output}/results_{target}.json", 'w') as f:
+            json.dump(results, f, indent=2, default=json_default)
+
+    scheduler = BatchScheduler(cfg, targets, db, workers=workers, max_processes=max_processes or cfg.threads, on_complete=save_results)
+    try:
+        logger.info(f"Starting batch {cfg.batch_id} of {len(targets)} targets")
+        outcomes = scheduler.run()
+        with open(f"{output}/batch_summary.json", 'w') as f:
+            json.dump(outcomes, f, indent=2)
+        counts = {}
+        for outcome in outcomes.values():
+            counts[outcome['status']] = counts.get(outcome['status'], 0) + 1
+        click.echo(', '.join(f'{n} {status}' for status, n in sorted(counts.items())))
+        click.echo(f"Summary saved to {output}/batch_summary.json")
+    finally:
+        db.close()
 
 @cli.command()
 @click.argument('target')
@@ -59,11 +265,40 @@ def report(target, output, format):
     if not db_path.exists():
         click.echo('No scan results found', err=True)
         return
-    db = ReconDatabase(str(db_path))
+    from core.database import ReconDatabase
     from reports.generator import ReportGenerator
+    db = ReconDatabase(str(db_path))
     gen = ReportGenerator(db)
     report_file = gen.generate_report(target, output, format)
     click.echo(f"Report generated: {report_file}")
 
+@cli.command()
+@click.option('--db', 'db_path', default='./results/recon.db', show_default=True, help='Database to export from')
+@click.option('--output', '-o', default='./export', show_default=True)
+@click.option('--format', '-f', default='auto', type=click.Choice(['auto', 'parquet', 'arrow', 'jsonl']),
+              help='auto writes Parquet when pyarrow is installed, gzip JSON lines otherwise')
+@click.option('--dataset', '-d', 'datasets', multiple=True, type=click.Choice(['subdomains', 'live_hosts', 'findings']),
+              help='Dataset to export (default: all)')
+@click.option('--target', 'targets', multiple=True, help='Only scans of this target')
+@click.option('--since', type=click.DateTime(), help='Only scans started at or after this time')
+@click.option('--until', type=click.DateTime(), help='Only scans started before this time')
+@click.option('--raw', is_flag=True, help='Include the raw nuclei output with findings')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows read and written at a time')
+def export(db_path, output, format, datasets, targets, since, until, raw, chunk_size):
+    """Export hosts and findings across scans for offline analysis."""
+    if not Path(db_path).exists():
+        click.echo('No scan results found', err=True)
+        return
+    from core.database import ReconDatabase
+    from reports.exporter import ScanExporter
+    db = ReconDatabase(db_path)
+    try:
+        manifest = ScanExporter(db, chunk_size=chunk_size).export(output, format, datasets, targets, since, until, raw)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    for name, dataset in manifest['datasets'].items():
+        click.echo(f"{name}: {dataset['rows']} rows, {dataset['bytes'] / 2**20:.1f} MB in {len(dataset['files'])} file(s)")
+    click.echo(f"Exported as {manifest['format']} to {output}")
+
 if __name__ == '__main__':
     cli()
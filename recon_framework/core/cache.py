@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+class ToolCache:
+    """Content-addressed on-disk cache of external tool output.
+
+    Entries are keyed on the command line, with any argument that names an
+    existing file replaced by a hash of its contents (targets files are
+    random temp paths), plus an optional context dict. stdout is stored
+    gzip-compressed under <key[:2]>/<key>.gz; the file mtime doubles as
+    the last-use time for age- and size-based eviction.
+    """
+    def __init__(self, cache_dir: str, max_age: int = 21600, max_size: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, command: List[str], context: Optional[Dict] = None) -> str:
+        digest = hashlib.sha256()
+        for arg in command:
+            if os.path.isfile(arg):
+                digest.update(b'file:' + self._file_digest(arg))
+            else:
+                digest.update(b'arg:' + arg.encode())
+            digest.update(b'\0')
+        digest.update(json.dumps(context or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _file_digest(path: str) -> bytes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.digest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.gz'
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the entry path on a fresh hit, counting the hit or miss."""
+        path = self._path(key)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        fresh = mtime is not None and time.time() - mtime <= self.max_age
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not fresh:
+            return None
+        os.utime(path)
+        return path
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.lookup(key)
+        if path is None:
+            return None
+        with gzip.open(path, 'rt') as f:
+            return f.read()
+
+    def iter_lines(self, key: str, binary: bool = False) -> Optional[Iterator[Union[str, bytes]]]:
+        path = self.lookup(key)
+        if path is None:
+            return None
+        return self._read_lines(path, binary)
+
+    @staticmethod
+    def _read_lines(path: Path, binary: bool = False) -> Iterator[Union[str, bytes]]:
+        if binary:
+            with gzip.open(path, 'rb') as f:
+                for line in f:
+                    yield line.rstrip(b'\n')
+            return
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    def put(self, key: str, output: str):
+        writer = self.writer(key)
+        writer.write(output)
+        writer.commit()
+
+    def writer(self, key: str) -> 'CacheWriter':
+        return CacheWriter(self, self._path(key))
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used until under max_size."""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*/*.gz'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+class CacheWriter:
+    """Writes an entry to a temporary file and publishes it atomically on commit."""
+    def __init__(self, cache: ToolCache, path: Path):
+        self.cache = cache
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        self.file = gzip.open(self.tmp_path, 'wb')
+
+    def write(self, text: str):
+        self.file.write(text.encode())
+
+    def write_line(self, line: Union[str, bytes]):
+        self.file.write(line.encode() if isinstance(line, str) else line)
+        self.file.write(b'\n')
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        with self.cache._lock:
+            self.cache.stores += 1
+
+    def abort(self):
+        self.file.close()
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,7 +1,6 @@
-import yaml
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import Dict, List
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
 
 @dataclass
 class ScanConfig:
@@ -11,7 +10,43 @@ class ScanConfig:
     output_dir: str = './results'
     threads: int = 10
     timeout: int = 30
-    delay_range: tuple = (1, 3)
+    rate_limit: Optional[float] = None
+    rate_burst: float = 0
+    stages: List = field(default_factory=lambda: ['enumerate', 'resolve', 'probe', 'scan'])
+    stage_workers: int = 2
+    module_plugins: List[str] = field(default_factory=list)
+    parallel_tools: bool = True
+    pipeline: bool = False
+    distributed: bool = False
+    job_max_attempts: int = 3
+    job_poll_interval: float = 1.0
+    job_concurrency: int = 4
+    probe_batch_size: int = 500
+    batch_id: str = ''
+    batch_size: int = 50
+    batch_wait: float = 2.0
+    queue_size: int = 1000
+    db_synchronous: str = 'NORMAL'
+    incremental: bool = False
+    resolve_dns: bool = True
+    dns_resolvers: List[str] = field(default_factory=list)
+    dns_workers: int = 0
+    dns_cache_ttl: int = 300
+    dns_timeout: float = 2.0
+    http_backend: str = 'httpx'
+    json_backend: str = 'auto'
+    signature_files: List[str] = field(default_factory=list)
+    nuclei_workers: int = 0
+    nuclei_shard_size: int = 0
+    nuclei_retries: int = 1
+    nuclei_timeout_base: int = 120
+    nuclei_timeout_per_host: int = 5
+    cache_enabled: bool = True
+    cache_max_age: int = 21600
+    cache_max_size_mb: int = 512
+    metrics_file: str = ''
+    per_host_limit: int = 2
+    rescan_ttl: int = 86400
     subfinder_config: Dict = field(default_factory=dict)
     nuclei_config: Dict = field(default_factory=dict)
     httpx_config: Dict = field(default_factory=dict)
@@ -19,14 +54,24 @@ class ScanConfig:
     proxies: List[str] = field(default_factory=list)
     output_formats: List[str] = field(default_factory=lambda: ['json', 'html'])
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ScanConfig':
+        """Rebuild a config stored with a scan, ignoring keys this version does not know."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
     @classmethod
     def from_file(cls, config_path: str) -> 'ScanConfig':
+        import yaml
         with open(config_path, 'r') as f:
             data = yaml.safe_load(f)
+        # Tool launches are paced by rate_limit; older config files may still set delay_range.
+        data.pop('delay_range', None)
         return cls(**data)
 
     @classmethod
     def from_profile(cls, profile_name: str, target: str) -> 'ScanConfig':
+        import yaml
         profile_path = Path(__file__).parent.parent / 'config' / 'profiles.yaml'
         with open(profile_path, 'r') as f:
             profiles = yaml.safe_load(f)
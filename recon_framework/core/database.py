@@ -1,81 +1,307 @@
+import hashlib
 import sqlite3
 import json
+import threading
+import time
 from datetime import datetime
 from contextlib import contextmanager
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from core.records import Subdomain, LiveHost, Finding, Secret, record_from_row, json_default
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+SEVERITY_RANKS = {'unknown': 0, 'info': 1, 'low': 2, 'medium': 3, 'high': 4, 'critical': 5}
+
+def migrate_subdomains_to_assets(conn: sqlite3.Connection):
+    """Fold the pre-inventory subdomains table, one row per name and one per URL, into assets."""
+    scans = conn.execute(
+        'SELECT DISTINCT s.id, s.target, s.started_at FROM scans s JOIN subdomains d ON d.scan_id = s.id ORDER BY s.started_at'
+    ).fetchall()
+    for scan in scans:
+        rows = conn.execute('SELECT * FROM subdomains WHERE scan_id = ?', (scan['id'],))
+        records = (
+            Subdomain(row['subdomain'].lower(), row['ip_address'], row['probed_at']) if row['status_code'] is None
+            else LiveHost(row['subdomain'], status_code=row['status_code'], title=row['title'],
+                          technologies=json.loads(row['technologies'] or '[]'), content_length=row['content_length'],
+                          ip_address=row['ip_address'], probed_at=row['probed_at'])
+            for row in rows
+        )
+        ReconDatabase._upsert_hosts(conn, scan['id'], scan['target'], scan['started_at'], records)
+    conn.execute('DROP TABLE subdomains')
+
+# Applied in order on top of the base schema; the 1-based position of each
+# script is stored in PRAGMA user_version once it has run. A callable is a
+# data migration and is called with the connection.
+MIGRATIONS = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_scans_target_started ON scans (target, started_at);
+    CREATE INDEX IF NOT EXISTS idx_subdomains_scan_subdomain ON subdomains (scan_id, subdomain);
+    ALTER TABLE vulnerabilities ADD COLUMN severity_rank INTEGER NOT NULL DEFAULT 0;
+    UPDATE vulnerabilities SET severity_rank = CASE lower(severity)
+        WHEN 'info' THEN 1 WHEN 'low' THEN 2 WHEN 'medium' THEN 3
+        WHEN 'high' THEN 4 WHEN 'critical' THEN 5 ELSE 0 END;
+    CREATE INDEX IF NOT EXISTS idx_vulnerabilities_scan_severity ON vulnerabilities (scan_id, severity_rank);
+    CREATE INDEX IF NOT EXISTS idx_secrets_scan ON secrets (scan_id);
+    """,
+    """
+    ALTER TABLE subdomains ADD COLUMN content_length INTEGER;
+    ALTER TABLE subdomains ADD COLUMN probed_at TIMESTAMP;
+    CREATE INDEX IF NOT EXISTS idx_scans_target_status ON scans (target, status, started_at);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scan_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scan_id INTEGER,
+        kind TEXT,
+        name TEXT,
+        started_at TIMESTAMP,
+        wall_time REAL,
+        cpu_user REAL,
+        cpu_system REAL,
+        max_rss_kb INTEGER,
+        items_in INTEGER,
+        items_out INTEGER,
+        delay_time REAL,
+        FOREIGN KEY (scan_id) REFERENCES scans (id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_scan_metrics_scan ON scan_metrics (scan_id, kind, name);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scan_checkpoints (
+        scan_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        shard TEXT NOT NULL DEFAULT '',
+        state TEXT,
+        completed_at TIMESTAMP,
+        PRIMARY KEY (scan_id, stage, shard),
+        FOREIGN KEY (scan_id) REFERENCES scans (id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS assets (
+        id INTEGER PRIMARY KEY,
+        target TEXT NOT NULL,
+        name TEXT NOT NULL,
+        first_seen TIMESTAMP NOT NULL,
+        last_seen TIMESTAMP NOT NULL,
+        first_scan_id INTEGER,
+        last_scan_id INTEGER,
+        UNIQUE (target, name)
+    );
+    CREATE TABLE IF NOT EXISTS asset_http_states (
+        id INTEGER PRIMARY KEY,
+        asset_id INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        url TEXT,
+        status_code INTEGER,
+        title TEXT,
+        technologies TEXT,
+        content_length INTEGER,
+        webserver TEXT,
+        UNIQUE (asset_id, digest),
+        FOREIGN KEY (asset_id) REFERENCES assets (id)
+    );
+    CREATE TABLE IF NOT EXISTS asset_observations (
+        scan_id INTEGER NOT NULL,
+        asset_id INTEGER NOT NULL,
+        http_state_id INTEGER,
+        ip_address TEXT,
+        probed_at TIMESTAMP,
+        PRIMARY KEY (scan_id, asset_id),
+        FOREIGN KEY (scan_id) REFERENCES scans (id),
+        FOREIGN KEY (asset_id) REFERENCES assets (id),
+        FOREIGN KEY (http_state_id) REFERENCES asset_http_states (id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_asset_observations_asset ON asset_observations (asset_id, scan_id);
+    CREATE VIEW IF NOT EXISTS scan_hosts AS
+        SELECT o.scan_id, a.id AS asset_id, a.target, a.name, a.first_seen, a.last_seen, a.first_scan_id,
+               o.ip_address, o.probed_at, h.url, h.status_code, h.title, h.technologies, h.content_length, h.webserver
+        FROM asset_observations o
+        JOIN assets a ON a.id = o.asset_id
+        LEFT JOIN asset_http_states h ON h.id = o.http_state_id;
+    """,
+    migrate_subdomains_to_assets,
+    """
+    CREATE TABLE IF NOT EXISTS scan_jobs (
+        id INTEGER PRIMARY KEY,
+        scan_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        worker TEXT,
+        lease_until REAL,
+        result TEXT,
+        error TEXT,
+        created_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        FOREIGN KEY (scan_id) REFERENCES scans (id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs (status, id);
+    CREATE INDEX IF NOT EXISTS idx_scan_jobs_scan ON scan_jobs (scan_id, stage);
+    """,
+    """
+    ALTER TABLE scans ADD COLUMN batch_id TEXT;
+    CREATE INDEX IF NOT EXISTS idx_scans_batch ON scans (batch_id, status);
+    """,
+]
+
+def execute_script(conn: sqlite3.Connection, script: str):
+    """Run the statements of script one by one inside the open transaction.
+
+    Unlike executescript() this does not commit first, so a migration and
+    its version bump stay in one transaction.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+    if statement.strip():
+        raise ValueError(f'Incomplete SQL statement: {statement.strip()}')
+
+def severity_rank(severity) -> int:
+    return SEVERITY_RANKS.get(str(severity or 'unknown').lower(), 0)
+
 
 class ReconDatabase:
-    """SQLite database handler"""
-    def __init__(self, db_path: str):
+    """SQLite database handler
+
+    By default every call opens and closes its own connection. With
+    persistent=True a single WAL-journaled connection is kept open and
+    shared between threads, which is what scans should use for bulk writes.
+    """
+    def __init__(self, db_path: str, persistent: bool = False, synchronous: str = 'NORMAL'):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'Invalid synchronous mode: {synchronous}')
         self.db_path = db_path
+        self.persistent = persistent
+        self.synchronous = synchronous
+        self._conn = None
+        self._lock = threading.RLock()
         self.init_database()
 
     def init_database(self):
         with self.get_connection() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS scans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    target TEXT NOT NULL,
-                    scan_type TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    started_at TIMESTAMP NOT NULL,
-                    completed_at TIMESTAMP,
-                    config TEXT
-                );
-                CREATE TABLE IF NOT EXISTS subdomains (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scan_id INTEGER,
-                    subdomain TEXT NOT NULL,
-                    ip_address TEXT,
-                    status_code INTEGER,
-                    title TEXT,
-                    technologies TEXT,
-                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (scan_id) REFERENCES scans (id)
-                );
-                CREATE TABLE IF NOT EXISTS vulnerabilities (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scan_id INTEGER,
-                    target TEXT NOT NULL,
-                    template_id TEXT,
-                    severity TEXT,
-                    description TEXT,
-                    matched_at TEXT,
-                    raw_output TEXT,
-                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (scan_id) REFERENCES scans (id)
-                );
-                CREATE TABLE IF NOT EXISTS secrets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scan_id INTEGER,
-                    target TEXT NOT NULL,
-                    secret_type TEXT,
-                    secret_value TEXT,
-                    file_path TEXT,
-                    line_number INTEGER,
-                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (scan_id) REFERENCES scans (id)
-                );
-                """
-            )
+            self.migrate(conn)
+
+    @staticmethod
+    def create_base_schema(conn: sqlite3.Connection):
+        execute_script(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS scans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                target TEXT NOT NULL,
+                scan_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at TIMESTAMP NOT NULL,
+                completed_at TIMESTAMP,
+                config TEXT
+            );
+            CREATE TABLE IF NOT EXISTS subdomains (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scan_id INTEGER,
+                subdomain TEXT NOT NULL,
+                ip_address TEXT,
+                status_code INTEGER,
+                title TEXT,
+                technologies TEXT,
+                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (scan_id) REFERENCES scans (id)
+            );
+            CREATE TABLE IF NOT EXISTS vulnerabilities (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scan_id INTEGER,
+                target TEXT NOT NULL,
+                template_id TEXT,
+                severity TEXT,
+                description TEXT,
+                matched_at TEXT,
+                raw_output TEXT,
+                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (scan_id) REFERENCES scans (id)
+            );
+            CREATE TABLE IF NOT EXISTS secrets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scan_id INTEGER,
+                target TEXT NOT NULL,
+                secret_type TEXT,
+                secret_value TEXT,
+                file_path TEXT,
+                line_number INTEGER,
+                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (scan_id) REFERENCES scans (id)
+            );
+            """
+        )
+
+    def migrate(self, conn: sqlite3.Connection):
+        """Apply pending migrations, each in its own transaction.
+
+        A scan and its workers may open a new database at the same moment,
+        so every step takes the write lock first and re-reads the version
+        under it; a process that loses the race finds the step done.
+        """
+        while conn.execute('PRAGMA user_version').fetchone()[0] < len(MIGRATIONS):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                if version == 0:
+                    # The base schema is the one migration 1 starts from; later
+                    # migrations may drop parts of it, so it only runs on new files.
+                    self.create_base_schema(conn)
+                if version < len(MIGRATIONS):
+                    step = MIGRATIONS[version]
+                    # A callable is a data migration and runs as Python.
+                    if callable(step):
+                        step(conn)
+                    else:
+                        execute_script(conn, step)
+                    conn.execute(f'PRAGMA user_version = {version + 1}')
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
 
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        if self.persistent:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+                yield self._conn
+            return
+        conn = self._connect()
         try:
             yield conn
         finally:
             conn.close()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=not self.persistent)
+        conn.row_factory = sqlite3.Row
+        if self.persistent:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def create_scan(self, target: str, scan_type: str, config: Dict) -> int:
         with self.get_connection() as conn:
             cur = conn.cursor()
             cur.execute(
-                """INSERT INTO scans (target, scan_type, status, started_at, config)
-                VALUES (?, ?, ?, ?, ?)""",
-                (target, scan_type, 'running', datetime.now(), json.dumps(config))
+                """INSERT INTO scans (target, scan_type, status, started_at, config, batch_id)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                (target, scan_type, 'running', datetime.now(), json.dumps(config), config.get('batch_id') or None)
             )
             conn.commit()
             return cur.lastrowid
@@ -90,37 +316,406 @@ class ReconDatabase:
             conn.commit()
 
     def add_subdomain(self, scan_id: int, subdomain: str, **kwargs):
+        if kwargs.get('status_code') is None:
+            record = Subdomain(subdomain, kwargs.get('ip_address'), kwargs.get('probed_at'))
+        else:
+            record = LiveHost(subdomain, **kwargs)
+        self.add_subdomains_many(scan_id, [record])
+
+    def add_subdomains_many(self, scan_id: int, records: Iterable[Union[Subdomain, LiveHost]]) -> int:
+        """Record Subdomain and LiveHost records as observations of the scan target's assets.
+
+        Writes are upserts in a single transaction: a host known from
+        earlier scans only gets its last_seen moved, an HTTP state is only
+        stored when it differs from every state seen for the host before,
+        and writing a host twice in one scan (its name from enumeration,
+        its URL from probing) merges into one observation.
+        """
         with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """INSERT INTO subdomains (scan_id, subdomain, ip_address, status_code, title, technologies)
-                VALUES (?, ?, ?, ?, ?, ?)""",
-                (
-                    scan_id,
-                    subdomain,
-                    kwargs.get('ip_address'),
-                    kwargs.get('status_code'),
-                    kwargs.get('title'),
-                    json.dumps(kwargs.get('technologies', []))
+            with conn:
+                target = self._scan_target(conn, scan_id)
+                return self._upsert_hosts(conn, scan_id, target, datetime.now(), records)
+
+    @staticmethod
+    def _upsert_hosts(conn: sqlite3.Connection, scan_id: int, target: str, seen_at,
+                      records: Iterable[Union[Subdomain, LiveHost]]) -> int:
+        # Records are staged in temporary tables and merged with one
+        # set-based statement per table, which SQLite runs far faster than
+        # a correlated lookup per row. Probe results are staged separately
+        # so that bare names bind only their own few columns. CROSS JOIN
+        # keeps the unindexed batch as the outer loop.
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS host_batch (name TEXT, digest TEXT, ip_address TEXT, probed_at TIMESTAMP)')
+        conn.execute(
+            """CREATE TEMP TABLE IF NOT EXISTS http_batch (
+                name TEXT, digest TEXT, url TEXT, status_code INTEGER, title TEXT, technologies TEXT,
+                content_length INTEGER, webserver TEXT
+            )"""
+        )
+        conn.execute('DELETE FROM temp.host_batch')
+        conn.execute('DELETE FROM temp.http_batch')
+        states = []
+        hosts = []
+        for record in records:
+            if isinstance(record, Subdomain):
+                hosts.append((record.name, None, record.ip_address, record.probed_at))
+                continue
+            state = record.http_state()
+            digest = hashlib.sha1(json.dumps(state).encode()).hexdigest()
+            hosts.append((record.hostname, digest, record.ip_address, record.probed_at))
+            states.append((record.hostname, digest, *state))
+        if not hosts:
+            return 0
+        conn.executemany('INSERT INTO temp.host_batch VALUES (?, ?, ?, ?)', hosts)
+        conn.executemany('INSERT INTO temp.http_batch VALUES (?, ?, ?, ?, ?, ?, ?, ?)', states)
+        # Out-of-order writes (a resumed old scan) never move first_seen later or last_seen earlier.
+        conn.execute(
+            """INSERT INTO assets (target, name, first_seen, last_seen, first_scan_id, last_scan_id)
+            SELECT DISTINCT ?, name, ?, ?, ?, ? FROM temp.host_batch WHERE true
+            ON CONFLICT (target, name) DO UPDATE SET
+                first_scan_id = CASE WHEN excluded.first_seen < first_seen THEN excluded.first_scan_id ELSE first_scan_id END,
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_scan_id = CASE WHEN excluded.last_seen >= last_seen THEN excluded.last_scan_id ELSE last_scan_id END,
+                last_seen = MAX(last_seen, excluded.last_seen)""",
+            (target, seen_at, seen_at, scan_id, scan_id)
+        )
+        conn.execute(
+            """INSERT INTO asset_http_states (asset_id, digest, url, status_code, title, technologies, content_length, webserver)
+            SELECT a.id, b.digest, b.url, b.status_code, b.title, b.technologies, b.content_length, b.webserver
+            FROM temp.http_batch b CROSS JOIN assets a ON a.target = ? AND a.name = b.name
+            WHERE true
+            ON CONFLICT (asset_id, digest) DO NOTHING""",
+            (target,)
+        )
+        conn.execute(
+            """INSERT INTO asset_observations (scan_id, asset_id, http_state_id, ip_address, probed_at)
+            SELECT ?, a.id, h.id, b.ip_address, b.probed_at
+            FROM temp.host_batch b
+            CROSS JOIN assets a ON a.target = ? AND a.name = b.name
+            LEFT JOIN asset_http_states h ON h.asset_id = a.id AND h.digest = b.digest
+            WHERE true
+            ON CONFLICT (scan_id, asset_id) DO UPDATE SET
+                http_state_id = COALESCE(excluded.http_state_id, http_state_id),
+                ip_address = COALESCE(excluded.ip_address, ip_address),
+                probed_at = COALESCE(excluded.probed_at, probed_at)""",
+            (scan_id, target)
+        )
+        return len(hosts)
+
+    @staticmethod
+    def _scan_target(conn: sqlite3.Connection, scan_id: int) -> str:
+        row = conn.execute('SELECT target FROM scans WHERE id = ?', (scan_id,)).fetchone()
+        if row is None:
+            raise ValueError(f'No scan with id {scan_id}')
+        return row['target']
+
+    def set_probed_at(self, scan_id: int, probes: Iterable[Tuple[str, datetime]]) -> int:
+        """Record when each (subdomain, probed_at) pair was last probed."""
+        return self._update_observations(scan_id, 'probed_at', probes)
+
+    def set_ip_addresses(self, scan_id: int, addresses: Iterable[Tuple[str, str]]) -> int:
+        """Store the resolved (subdomain, ip_address) pairs of a scan."""
+        return self._update_observations(scan_id, 'ip_address', addresses)
+
+    def _update_observations(self, scan_id: int, column: str, values: Iterable[Tuple[str, object]]) -> int:
+        with self.get_connection() as conn:
+            with conn:
+                target = self._scan_target(conn, scan_id)
+                # Names are resolved to asset ids first, so the update is a
+                # primary key lookup per host; the last value given for a host wins.
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS value_batch (name TEXT, value)')
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS asset_values (asset_id INTEGER PRIMARY KEY, value)')
+                conn.execute('DELETE FROM temp.value_batch')
+                conn.execute('DELETE FROM temp.asset_values')
+                conn.executemany('INSERT INTO temp.value_batch VALUES (?, ?)', values)
+                conn.execute(
+                    """INSERT OR REPLACE INTO temp.asset_values
+                    SELECT a.id, v.value FROM temp.value_batch v CROSS JOIN assets a ON a.target = ? AND a.name = v.name
+                    ORDER BY v.rowid""",
+                    (target,)
                 )
-            )
-            conn.commit()
+                cur = conn.execute(
+                    f"""UPDATE asset_observations
+                    SET {column} = (SELECT value FROM temp.asset_values v WHERE v.asset_id = asset_observations.asset_id)
+                    WHERE scan_id = ? AND asset_id IN (SELECT asset_id FROM temp.asset_values)""",
+                    (scan_id,)
+                )
+            return cur.rowcount
+
+    def get_completed_targets(self, batch_id: str) -> set:
+        """Targets with a completed scan in the given scan-batch run."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT target FROM scans WHERE batch_id = ? AND status = 'completed'", (batch_id,)
+            ).fetchall()
+        return {row['target'] for row in rows}
+
+    def get_last_batch_id(self) -> Optional[str]:
+        with self.get_connection() as conn:
+            row = conn.execute('SELECT batch_id FROM scans WHERE batch_id IS NOT NULL ORDER BY id DESC LIMIT 1').fetchone()
+        return row['batch_id'] if row else None
+
+    def get_last_completed_scan(self, target: str) -> Optional[Dict]:
+        with self.get_connection() as conn:
+            row = conn.execute(
+                """SELECT * FROM scans WHERE target = ? AND status = 'completed'
+                ORDER BY started_at DESC LIMIT 1""",
+                (target,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_subdomains(self, scan_id: int) -> List[Union[Subdomain, LiveHost]]:
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT * FROM scan_hosts WHERE scan_id = ?', (scan_id,)).fetchall()
+        return [record_from_row(row) for row in rows]
+
+    def get_vulnerabilities(self, scan_id: int) -> List[Finding]:
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT * FROM vulnerabilities WHERE scan_id = ?', (scan_id,)).fetchall()
+        return [Finding.from_row(row) for row in rows]
 
     def add_vulnerability(self, scan_id: int, target: str, vuln_data: Dict):
+        self.add_vulnerabilities_many(scan_id, [Finding.from_dict(vuln_data, host=target)])
+
+    def add_vulnerabilities_many(self, scan_id: int, findings: Iterable[Finding]) -> int:
+        """Insert findings in a single transaction, storing each tool line verbatim as raw_output."""
         with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """INSERT INTO vulnerabilities (scan_id, target, template_id, severity, description, matched_at, raw_output)
-                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    scan_id,
-                    target,
-                    vuln_data.get('template_id'),
-                    vuln_data.get('severity'),
-                    vuln_data.get('description'),
-                    vuln_data.get('matched_at'),
-                    json.dumps(vuln_data)
+            with conn:
+                return self._insert_vulnerabilities(conn, scan_id, findings)
+
+    @staticmethod
+    def _insert_vulnerabilities(conn: sqlite3.Connection, scan_id: int, findings: Iterable[Finding]) -> int:
+        params = (
+            (scan_id, f.host, f.template_id, f.severity, severity_rank(f.severity), f.description, f.matched_at, f.raw)
+            for f in findings
+        )
+        cur = conn.executemany(
+            """INSERT INTO vulnerabilities (scan_id, target, template_id, severity, severity_rank, description, matched_at, raw_output)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            params
+        )
+        return cur.rowcount
+
+    def get_scan(self, scan_id: int) -> Optional[Dict]:
+        with self.get_connection() as conn:
+            row = conn.execute('SELECT * FROM scans WHERE id = ?', (scan_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save_checkpoint(self, scan_id: int, stage: str, state: Dict, shard: str = ''):
+        """Mark a stage (or one shard of it) completed, keeping state as JSON to restore it from."""
+        with self.get_connection() as conn:
+            with conn:
+                self._upsert_checkpoint(conn, scan_id, stage, shard, state)
+
+    def checkpoint_shard(self, scan_id: int, stage: str, shard: Optional[str], findings: List[Finding]) -> int:
+        """Store the findings of one shard and, unless shard is None, mark it completed, in one transaction."""
+        with self.get_connection() as conn:
+            with conn:
+                count = self._insert_vulnerabilities(conn, scan_id, findings)
+                if shard is not None:
+                    self._upsert_checkpoint(conn, scan_id, stage, shard, {'findings': len(findings)})
+            return count
+
+    @staticmethod
+    def _upsert_checkpoint(conn: sqlite3.Connection, scan_id: int, stage: str, shard: str, state: Dict):
+        conn.execute(
+            """INSERT OR REPLACE INTO scan_checkpoints (scan_id, stage, shard, state, completed_at)
+            VALUES (?, ?, ?, ?, ?)""",
+            (scan_id, stage, shard, json.dumps(state, default=json_default), datetime.now())
+        )
+
+    def get_checkpoints(self, scan_id: int, stage: Optional[str] = None) -> Dict[Tuple[str, str], Dict]:
+        """Completed checkpoints of a scan as {(stage, shard): state}; stage-level ones have shard ''."""
+        query = 'SELECT stage, shard, state FROM scan_checkpoints WHERE scan_id = ?'
+        params = (scan_id,)
+        if stage is not None:
+            query += ' AND stage = ?'
+            params += (stage,)
+        with self.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return {(row['stage'], row['shard']): json.loads(row['state'] or '{}') for row in rows}
+
+    # Job queue for distributed scans. A coordinator enqueues the jobs of a
+    # stage; workers claim one at a time under a lease (an absolute expiry,
+    # in seconds since the epoch) that they keep renewing while the job
+    # runs. A job whose lease runs out is handed to the next worker that
+    # asks, until it has used up max_attempts.
+
+    def enqueue_jobs(self, scan_id: int, stage: str, payloads: Iterable[Dict], max_attempts: int = 3) -> int:
+        now = datetime.now()
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.executemany(
+                    'INSERT INTO scan_jobs (scan_id, stage, payload, max_attempts, created_at) VALUES (?, ?, ?, ?, ?)',
+                    ((scan_id, stage, json.dumps(payload), max_attempts, now) for payload in payloads)
                 )
-            )
-            conn.commit()
+            return cur.rowcount
+
+    def get_jobs(self, scan_id: int, stage: str) -> List[Dict]:
+        """Jobs of a scan stage in enqueue order, with payload and result decoded."""
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT * FROM scan_jobs WHERE scan_id = ? AND stage = ? ORDER BY id', (scan_id, stage)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def count_jobs(self, scan_id: int, stage: str) -> Dict[str, int]:
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                'SELECT status, count(*) AS n FROM scan_jobs WHERE scan_id = ? AND stage = ? GROUP BY status', (scan_id, stage)
+            ).fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    @staticmethod
+    def _job(row) -> Dict:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def claim_job(self, worker: str, lease: float) -> Optional[Dict]:
+        """Lease the oldest runnable job of a running scan to worker, or return None if there is none.
+
+        A scan whose stored config sets job_concurrency never has more than
+        that many jobs running at once, whatever the number of workers.
+        """
+        now = time.time()
+        with self.get_connection() as conn:
+            with conn:
+                row = conn.execute(
+                    """UPDATE scan_jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1
+                    WHERE id = (
+                        SELECT j.id FROM scan_jobs j JOIN scans s ON s.id = j.scan_id
+                        WHERE s.status = 'running' AND (
+                            j.status = 'pending'
+                            OR (j.status = 'running' AND j.lease_until < ? AND j.attempts < j.max_attempts)
+                        ) AND (
+                            json_extract(s.config, '$.job_concurrency') IS NULL
+                            OR json_extract(s.config, '$.job_concurrency') > (
+                                SELECT count(*) FROM scan_jobs r
+                                WHERE r.scan_id = j.scan_id AND r.status = 'running' AND r.lease_until >= ?
+                            )
+                        )
+                        ORDER BY j.id LIMIT 1
+                    )
+                    RETURNING *""",
+                    (worker, now + lease, now, now)
+                ).fetchone()
+        return self._job(row) if row else None
+
+    def renew_job(self, job_id: int, worker: str, lease: float) -> bool:
+        """Extend the lease of a job worker holds; False if the job was handed to someone else."""
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE scan_jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (time.time() + lease, job_id, worker)
+                )
+            return cur.rowcount == 1
 
+    def complete_job(self, job_id: int, worker: str, result: Dict, hosts: Iterable[Union[Subdomain, LiveHost]] = (),
+                     findings: Iterable[Finding] = (), shard: Optional[str] = None) -> bool:
+        """Mark a job done and store what it found, in one transaction.
+
+        Nothing is written unless worker still holds the job, so a worker
+        whose lease expired cannot duplicate the results of the one that
+        took the job over. With shard, the job's findings also complete that
+        shard's checkpoint, as a local scan would.
+        """
+        with self.get_connection() as conn:
+            with conn:
+                row = conn.execute(
+                    """UPDATE scan_jobs SET status = 'done', result = ?, error = NULL, finished_at = ?
+                    WHERE id = ? AND worker = ? AND status = 'running'
+                    RETURNING scan_id, stage""",
+                    (json.dumps(result, default=json_default), datetime.now(), job_id, worker)
+                ).fetchone()
+                if row is None:
+                    return False
+                scan_id = row['scan_id']
+                self._upsert_hosts(conn, scan_id, self._scan_target(conn, scan_id), datetime.now(), hosts)
+                findings = list(findings)
+                self._insert_vulnerabilities(conn, scan_id, findings)
+                if shard is not None:
+                    self._upsert_checkpoint(conn, scan_id, row['stage'], shard, {'findings': len(findings)})
+            return True
+
+    def fail_job(self, job_id: int, worker: str, error: str) -> bool:
+        """Give a job back after an error: pending again if it has attempts left, failed otherwise."""
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.execute(
+                    """UPDATE scan_jobs SET
+                        status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                        error = ?, lease_until = NULL,
+                        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END
+                    WHERE id = ? AND worker = ? AND status = 'running'""",
+                    (error, datetime.now(), job_id, worker)
+                )
+            return cur.rowcount == 1
+
+    def release_job(self, job_id: int, worker: str) -> bool:
+        """Give a job back unfinished (the worker is shutting down) without using up an attempt."""
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.execute(
+                    """UPDATE scan_jobs SET status = 'pending', attempts = attempts - 1, lease_until = NULL
+                    WHERE id = ? AND worker = ? AND status = 'running'""",
+                    (job_id, worker)
+                )
+            return cur.rowcount == 1
+
+    def fail_expired_jobs(self, scan_id: int) -> int:
+        """Fail jobs of a scan whose last lease expired with no attempts left."""
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.execute(
+                    """UPDATE scan_jobs SET status = 'failed', error = 'lease expired', finished_at = ?
+                    WHERE scan_id = ? AND status = 'running' AND lease_until < ? AND attempts >= max_attempts""",
+                    (datetime.now(), scan_id, time.time())
+                )
+            return cur.rowcount
+
+    def retry_failed_jobs(self, scan_id: int, stage: str) -> int:
+        """Make the failed jobs of a stage pending again with fresh attempts, e.g. on resume."""
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.execute(
+                    """UPDATE scan_jobs SET status = 'pending', attempts = 0, lease_until = NULL, finished_at = NULL
+                    WHERE scan_id = ? AND stage = ? AND status = 'failed'""",
+                    (scan_id, stage)
+                )
+            return cur.rowcount
+
+    def add_secrets_many(self, scan_id: int, secrets: Iterable[Secret]) -> int:
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.executemany(
+                    """INSERT INTO secrets (scan_id, target, secret_type, secret_value, file_path, line_number)
+                    VALUES (?, ?, ?, ?, ?, ?)""",
+                    ((scan_id, s.target, s.secret_type, s.secret_value, s.file_path, s.line_number) for s in secrets)
+                )
+            return cur.rowcount
+
+    def get_secrets(self, scan_id: int) -> List[Secret]:
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT * FROM secrets WHERE scan_id = ?', (scan_id,)).fetchall()
+        return [Secret.from_row(row) for row in rows]
+
+    def add_metrics_many(self, scan_id: int, metrics: Iterable) -> int:
+        """Store the Metric records collected during a scan."""
+        params = (
+            (scan_id, m.kind, m.name, m.started_at, m.wall_time, m.cpu_user, m.cpu_system,
+             m.max_rss_kb, m.items_in, m.items_out, m.delay_time)
+            for m in metrics
+        )
+        with self.get_connection() as conn:
+            with conn:
+                cur = conn.executemany(
+                    """INSERT INTO scan_metrics (scan_id, kind, name, started_at, wall_time, cpu_user, cpu_system, max_rss_kb, items_in, items_out, delay_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    params
+                )
+            return cur.rowcount
+
+    def get_metrics(self, scan_id: int) -> List[Dict]:
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT * FROM scan_metrics WHERE scan_id = ? ORDER BY id', (scan_id,)).fetchall()
+        return [dict(row) for row in rows]
@@ -1,16 +1,20 @@
-from loguru import logger
 from pathlib import Path
 
 _loggers = {}
 
 def get_logger(name: str):
+    """Return a logger bound to name with its own rotating file sink.
+
+    loguru is imported on first use and the sink is opened with delay=True,
+    so neither the logs directory nor the file exist until something is
+    actually logged.
+    """
     if name in _loggers:
         return _loggers[name]
 
-    log_dir = Path('logs')
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / f"{name}.log"
+    from loguru import logger
+    log_file = Path('logs') / f"{name}.log"
     _logger = logger.bind(name=name)
-    _logger.add(log_file, rotation='1 MB', retention=5)
+    _logger.add(log_file, rotation='1 MB', retention=5, delay=True)
     _loggers[name] = _logger
     return _logger
@@ -0,0 +1,122 @@
+import json
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+@dataclass
+class Metric:
+    """One measured unit of work: an engine stage, a tool run or a DB write."""
+    kind: str
+    name: str
+    started_at: str = ''
+    wall_time: float = 0.0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    max_rss_kb: int = 0
+    items_in: Optional[int] = None
+    items_out: Optional[int] = None
+    delay_time: float = 0.0
+
+class MetricsCollector:
+    """Thread-safe collector of Metric records for a single scan.
+
+    Stage CPU time is the process-wide delta (this process plus reaped
+    children) over the stage, so overlapping stages share it. Tool metrics
+    come from wait4() and are exact per child process.
+    """
+    def __init__(self, stealth_manager=None):
+        self.stealth_manager = stealth_manager
+        self.records: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def add(self, metric: Metric):
+        with self._lock:
+            self.records.append(metric)
+
+    def record_process(self, name: str, wall_time: float, usage, items_out: Optional[int] = None, delay_time: float = 0.0):
+        self.add(Metric(
+            kind='tool', name=name, started_at=datetime.now().isoformat(),
+            wall_time=wall_time, cpu_user=usage.ru_utime if usage else 0.0,
+            cpu_system=usage.ru_stime if usage else 0.0, max_rss_kb=usage.ru_maxrss if usage else 0,
+            items_out=items_out, delay_time=delay_time
+        ))
+
+    @contextmanager
+    def measure(self, kind: str, name: str, items_in: Optional[int] = None) -> Iterator[Metric]:
+        """Time the enclosed block; the caller may set items_out on the yielded Metric."""
+        metric = Metric(kind=kind, name=name, started_at=datetime.now().isoformat(), items_in=items_in)
+        before_self = resource.getrusage(resource.RUSAGE_SELF)
+        before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        delay_before = self.stealth_manager.delay_total if self.stealth_manager else 0.0
+        start = time.perf_counter()
+        try:
+            yield metric
+        finally:
+            metric.wall_time = time.perf_counter() - start
+            after_self = resource.getrusage(resource.RUSAGE_SELF)
+            after_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            metric.cpu_user = (after_self.ru_utime - before_self.ru_utime) + (after_children.ru_utime - before_children.ru_utime)
+            metric.cpu_system = (after_self.ru_stime - before_self.ru_stime) + (after_children.ru_stime - before_children.ru_stime)
+            metric.max_rss_kb = after_self.ru_maxrss
+            if self.stealth_manager:
+                metric.delay_time = self.stealth_manager.delay_total - delay_before
+            self.add(metric)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Aggregate records by (kind, name): totals, peak RSS and a run count."""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for metric in records:
+            entry = totals.setdefault((metric.kind, metric.name), {
+                'kind': metric.kind, 'name': metric.name, 'count': 0, 'wall_time': 0.0,
+                'cpu_user': 0.0, 'cpu_system': 0.0, 'max_rss_kb': 0,
+                'items_in': 0, 'items_out': 0, 'delay_time': 0.0
+            })
+            entry['count'] += 1
+            for field in ('wall_time', 'cpu_user', 'cpu_system', 'delay_time'):
+                entry[field] = round(entry[field] + getattr(metric, field), 4)
+            for field in ('items_in', 'items_out'):
+                entry[field] += getattr(metric, field) or 0
+            entry['max_rss_kb'] = max(entry['max_rss_kb'], metric.max_rss_kb)
+        return list(totals.values())
+
+    def export(self, path: str, labels: Dict[str, Any]):
+        """Write Prometheus text format for .prom files, JSON lines otherwise."""
+        if path.endswith('.prom'):
+            self.export_prometheus(path, labels)
+        else:
+            self.export_jsonl(path, labels)
+
+    def export_jsonl(self, path: str, labels: Dict[str, Any]):
+        with self._lock:
+            records = list(self.records)
+        with open(path, 'a') as f:
+            for metric in records:
+                f.write(json.dumps({**labels, **asdict(metric)}) + '\n')
+
+    def export_prometheus(self, path: str, labels: Dict[str, Any]):
+        series = [
+            ('recon_wall_seconds', 'wall_time', 1, 'Wall-clock time spent'),
+            ('recon_cpu_user_seconds', 'cpu_user', 1, 'User CPU time'),
+            ('recon_cpu_system_seconds', 'cpu_system', 1, 'System CPU time'),
+            ('recon_max_rss_bytes', 'max_rss_kb', 1024, 'Peak resident set size'),
+            ('recon_items_in', 'items_in', 1, 'Items consumed'),
+            ('recon_items_out', 'items_out', 1, 'Items produced'),
+            ('recon_delay_seconds', 'delay_time', 1, 'Time spent in stealth delays'),
+            ('recon_runs', 'count', 1, 'Number of measured runs'),
+        ]
+        summary = self.summary()
+        lines = []
+        for metric_name, field, scale, help_text in series:
+            lines.append(f'# HELP {metric_name} {help_text}')
+            lines.append(f'# TYPE {metric_name} gauge')
+            for entry in summary:
+                label_text = ','.join(f'{k}="{v}"' for k, v in {**labels, 'kind': entry['kind'], 'name': entry['name']}.items())
+                lines.append(f'{metric_name}{{{label_text}}} {entry[field] * scale}')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
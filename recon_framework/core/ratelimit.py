@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """Token bucket shared by threads and asyncio tasks.
+
+    Tokens refill at rate per second up to burst. acquire() reserves its
+    tokens under a lock and then waits outside it, so the balance may go
+    negative: later callers queue behind earlier ones in arrival order and
+    the long-run rate never exceeds the budget. A rate of 0 or less means
+    unlimited.
+    """
+    def __init__(self, rate: float, burst: float = 0):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens now and return how long the caller must wait before using them."""
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -0,0 +1,211 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+class Subdomain:
+    """An enumerated host name that has not answered an HTTP probe."""
+    __slots__ = ('name', 'ip_address', 'probed_at')
+
+    def __init__(self, name: str, ip_address: Optional[str] = None, probed_at=None):
+        self.name = name
+        self.ip_address = ip_address
+        self.probed_at = probed_at
+
+    @classmethod
+    def from_row(cls, row) -> 'Subdomain':
+        return cls(row['name'], row['ip_address'], row['probed_at'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'subdomain': self.name, 'ip_address': self.ip_address, 'probed_at': self.probed_at}
+
+class LiveHost:
+    """A host that answered an HTTP probe.
+
+    Only the fields the framework reads are kept; the rest of the prober's
+    JSON (headers, hashes, chain) is dropped at parse time. interesting
+    holds the reasons the scan's signatures gave, set by HTTPModule.classify.
+    """
+    __slots__ = ('url', 'input', 'status_code', 'title', 'technologies', 'content_length',
+                 'webserver', 'ip_address', 'probed_at', 'interesting')
+    # Keys read from httpx JSON; parsers project each object to these.
+    JSON_FIELDS = ('url', 'input', 'status_code', 'status-code', 'title', 'tech', 'technologies',
+                   'content_length', 'content-length', 'webserver')
+
+    def __init__(self, url: str, input: Optional[str] = None, status_code: Optional[int] = None,
+                 title: Optional[str] = None, technologies: Optional[List[str]] = None,
+                 content_length: Optional[int] = None, webserver: Optional[str] = None,
+                 ip_address: Optional[str] = None, probed_at=None,
+                 interesting: Optional[List[str]] = None):
+        self.url = url
+        self.input = input
+        self.status_code = status_code
+        self.title = title
+        self.technologies = technologies or []
+        self.content_length = content_length
+        self.webserver = webserver
+        self.ip_address = ip_address
+        self.probed_at = probed_at
+        self.interesting = interesting
+
+    @classmethod
+    def from_json(cls, line: str) -> 'LiveHost':
+        """Parse one httpx JSON line; raises ValueError if it is malformed."""
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError('expected a JSON object')
+        return cls.from_parsed(data, line)
+
+    @classmethod
+    def from_parsed(cls, data: Dict[str, Any], line=None) -> 'LiveHost':
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LiveHost':
+        # httpx has used both dashed and underscored keys across versions.
+        return cls(
+            url=data.get('url') or '',
+            input=data.get('input'),
+            status_code=data.get('status_code', data.get('status-code')),
+            title=data.get('title'),
+            technologies=data.get('tech') or data.get('technologies'),
+            content_length=data.get('content_length', data.get('content-length')),
+            webserver=data.get('webserver')
+        )
+
+    @classmethod
+    def from_row(cls, row) -> 'LiveHost':
+        return cls(
+            url=row['url'], input=row['name'], status_code=row['status_code'], title=row['title'],
+            technologies=json.loads(row['technologies'] or '[]'), content_length=row['content_length'],
+            webserver=row['webserver'], ip_address=row['ip_address'], probed_at=row['probed_at']
+        )
+
+    @property
+    def name(self) -> str:
+        return self.url
+
+    @property
+    def hostname(self) -> str:
+        """The host name that was probed: the prober's input, else the URL's host."""
+        if self.input:
+            return self.input.lower()
+        return (urlparse(self.url).hostname or self.url).lower()
+
+    def http_state(self) -> Tuple:
+        """The probe result columns stored for the host, technologies as JSON."""
+        return (self.url, self.status_code, self.title, json.dumps(self.technologies), self.content_length, self.webserver)
+
+    def fingerprint(self) -> Dict[str, Any]:
+        return {
+            'status_code': self.status_code,
+            'title': self.title or '',
+            'technologies': sorted(self.technologies),
+            'content_length': self.content_length
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.__slots__}
+        if data['interesting'] is None:
+            # Hosts no module classified fall back to the bundled signatures.
+            from utils.signatures import default_signatures
+            data['interesting'] = default_signatures().classify(self)
+        return data
+
+class Finding:
+    """A nuclei finding.
+
+    The tool's JSON line is kept verbatim in raw and stored as-is in the
+    database; the full document is only parsed again when data is read.
+    """
+    __slots__ = ('template_id', 'name', 'severity', 'host', 'matched_at', 'description', 'raw')
+    JSON_FIELDS = ('template_id', 'template-id', 'severity', 'info', 'host', 'matched_at', 'matched-at',
+                   'name', 'description')
+
+    def __init__(self, template_id: Optional[str], severity: Optional[str], host: str,
+                 matched_at: Optional[str] = None, name: Optional[str] = None,
+                 description: Optional[str] = None, raw: Optional[str] = None):
+        self.template_id = template_id
+        self.name = name
+        self.severity = severity
+        self.host = host
+        self.matched_at = matched_at
+        self.description = description
+        self.raw = raw
+
+    @classmethod
+    def from_json(cls, line: str) -> 'Finding':
+        """Parse one nuclei JSON line; raises ValueError if it is malformed."""
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError('expected a JSON object')
+        return cls.from_parsed(data, line)
+
+    @classmethod
+    def from_parsed(cls, data: Dict[str, Any], line) -> 'Finding':
+        """Build from an already parsed (possibly projected) object and its original line."""
+        raw = line.decode('utf-8', errors='replace') if isinstance(line, bytes) else line
+        return cls.from_dict(data, raw=raw)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], host: Optional[str] = None, raw: Optional[str] = None) -> 'Finding':
+        # nuclei nests severity, name and description under 'info' and uses
+        # dashed keys; flat keys win when a caller provides them.
+        info = data.get('info') or {}
+        return cls(
+            template_id=data.get('template_id') or data.get('template-id'),
+            severity=data.get('severity') or info.get('severity'),
+            host=host if host is not None else data.get('host', ''),
+            matched_at=data.get('matched_at') or data.get('matched-at'),
+            name=data.get('name') or info.get('name'),
+            description=data.get('description') or info.get('description'),
+            raw=raw if raw is not None else json.dumps(data)
+        )
+
+    @classmethod
+    def from_row(cls, row) -> 'Finding':
+        return cls(
+            template_id=row['template_id'], severity=row['severity'], host=row['target'],
+            matched_at=row['matched_at'], description=row['description'], raw=row['raw_output']
+        )
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return json.loads(self.raw) if self.raw else {}
+
+    def dedup_key(self):
+        return (self.template_id, self.matched_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__ if field != 'raw'}
+
+class Secret:
+    """A credential-like string found in a page or script served by a live host."""
+    __slots__ = ('target', 'secret_type', 'secret_value', 'file_path', 'line_number')
+
+    def __init__(self, target: str, secret_type: str, secret_value: str,
+                 file_path: Optional[str] = None, line_number: Optional[int] = None):
+        self.target = target
+        self.secret_type = secret_type
+        self.secret_value = secret_value
+        self.file_path = file_path
+        self.line_number = line_number
+
+    @classmethod
+    def from_row(cls, row) -> 'Secret':
+        return cls(row['target'], row['secret_type'], row['secret_value'], row['file_path'], row['line_number'])
+
+    def dedup_key(self):
+        return (self.secret_type, self.secret_value, self.file_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+def record_from_row(row):
+    """Subdomain for enumerated-only scan_hosts rows, LiveHost for rows with a probe result."""
+    return Subdomain.from_row(row) if row['url'] is None else LiveHost.from_row(row)
+
+def json_default(obj):
+    """json.dump default hook that serializes records and other values results carry."""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    return str(obj)
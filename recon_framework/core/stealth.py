@@ -1,16 +1,28 @@
 import random
-import time
+import threading
 from typing import List, Dict, Optional
-import requests
+from core.ratelimit import TokenBucket
+
+# Requests per second against the target when the config sets no
+# rate_limit; 0 means unlimited.
+MODE_RATE_LIMITS = {'stealth': 5, 'normal': 150, 'aggressive': 0}
 
 class StealthManager:
     def __init__(self, config: Dict):
         self.config = config
         self.mode = config.get('mode', 'normal')
-        self.delay_range = config.get('delay_range', (0.1, 0.5))
-        self.user_agents = config.get('user_agents', self._default_user_agents())
+        self.user_agents = config.get('user_agents') or self._default_user_agents()
         self.proxies = config.get('proxies', [])
-        self.session = requests.Session()
+        self._session = None
+        rate = config.get('rate_limit')
+        if rate is None:
+            rate = MODE_RATE_LIMITS.get(self.mode, 0)
+        self.bucket = TokenBucket(rate, config.get('rate_burst') or 0)
+        # Number of stages that run tools against the target at the same
+        # time; each gets an equal slice of the budget.
+        self.tool_shares = 1
+        self.delay_total = 0.0
+        self._delay_lock = threading.Lock()
 
     def _default_user_agents(self) -> List[str]:
         return [
@@ -19,14 +31,45 @@ class StealthManager:
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36'
         ]
 
-    def apply_delay(self):
-        if self.mode == 'stealth':
-            delay = random.uniform(2, 5)
-        elif self.mode == 'normal':
-            delay = random.uniform(0.5, 1.5)
-        else:
-            delay = random.uniform(0.01, 0.1)
-        time.sleep(delay)
+    @property
+    def session(self):
+        """requests.Session created on first use, keeping requests out of the import path."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def apply_delay(self) -> float:
+        """Take one token from the shared budget before a tool launch; returns the time waited."""
+        delay = self.bucket.acquire()
+        with self._delay_lock:
+            self.delay_total += delay
+        return delay
+
+    def tool_share(self) -> Optional[float]:
+        """Requests per second each concurrent stage may use, None if unlimited."""
+        if self.bucket.unlimited:
+            return None
+        return self.bucket.rate / self.tool_shares
+
+    def max_concurrency(self, wanted: int, rate: Optional[float] = None) -> int:
+        """How many of wanted concurrent runs fit in rate, the whole budget by default, at 1 request per second each."""
+        rate = self.bucket.rate if rate is None else rate
+        if self.bucket.unlimited:
+            return max(1, wanted)
+        return max(1, min(wanted, int(rate)))
+
+    def tool_rate_limit(self, processes: int = 1) -> Optional[int]:
+        """Requests per second each of processes concurrent tool processes may use, None if unlimited.
+
+        Tools only take whole requests per second, so the share is rounded
+        down. Callers keep processes within max_concurrency of the stage's
+        share so that no process is rounded up to 1; the exception is a
+        budget under 1 request per second, which is passed as 1.
+        """
+        if self.bucket.unlimited:
+            return None
+        return max(1, int(self.tool_share() / max(1, processes)))
 
     def get_headers(self) -> Dict[str, str]:
         return {
@@ -0,0 +1,102 @@
+import threading
+from collections import deque
+from dataclasses import replace
+from typing import Dict, List, Any, Callable, Optional
+from core.logger import get_logger
+from core.database import ReconDatabase
+from engines.full import FullReconEngine
+
+class BatchScheduler:
+    """Scans many targets on one shared worker pool.
+
+    Every target runs as a FullReconEngine stage generator. A worker takes
+    the next target from a round-robin queue, advances it by one stage and
+    puts it back at the tail, so a target with a slow stage never holds up
+    the others. At most max_active targets are in flight at once, and all
+    engines share one database and one bound on concurrent tool processes.
+    Stages a target's engine starts keep running on its own DAG pool
+    between turns, so only max_processes bounds the total tool load.
+
+    Scans are tagged with base_config.batch_id; targets that already have
+    a completed scan in that batch are skipped, which is how an
+    interrupted batch is resumed.
+    """
+    def __init__(self, base_config, targets: List[str], database: ReconDatabase, workers: int = 4,
+                 max_processes: Optional[int] = None, max_active: Optional[int] = None,
+                 on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.base_config = base_config
+        self.targets = targets
+        self.database = database
+        self.workers = max(1, workers)
+        self.max_active = max_active or self.workers * 2
+        self.process_slots = threading.BoundedSemaphore(max_processes) if max_processes else None
+        self.on_complete = on_complete
+        self.logger = get_logger('BatchScheduler')
+        self.outcomes = {}
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        completed = self.database.get_completed_targets(self.base_config.batch_id)
+        pending = deque(t for t in self.targets if t not in completed)
+        for target in self.targets:
+            if target in completed:
+                self.outcomes[target] = {'status': 'skipped'}
+        self.logger.info(f'Batch of {len(self.targets)} targets, {len(pending)} to scan, {len(completed & set(self.targets))} already completed')
+
+        ready = deque()
+        state = {'active': 0}
+        cond = threading.Condition()
+
+        def admit():
+            while pending and state['active'] < self.max_active:
+                target = pending.popleft()
+                engine = FullReconEngine(replace(self.base_config, target=target), self.database, self.process_slots)
+                ready.append((target, engine, engine.iter_stages()))
+                state['active'] += 1
+
+        def finish(target: str, outcome: Dict[str, Any]):
+            self.outcomes[target] = outcome
+            with cond:
+                state['active'] -= 1
+                admit()
+                cond.notify_all()
+
+        def worker():
+            while True:
+                with cond:
+                    while not ready and (state['active'] or pending):
+                        cond.wait()
+                    if not ready:
+                        return
+                    target, engine, stages = ready.popleft()
+                try:
+                    stage = next(stages)
+                except StopIteration:
+                    self.complete(target, engine, finish)
+                    continue
+                except Exception as e:
+                    self.logger.error(f'{target} failed: {e}')
+                    finish(target, {'status': 'failed', 'scan_id': engine.scan_id, 'error': str(e)})
+                    continue
+                self.logger.info(f'{target}: {stage} done')
+                with cond:
+                    ready.append((target, engine, stages))
+                    cond.notify()
+
+        with cond:
+            admit()
+        threads = [threading.Thread(target=worker, name=f'batch-worker-{n}') for n in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.outcomes
+
+    def complete(self, target: str, engine: FullReconEngine, finish: Callable):
+        outcome = {'status': engine.results['status'], 'scan_id': engine.scan_id}
+        if self.on_complete:
+            try:
+                self.on_complete(target, engine.results)
+            except Exception as e:
+                self.logger.error(f'Saving results for {target} failed: {e}')
+                outcome['error'] = str(e)
+        finish(target, outcome)
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Set, Union
+from modules.registry import get_module
+
+@dataclass
+class Stage:
+    name: str
+    module: type
+    config: Dict[str, Any] = field(default_factory=dict)
+    depends: Set[str] = field(default_factory=set)
+
+def parse_stage(entry: Union[str, Dict[str, Any]]):
+    """A stages entry is a module name or a one-key mapping of name to config overrides."""
+    if isinstance(entry, str):
+        return entry, {}
+    if isinstance(entry, dict) and len(entry) == 1:
+        name, overrides = next(iter(entry.items()))
+        return name, dict(overrides or {})
+    raise ValueError(f'Invalid stage entry: {entry!r}')
+
+def plan_stages(entries: Iterable[Union[str, Dict[str, Any]]], config: Dict[str, Any],
+                initial: Iterable[str] = ('target',)) -> List[Stage]:
+    """Resolve stage entries into Stages wired by the data keys they consume.
+
+    A stage depends on the closest earlier enabled stage that outputs each
+    of its inputs, so a stage may refine a key it also reads (resolve
+    narrows subdomains) and the listed order is always a valid schedule.
+    """
+    producers = {key: None for key in initial}
+    stages = []
+    for entry in entries:
+        name, overrides = parse_stage(entry)
+        if any(stage.name == name for stage in stages):
+            raise ValueError(f"Stage '{name}' is listed twice")
+        module = get_module(name)
+        if not module.enabled({**config, **overrides}):
+            continue
+        depends = set()
+        for key in module.inputs:
+            if key not in producers:
+                raise ValueError(f"Stage '{name}' needs '{key}' but no earlier stage produces it")
+            if producers[key] is not None:
+                depends.add(producers[key])
+        for key in module.outputs:
+            producers[key] = name
+        stages.append(Stage(name, module, overrides, depends))
+    return stages
+
+class DAGExecutor:
+    """Runs planned stages on a thread pool as soon as their dependencies finish.
+
+    At most workers stages run at once; ready stages start in listed order.
+    After a stage fails no new stage is started, the running ones are
+    allowed to finish and the first error is re-raised.
+    """
+    def __init__(self, stages: List[Stage], workers: int = 1):
+        self.stages = stages
+        self.workers = max(1, workers)
+
+    def width(self) -> int:
+        """Stages that may run at the same time, estimated by dependency depth."""
+        depth = {}
+        for stage in self.stages:
+            depth[stage.name] = 1 + max((depth[d] for d in stage.depends), default=0)
+        levels = {}
+        for level in depth.values():
+            levels[level] = levels.get(level, 0) + 1
+        return min(self.workers, max(levels.values(), default=1))
+
+    def iter_run(self, run: Callable[[Stage], Any], completed: Iterable[str] = ()) -> Iterator[str]:
+        """Call run(stage) for every stage not in completed, yielding stage names as they complete."""
+        done = set(completed)
+        pending = [stage for stage in self.stages if stage.name not in done]
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='stage') as pool:
+            while pending or running:
+                if error is None:
+                    for stage in [s for s in pending if s.depends <= done]:
+                        if len(running) >= self.workers:
+                            break
+                        pending.remove(stage)
+                        running[pool.submit(run, stage)] = stage
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    done.add(stage.name)
+                    if error is None:
+                        yield stage.name
+        if error is not None:
+            raise error
@@ -0,0 +1,108 @@
+import time
+from typing import Dict, List, Any, Callable, Tuple
+from core.exceptions import ModuleException
+from core.records import LiveHost
+from engines.full import FullReconEngine
+from utils.domains import DomainSet
+
+class DistributedReconEngine(FullReconEngine):
+    """Coordinates a scan whose tool runs are done by `recon worker` processes.
+
+    Enumeration is queued as one job per tool, probing as one job per
+    probe_batch_size hosts and vulnerability scanning as one job per nuclei
+    shard, in the scan_jobs table of the scan database. Workers on this
+    machine or any other that can open the database claim the jobs and
+    write hosts and findings back themselves; the coordinator waits for a
+    stage's jobs, merges their results and carries on. Other stages,
+    checkpoints and the report run here exactly as in a local scan.
+
+    Jobs outlive the coordinator: a resumed scan picks up the jobs already
+    queued for a stage, so completed ones are not run again and failed ones
+    get a fresh set of attempts.
+    """
+    @property
+    def stage_runners(self) -> Dict[str, Callable]:
+        return {
+            **super().stage_runners,
+            'enumerate': self.dispatch_enumeration,
+            'probe': self.dispatch_probing,
+            'scan': self.dispatch_scanning,
+        }
+
+    def run_jobs(self, stage: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Queue a job per payload, unless the stage already has jobs, and wait until none is left to run."""
+        if self.database.get_jobs(self.scan_id, stage):
+            retried = self.database.retry_failed_jobs(self.scan_id, stage)
+            self.logger.info(f'{stage}: reusing queued jobs, {retried} failed ones retried')
+        else:
+            self.database.enqueue_jobs(self.scan_id, stage, payloads, self.config.job_max_attempts)
+        last = None
+        while True:
+            self.database.fail_expired_jobs(self.scan_id)
+            counts = self.database.count_jobs(self.scan_id, stage)
+            if not counts.get('pending') and not counts.get('running'):
+                break
+            if counts != last:
+                self.logger.info(
+                    f"{stage}: {counts.get('done', 0)}/{sum(counts.values())} jobs done, "
+                    f"{counts.get('running', 0)} running, {counts.get('pending', 0)} waiting for a worker"
+                )
+                last = counts
+            time.sleep(self.config.job_poll_interval)
+        return self.database.get_jobs(self.scan_id, stage)
+
+    def dispatch_enumeration(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        target = inputs['target']
+        if not module.validate_target(target):
+            raise ValueError(f'Invalid target: {target}')
+        jobs = self.run_jobs('enumerate', [{'tool': tool} for tool in module.tools])
+        all_subdomains = DomainSet(target)
+        tool_results = {}
+        for job in jobs:
+            tool = job['payload']['tool']
+            if job['status'] != 'done':
+                self.logger.error(f"{tool} failed: {job['error']}")
+                tool_results[tool] = {'count': 0, 'error': job['error']}
+                continue
+            subs = job['result']['subdomains']
+            added = all_subdomains.add_many(subs)
+            tool_results[tool] = {'count': len(subs), 'elapsed': job['result']['elapsed'], 'new': len(added), 'worker': job['worker']}
+        final_subdomains = sorted(all_subdomains)
+        results = {'subdomains': final_subdomains, 'tool_results': tool_results, 'total_count': len(final_subdomains)}
+        self.record_subdomains(final_subdomains)
+        return results, module.stage_outputs(results)
+
+    def dispatch_probing(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        subdomains = inputs['subdomains']
+        size = max(1, self.config.probe_batch_size)
+        jobs = self.run_jobs('probe', [{'hosts': subdomains[i:i + size]} for i in range(0, len(subdomains), size)])
+        failed = [job for job in jobs if job['status'] != 'done']
+        if failed:
+            # As in a local scan a failed probe fails the stage; resume retries the failed batches.
+            raise ModuleException(f"{len(failed)} of {len(jobs)} probe jobs failed: {failed[0]['error']}")
+        hosts = [row for row in self.database.get_subdomains(self.scan_id) if isinstance(row, LiveHost)]
+        module.classify(hosts)
+        results = {'live_hosts': hosts, 'total_live': len(hosts)}
+        return results, module.stage_outputs(results)
+
+    def dispatch_scanning(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        shards = module.split_shards(inputs['urls'])
+        resumed = self.database.count_jobs(self.scan_id, 'scan').get('done', 0)
+        jobs = self.run_jobs('scan', [{'urls': shard, 'shard': module.shard_key(shard)} for shard in shards])
+        failed = []
+        for index, job in enumerate(jobs):
+            if job['status'] != 'done':
+                self.logger.error(f"nuclei shard {index} failed after {job['attempts']} attempts: {job['error']}")
+                failed.append(index)
+        seen = set()
+        vulns = []
+        categorized = module.categorize_vulnerabilities([])
+        module.merge_findings(self.database.get_vulnerabilities(self.scan_id), seen, vulns, categorized)
+        results = {
+            'vulnerabilities': vulns,
+            'categorized': categorized,
+            'total_vulns': len(vulns),
+            'shards': {'total': len(jobs), 'resumed': resumed, 'workers': len({job['worker'] for job in jobs if job['worker']}),
+                       'retried': sum(max(0, job['attempts'] - 1) for job in jobs), 'failed': failed}
+        }
+        return results, module.stage_outputs(results)
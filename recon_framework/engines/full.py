@@ -1,63 +1,343 @@
-from typing import Dict, List, Any
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
 from pathlib import Path
+from urllib.parse import urlparse
 from core.logger import get_logger
 from core.stealth import StealthManager
 from core.database import ReconDatabase
-from modules.subdomain import SubdomainModule
-from modules.http import HTTPModule
-from modules.vulnerability import VulnerabilityModule
+from core.cache import ToolCache
+from core.metrics import MetricsCollector
+from core.records import Subdomain, LiveHost, Finding
+from modules.registry import load_plugins
+from engines.dag import Stage, DAGExecutor, plan_stages
 from reports.generator import ReportGenerator
 
 class FullReconEngine:
-    def __init__(self, config, database: ReconDatabase):
+    def __init__(self, config, database: ReconDatabase, process_slots=None):
         self.config = config
         self.database = database
         self.logger = get_logger('FullReconEngine')
         self.stealth_manager = StealthManager(config.__dict__)
+        self.cache = self.create_cache()
+        self.metrics = MetricsCollector(self.stealth_manager)
+        self.process_slots = process_slots
         self.scan_id = None
+        self.results = None
+        self.data = {}
+        self.stage_results = {}
+        self.delta = None
+        self.resumed = False
+        # Stages that finished with failed work, such as nuclei shards.
+        self.incomplete_stages = []
 
     def run(self) -> Dict[str, Any]:
-        self.scan_id = self.database.create_scan(self.config.target, 'full_recon', self.config.__dict__)
+        for _ in self.iter_stages():
+            pass
+        return self.results
+
+    def resume(self, scan_id: int) -> Dict[str, Any]:
+        for _ in self.iter_stages(scan_id):
+            pass
+        return self.results
+
+    def iter_stages(self, resume_id: Optional[int] = None) -> Iterator[str]:
+        """Run the scan one stage at a time, yielding each stage name as it completes.
+
+        Stages come from config.stages and run on a DAGExecutor, so stages
+        that only share inputs (scan and secrets both read the live URLs)
+        run concurrently. Every completed stage, and every nuclei shard, is
+        checkpointed in the database; with resume_id an interrupted scan is
+        continued, restoring completed stages instead of running them. A
+        stage that finishes with failed work is not checkpointed and the
+        scan ends as 'partial', so a resume runs only that work again. The
+        final results are left in self.results. Schedulers use this to
+        interleave the stages of several scans on a shared worker pool.
+        """
+        if resume_id is None:
+            self.scan_id = self.database.create_scan(self.config.target, 'full_recon', self.config.__dict__)
+        else:
+            self.scan_id = resume_id
+            self.database.update_scan_status(resume_id, 'running')
+        self.resumed = resume_id is not None
+        self.data = {'target': self.config.target}
+        self.stage_results = {}
+        self.delta = None
+        self.incomplete_stages = []
         try:
-            subdomain_results = self.run_subdomain_enumeration()
-            http_results = self.run_http_probing(subdomain_results['subdomains'])
-            vuln_results = self.run_vulnerability_scanning([h['url'] for h in http_results['live_hosts']])
-            report = self.generate_report()
-            self.database.update_scan_status(self.scan_id, 'completed')
-            return {
-                'scan_id': self.scan_id,
-                'target': self.config.target,
-                'subdomain_results': subdomain_results,
-                'http_results': http_results,
-                'vulnerability_results': vuln_results,
-                'report_path': report
-            }
+            load_plugins(self.config.module_plugins)
+            stages = plan_stages(self.config.stages, self.config.__dict__)
+            # Concurrent stages split the request budget between them, so a
+            # budget too small to give each 1 request per second runs fewer.
+            stage_workers = self.stealth_manager.max_concurrency(self.config.stage_workers)
+            if stage_workers < self.config.stage_workers:
+                self.logger.info(f'Running {stage_workers} stages at a time to stay within the rate limit')
+            executor = DAGExecutor(stages, stage_workers)
+            self.stealth_manager.tool_shares = executor.width()
+            completed = self.restore_checkpoints(stages) if self.resumed else ()
+            yield from executor.iter_run(self.run_stage, completed)
+            with self.metrics.measure('stage', 'report'):
+                report = self.generate_report()
+            status = 'partial' if self.incomplete_stages else 'completed'
+            self.database.update_scan_status(self.scan_id, status)
+            results = {'scan_id': self.scan_id, 'target': self.config.target, 'status': status}
+            if self.incomplete_stages:
+                results['incomplete_stages'] = self.incomplete_stages
+            for stage in stages:
+                results[stage.module.results_key or f'{stage.name}_results'] = self.stage_results[stage.name]
+            results['report_path'] = report
+            if self.cache is not None:
+                results['cache'] = self.cache.stats()
+            if self.delta is not None:
+                self.delta['new_vulnerabilities'] = len(self.data.get('vulnerabilities', []))
+                results['delta'] = self.delta
+                results['delta_report_path'] = self.generate_delta_report(self.delta)
+            results['metrics'] = self.save_metrics()
+            self.results = results
+            yield 'report'
         except Exception as e:
             self.logger.error(f'Scan failed: {e}')
             self.database.update_scan_status(self.scan_id, 'failed')
+            self.save_metrics()
             raise
 
-    def run_subdomain_enumeration(self) -> Dict[str, Any]:
-        module = SubdomainModule(self.config.__dict__, self.stealth_manager)
-        results = module.run(self.config.target)
-        for sub in results['subdomains']:
-            self.database.add_subdomain(self.scan_id, sub)
-        return results
+    def run_stage(self, stage: Stage):
+        """Run one planned stage and publish its outputs for the stages that depend on it."""
+        module = self.create_module(stage.module, stage.config)
+        inputs = {key: self.data[key] for key in module.inputs}
+        runner = self.stage_runners.get(stage.name, self.run_module_stage)
+        with self.metrics.measure('stage', stage.name, items_in=self.count_items(inputs)) as metric:
+            results, outputs = runner(module, inputs)
+            metric.items_out = self.count_items(outputs)
+        self.stage_results[stage.name] = results
+        self.data.update(outputs)
+        if module.incomplete(results):
+            self.logger.warning(f'Stage {stage.name} finished with failures; it runs again on resume')
+            self.incomplete_stages.append(stage.name)
+            return
+        # Outputs that are just a results entry are not stored twice.
+        state = {'outputs': {key: value for key, value in outputs.items() if value is not results.get(key)}, 'results': results}
+        if self.delta is not None:
+            state['delta'] = self.delta
+        with self.metrics.measure('db', 'checkpoints'):
+            self.database.save_checkpoint(self.scan_id, stage.name, state)
+
+    def restore_checkpoints(self, stages: List[Stage]) -> List[str]:
+        """Load outputs and results of the stages completed before a resume; return their names.
+
+        Restored values are plain JSON, so records come back as dicts.
+        """
+        checkpoints = self.database.get_checkpoints(self.scan_id)
+        restored = []
+        for stage in stages:
+            state = checkpoints.get((stage.name, ''))
+            if state is None:
+                continue
+            results = state['results']
+            self.data.update({key: results[key] for key in stage.module.outputs if key in results})
+            self.data.update(state['outputs'])
+            self.stage_results[stage.name] = results
+            if state.get('delta') is not None:
+                self.delta = state['delta']
+            restored.append(stage.name)
+        self.logger.info(f'Resuming scan {self.scan_id}, restored stages: {", ".join(restored) or "none"}')
+        return restored
+
+    @staticmethod
+    def count_items(values: Dict[str, Any]) -> Optional[int]:
+        sizes = [len(value) for value in values.values() if isinstance(value, (list, dict))]
+        return sizes[0] if sizes else None
+
+    @property
+    def stage_runners(self) -> Dict[str, Callable]:
+        """Engine-side handling of the built-in stages: persistence and incremental probing."""
+        return {
+            'enumerate': self.run_subdomain_enumeration,
+            'resolve': self.run_dns_resolution,
+            'probe': self.run_http_probing,
+            'scan': self.run_vulnerability_scanning,
+        }
+
+    def run_module_stage(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        results = module.run_stage(inputs)
+        with self.metrics.measure('db', module.name):
+            module.store(self.database, self.scan_id, results)
+        return results, module.stage_outputs(results)
 
-    def run_http_probing(self, subdomains: List[str]) -> Dict[str, Any]:
-        module = HTTPModule(self.config.__dict__, self.stealth_manager)
+    def create_module(self, module_cls, overrides: Optional[Dict[str, Any]] = None, **kwargs):
+        config = {**self.config.__dict__, **overrides} if overrides else self.config.__dict__
+        return module_cls(config, self.stealth_manager, self.cache, process_slots=self.process_slots, metrics=self.metrics, **kwargs)
+
+    def save_metrics(self) -> List[Dict[str, Any]]:
+        """Store collected metrics in scan_metrics, export them if configured and return the summary."""
+        try:
+            self.database.add_metrics_many(self.scan_id, self.metrics.records)
+            if self.config.metrics_file:
+                self.metrics.export(self.config.metrics_file, {'scan_id': self.scan_id, 'target': self.config.target})
+        except Exception as e:
+            self.logger.error(f'Saving metrics failed: {e}')
+        return self.metrics.summary()
+
+    def create_cache(self):
+        if not self.config.cache_enabled:
+            return None
+        cache = ToolCache(
+            str(Path(self.config.output_dir) / 'cache'),
+            max_age=self.config.cache_max_age,
+            max_size=self.config.cache_max_size_mb * 1024 * 1024
+        )
+        cache.evict()
+        return cache
+
+    def run_subdomain_enumeration(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        results = module.run_stage(inputs)
+        self.record_subdomains(results['subdomains'])
+        return results, module.stage_outputs(results)
+
+    def run_dns_resolution(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        results = module.run_stage(inputs)
+        self.record_ip_addresses(results['resolved'])
+        return results, module.stage_outputs(results)
+
+    def run_http_probing(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        if self.config.incremental:
+            results, scan_targets, self.delta = self.run_incremental_probing(module, inputs['subdomains'])
+            return results, {'urls': scan_targets}
+        results = self.probe_hosts(module, inputs['subdomains'])
+        return results, module.stage_outputs(results)
+
+    def probe_hosts(self, module, subdomains: List[str]) -> Dict[str, Any]:
+        probed_at = datetime.now()
         results = module.run(subdomains)
-        for host in results['live_hosts']:
-            self.database.add_subdomain(self.scan_id, host.get('url', ''), status_code=host.get('status_code'), title=host.get('title'), technologies=host.get('technologies', []))
+        self.record_live_hosts(results['live_hosts'], probed_at)
+        self.database.set_probed_at(self.scan_id, ((sub, probed_at) for sub in subdomains))
         return results
 
-    def run_vulnerability_scanning(self, live_hosts: List[str]) -> Dict[str, Any]:
-        module = VulnerabilityModule(self.config.__dict__, self.stealth_manager)
-        results = module.run(live_hosts)
-        for vuln in results['vulnerabilities']:
-            self.database.add_vulnerability(self.scan_id, vuln.get('host', ''), vuln)
-        return results
+    def run_incremental_probing(self, module, subdomains: List[str]) -> Tuple[Dict[str, Any], List[str], Dict[str, Any]]:
+        """Probe only new or stale subdomains and diff them against the last completed scan.
+
+        Hosts probed within rescan_ttl seconds are carried over from the
+        previous scan together with their findings. Returns the HTTP results,
+        the URLs nuclei still has to scan (new hosts and hosts whose
+        fingerprint changed) and a delta summary.
+        """
+        previous = self.database.get_last_completed_scan(self.config.target)
+        previous_rows = self.database.get_subdomains(previous['id']) if previous else []
+        previous_probes = {}
+        previous_live = {}
+        for row in previous_rows:
+            if isinstance(row, Subdomain):
+                previous_probes[row.name] = row.probed_at
+            else:
+                previous_probes[row.hostname] = row.probed_at
+                previous_live[row.hostname] = row
+
+        cutoff = datetime.now() - timedelta(seconds=self.config.rescan_ttl)
+        to_probe = []
+        fresh = []
+        for sub in subdomains:
+            probed_at = previous_probes.get(sub)
+            if probed_at and datetime.fromisoformat(str(probed_at)) >= cutoff:
+                fresh.append(sub)
+            else:
+                to_probe.append(sub)
+        self.logger.info(f'Incremental scan: probing {len(to_probe)} hosts, reusing {len(fresh)}')
+
+        results = self.probe_hosts(module, to_probe) if to_probe else {'live_hosts': [], 'total_live': 0}
+        carried = [previous_live[self.host_key(sub)] for sub in fresh if self.host_key(sub) in previous_live]
+        module.classify(carried)
+        self.database.add_subdomains_many(self.scan_id, carried)
+        self.database.set_probed_at(self.scan_id, ((sub, previous_probes[sub]) for sub in fresh))
+
+        scan_targets = []
+        new_live = []
+        changed = []
+        unchanged = {row.url for row in carried}
+        probed_live = set()
+        for host in results['live_hosts']:
+            url = host.url
+            key = self.host_key(host.input or url)
+            probed_live.add(key)
+            before = previous_live.get(key)
+            if before is None:
+                new_live.append(url)
+                scan_targets.append(url)
+            elif before.fingerprint() != host.fingerprint():
+                changed.append({'url': url, 'before': before.fingerprint(), 'after': host.fingerprint()})
+                scan_targets.append(url)
+            else:
+                unchanged.add(url)
+        reprobed = {self.host_key(sub) for sub in to_probe}
+        gone_live = sorted(row.url for key, row in previous_live.items() if key in reprobed and key not in probed_live)
+
+        results['live_hosts'].extend(carried)
+        results['total_live'] = len(results['live_hosts'])
+
+        carried_vulns = [
+            vuln for vuln in (self.database.get_vulnerabilities(previous['id']) if previous else [])
+            if vuln.host in unchanged
+        ]
+        self.database.add_vulnerabilities_many(self.scan_id, carried_vulns)
+
+        delta = {
+            'previous_scan_id': previous['id'] if previous else None,
+            'new_subdomains': sorted(set(subdomains) - set(previous_probes)),
+            'removed_subdomains': sorted(set(previous_probes) - set(subdomains)),
+            'new_live_hosts': new_live,
+            'changed_hosts': changed,
+            'gone_live_hosts': gone_live,
+            'probed': len(to_probe),
+            'reused': len(fresh),
+            'rescanned': len(scan_targets),
+            'carried_vulnerabilities': len(carried_vulns)
+        }
+        return results, scan_targets, delta
+
+    @staticmethod
+    def host_key(value: str) -> str:
+        return (urlparse(value if '://' in value else f'//{value}').hostname or value).lower()
+
+    def run_vulnerability_scanning(self, module, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Scan the live URLs, storing findings and checkpointing shard by shard."""
+        if self.resumed:
+            module.completed_shards = {shard for _, shard in self.database.get_checkpoints(self.scan_id, 'scan')}
+            urls = set(inputs['urls'])
+            module.resumed_findings = [v for v in self.database.get_vulnerabilities(self.scan_id) if v.host in urls]
+        module.on_shard = self.checkpoint_shard
+        results = module.run_stage(inputs)
+        return results, module.stage_outputs(results)
+
+    def checkpoint_shard(self, shard: str, findings: List[Finding], completed: bool):
+        # Findings of failed shards are kept; the shard itself runs again on resume.
+        with self.metrics.measure('db', 'vulnerabilities', items_in=len(findings)):
+            self.database.checkpoint_shard(self.scan_id, 'scan', shard if completed else None, findings)
+
+    def record_subdomains(self, subdomains: List[str]):
+        with self.metrics.measure('db', 'subdomains', items_in=len(subdomains)):
+            self.database.add_subdomains_many(self.scan_id, (Subdomain(sub) for sub in subdomains))
+
+    def record_ip_addresses(self, resolved: Dict[str, List[str]]):
+        # An upsert rather than an update: the pipelined engine resolves
+        # names before enumeration has flushed them to the database.
+        with self.metrics.measure('db', 'ip_addresses', items_in=len(resolved)):
+            self.database.add_subdomains_many(
+                self.scan_id, (Subdomain(name, ','.join(ips)) for name, ips in resolved.items())
+            )
+
+    def record_live_hosts(self, hosts: List[LiveHost], probed_at: Optional[datetime] = None):
+        probed_at = probed_at or datetime.now()
+        for host in hosts:
+            host.probed_at = probed_at
+        with self.metrics.measure('db', 'live_hosts', items_in=len(hosts)):
+            self.database.add_subdomains_many(self.scan_id, hosts)
+
+    def record_vulnerabilities(self, vulns: List[Finding]):
+        with self.metrics.measure('db', 'vulnerabilities', items_in=len(vulns)):
+            self.database.add_vulnerabilities_many(self.scan_id, vulns)
 
     def generate_report(self) -> str:
         generator = ReportGenerator(self.database)
         return generator.generate_report(self.config.target, self.config.output_dir, 'html')
+
+    def generate_delta_report(self, delta: Dict[str, Any]) -> str:
+        generator = ReportGenerator(self.database)
+        return generator.generate_delta_report(self.config.target, delta, self.config.output_dir)
@@ -0,0 +1,227 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Tuple
+from core.database import ReconDatabase
+from engines.full import FullReconEngine
+from modules.subdomain import SubdomainModule
+from modules.dns import DNSModule
+from modules.http import HTTPModule
+from modules.vulnerability import VulnerabilityModule
+from utils.domains import DomainSet
+
+_DONE = object()
+
+class PipelinedReconEngine(FullReconEngine):
+    """Streaming variant of FullReconEngine.
+
+    Subdomains are fed to httpx and live URLs to nuclei in micro-batches as
+    soon as they are discovered. Stages are connected by bounded queues, so
+    a slow consumer stalls its producer instead of buffering without limit.
+    """
+    def __init__(self, config, database: ReconDatabase):
+        super().__init__(config, database)
+        self.batch_size = max(1, getattr(config, 'batch_size', 50))
+        self.batch_wait = getattr(config, 'batch_wait', 2.0)
+        self.queue_size = max(1, getattr(config, 'queue_size', 1000))
+        self.started = None
+        self.first_finding_at = None
+        self.errors = []
+        # httpx and nuclei run at the same time, so they split the request budget.
+        self.stealth_manager.tool_shares = 2
+        if self.stealth_manager.max_concurrency(2) < 2:
+            raise ValueError('Pipelined scans run httpx and nuclei together and need a rate limit of at least 2 requests per second')
+
+    def run(self) -> Dict[str, Any]:
+        self.scan_id = self.database.create_scan(self.config.target, 'full_recon', self.config.__dict__)
+        self.started = time.monotonic()
+        try:
+            subdomain_q = queue.Queue(maxsize=self.queue_size)
+            live_q = queue.Queue(maxsize=self.queue_size)
+            subdomain_results = {'subdomains': [], 'tool_results': {}, 'total_count': 0}
+            http_results = {'live_hosts': [], 'total_live': 0}
+            dns_results = {'total_resolved': 0, 'unresolved': 0, 'wildcard_filtered': 0}
+            vuln_module = self.create_module(VulnerabilityModule)
+            vuln_results = {'vulnerabilities': [], 'categorized': vuln_module.categorize_vulnerabilities([]), 'total_vulns': 0}
+
+            stages = [
+                threading.Thread(target=self.measured_stage, name='enumerate', args=(
+                    'enumerate', self.enumerate_stage, (subdomain_q, subdomain_results),
+                    lambda: None, lambda: len(subdomain_results['subdomains']))),
+                threading.Thread(target=self.measured_stage, name='probe', args=(
+                    'probe', self.probe_stage, (subdomain_q, live_q, http_results, dns_results),
+                    lambda: len(subdomain_results['subdomains']), lambda: len(http_results['live_hosts']))),
+                threading.Thread(target=self.measured_stage, name='scan', args=(
+                    'scan', self.scan_stage, (live_q, vuln_module, vuln_results),
+                    lambda: len(http_results['live_hosts']), lambda: len(vuln_results['vulnerabilities']))),
+            ]
+            for stage in stages:
+                stage.start()
+            for stage in stages:
+                stage.join()
+
+            subdomain_results['subdomains'].sort()
+            subdomain_results['total_count'] = len(subdomain_results['subdomains'])
+            http_results['total_live'] = len(http_results['live_hosts'])
+            vuln_results['total_vulns'] = len(vuln_results['vulnerabilities'])
+            with self.metrics.measure('stage', 'report'):
+                report = self.generate_report()
+            self.database.update_scan_status(self.scan_id, 'completed')
+            results = {
+                'scan_id': self.scan_id,
+                'target': self.config.target,
+                'subdomain_results': subdomain_results,
+                'http_results': http_results,
+                'vulnerability_results': vuln_results,
+                'pipeline_stats': {
+                    'time_to_first_finding': self.first_finding_at,
+                    'wall_time': round(time.monotonic() - self.started, 3),
+                    'errors': self.errors
+                },
+                'report_path': report
+            }
+            if self.config.resolve_dns:
+                results['dns_results'] = dns_results
+            if self.cache is not None:
+                results['cache'] = self.cache.stats()
+            results['metrics'] = self.save_metrics()
+            return results
+        except Exception as e:
+            self.logger.error(f'Scan failed: {e}')
+            self.database.update_scan_status(self.scan_id, 'failed')
+            self.save_metrics()
+            raise
+
+    def measured_stage(self, name: str, stage: Callable, args: Tuple, items_in: Callable, items_out: Callable):
+        # Stages overlap, so their CPU and delay figures are process-wide rather than per stage.
+        with self.metrics.measure('stage', name) as metric:
+            try:
+                stage(*args)
+            finally:
+                metric.items_in = items_in()
+                metric.items_out = items_out()
+
+    def enumerate_stage(self, out_q: queue.Queue, results: Dict[str, Any]):
+        module = self.create_module(SubdomainModule)
+        target = self.config.target
+        seen = DomainSet(target)
+        lock = threading.Lock()
+
+        def run_tool(tool: str):
+            start = time.monotonic()
+            count = 0
+            pending = []
+            try:
+                for name in module.iter_tool(tool, target):
+                    count += 1
+                    with lock:
+                        sub = seen.add(name)
+                    if sub is None:
+                        continue
+                    pending.append(sub)
+                    if len(pending) >= self.batch_size:
+                        self.record_subdomains(pending)
+                        pending = []
+                    out_q.put(sub)
+                results['tool_results'][tool] = {'count': count, 'elapsed': round(time.monotonic() - start, 3)}
+            except Exception as e:
+                self.logger.error(f'{tool} failed: {e}')
+                self.errors.append(f'{tool}: {e}')
+                results['tool_results'][tool] = {'count': count, 'elapsed': round(time.monotonic() - start, 3), 'error': str(e)}
+            finally:
+                self.record_subdomains(pending)
+
+        try:
+            if not module.validate_target(target):
+                raise ValueError(f'Invalid target: {target}')
+            with ThreadPoolExecutor(max_workers=module.max_workers()) as pool:
+                list(pool.map(run_tool, module.tools))
+        except Exception as e:
+            self.logger.error(f'Subdomain enumeration failed: {e}')
+            self.errors.append(f'enumerate: {e}')
+        finally:
+            results['subdomains'] = list(seen)
+            out_q.put(_DONE)
+
+    def probe_stage(self, in_q: queue.Queue, out_q: queue.Queue, results: Dict[str, Any], dns_results: Dict[str, int]):
+        module = self.create_module(HTTPModule)
+        resolver = self.create_module(DNSModule) if self.config.resolve_dns else None
+        done = False
+        try:
+            while not done:
+                batch, done = self.next_batch(in_q)
+                if resolver is not None and batch:
+                    resolution = resolver.run(batch, self.config.target)
+                    self.record_ip_addresses(resolution['resolved'])
+                    for key in ('unresolved', 'wildcard_filtered'):
+                        dns_results[key] += len(resolution[key])
+                    dns_results['total_resolved'] += resolution['total_resolved']
+                    batch = resolution['live_names']
+                if not batch:
+                    continue
+                live = []
+                try:
+                    for host in module.iter_probe(batch):
+                        live.append(host)
+                        if host.url:
+                            out_q.put(host.url)
+                except Exception as e:
+                    self.logger.error(f'HTTP probing batch of {len(batch)} failed: {e}')
+                    self.errors.append(f'probe: {e}')
+                finally:
+                    self.record_live_hosts(live)
+                    results['live_hosts'].extend(live)
+        finally:
+            self.drain(in_q, done)
+            out_q.put(_DONE)
+
+    def scan_stage(self, in_q: queue.Queue, module: VulnerabilityModule, results: Dict[str, Any]):
+        done = False
+        try:
+            while not done:
+                batch, done = self.next_batch(in_q)
+                if not batch:
+                    continue
+                found = []
+                try:
+                    for vuln in module.iter_scan(batch, timeout=module.shard_timeout(len(batch))):
+                        if self.first_finding_at is None:
+                            self.first_finding_at = round(time.monotonic() - self.started, 3)
+                        found.append(vuln)
+                        module.categorize_vulnerability(vuln, results['categorized'])
+                except Exception as e:
+                    self.logger.error(f'Vulnerability scan batch of {len(batch)} failed: {e}')
+                    self.errors.append(f'scan: {e}')
+                finally:
+                    self.record_vulnerabilities(found)
+                    results['vulnerabilities'].extend(found)
+        finally:
+            self.drain(in_q, done)
+
+    def next_batch(self, in_q: queue.Queue) -> Tuple[List[str], bool]:
+        """Collect up to batch_size items, waiting at most batch_wait after the first."""
+        item = in_q.get()
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = in_q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    @staticmethod
+    def drain(in_q: queue.Queue, done: bool):
+        # Keep consuming after a fatal stage error so upstream producers
+        # blocked on a full queue can still finish.
+        while not done:
+            done = in_q.get() is _DONE
@@ -0,0 +1,154 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from core.config import ScanConfig
+from core.database import ReconDatabase
+from core.logger import get_logger
+from core.metrics import MetricsCollector
+from core.records import Subdomain
+from core.stealth import MODE_RATE_LIMITS
+from engines.dag import parse_stage
+from engines.full import FullReconEngine
+from modules.registry import get_module
+
+class ScanWorker:
+    """Runs the queued jobs of distributed scans, one at a time.
+
+    A claimed job is leased for lease seconds and a heartbeat thread
+    renews the lease every lease / 3 seconds while the job runs. If the
+    worker dies the lease lapses and the job goes to another worker; a
+    worker that outlives its lease (stalled, or cut off from the database)
+    has its results discarded when it tries to complete the job. Tool
+    settings come from the config stored with each scan. At most
+    job_concurrency jobs of a scan run at once across all workers, and
+    each runs with that share of the scan's rate limit, so the target
+    never sees more than the budget. Scale out by starting more workers
+    and raising job_concurrency, not by giving one worker more threads.
+    """
+    def __init__(self, database: ReconDatabase, name: Optional[str] = None, lease: float = 60,
+                 poll_interval: float = 1.0, max_idle: float = 0):
+        self.database = database
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.max_idle = max_idle
+        self.logger = get_logger('ScanWorker')
+        self.stopping = threading.Event()
+        self.processed = 0
+        # The engine of the scan jobs last came from, for its stealth
+        # manager, tool cache and module construction.
+        self.scan_engine: Optional[Tuple[int, FullReconEngine]] = None
+
+    @property
+    def job_runners(self):
+        return {'enumerate': self.run_enumeration, 'probe': self.run_probe, 'scan': self.run_shard}
+
+    def run(self) -> int:
+        """Process jobs until stop() is called, or for max_idle seconds without work if set; return the jobs done."""
+        self.logger.info(f'Worker {self.name} polling {self.database.db_path}')
+        idle_since = time.monotonic()
+        while not self.stopping.is_set():
+            job = self.database.claim_job(self.name, self.lease)
+            if job is None:
+                if self.max_idle and time.monotonic() - idle_since >= self.max_idle:
+                    break
+                self.stopping.wait(self.poll_interval)
+                continue
+            self.process(job)
+            self.processed += 1
+            idle_since = time.monotonic()
+        return self.processed
+
+    def stop(self):
+        """Finish the running job, then return from run()."""
+        self.stopping.set()
+
+    def process(self, job: Dict[str, Any]):
+        self.logger.info(f"Job {job['id']}: {job['stage']} of scan {job['scan_id']} (attempt {job['attempts']})")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self.heartbeat, args=(job['id'], done), daemon=True)
+        heartbeat.start()
+        try:
+            result, writes = self.run_job(job)
+        except KeyboardInterrupt:
+            self.database.release_job(job['id'], self.name)
+            raise
+        except Exception as e:
+            self.logger.error(f"Job {job['id']} failed: {e}")
+            self.database.fail_job(job['id'], self.name, str(e) or type(e).__name__)
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        if not self.database.complete_job(job['id'], self.name, result, **writes):
+            self.logger.warning(f"Job {job['id']} was taken over after its lease expired, results discarded")
+
+    def heartbeat(self, job_id: int, done: threading.Event):
+        while not done.wait(self.lease / 3):
+            try:
+                if not self.database.renew_job(job_id, self.name, self.lease):
+                    self.logger.warning(f'Lost the lease on job {job_id}')
+                    return
+            except Exception as e:
+                self.logger.warning(f'Renewing the lease on job {job_id} failed: {e}')
+
+    def run_job(self, job: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run a job; return its result and the hosts, findings and shard to store with it."""
+        engine = self.engine_for(job['scan_id'])
+        engine.metrics = MetricsCollector(engine.stealth_manager)
+        stage = job['stage']
+        overrides = next((config for name, config in map(parse_stage, engine.config.stages) if name == stage), {})
+        module = engine.create_module(get_module(stage), overrides)
+        try:
+            with engine.metrics.measure('job', stage):
+                return self.job_runners[stage](module, engine.config, job['payload'])
+        finally:
+            self.database.add_metrics_many(job['scan_id'], engine.metrics.records)
+
+    def engine_for(self, scan_id: int) -> FullReconEngine:
+        if self.scan_engine is None or self.scan_engine[0] != scan_id:
+            scan = self.database.get_scan(scan_id)
+            config = self.job_config(ScanConfig.from_dict(json.loads(scan['config'] or '{}')))
+            self.scan_engine = (scan_id, FullReconEngine(config, self.database))
+        return self.scan_engine[1]
+
+    def job_config(self, config: ScanConfig) -> ScanConfig:
+        """The scan's config as one of job_concurrency jobs run by this worker."""
+        # The database lives in the scan's output directory; a relative
+        # output_dir would resolve against this worker's working directory.
+        config.output_dir = str(Path(self.database.db_path).resolve().parent)
+        rate = config.rate_limit if config.rate_limit is not None else MODE_RATE_LIMITS.get(config.mode, 0)
+        if rate > 0:
+            shares = max(1, config.job_concurrency)
+            config.rate_limit = rate / shares
+            config.rate_burst = config.rate_burst / shares
+        return config
+
+    def run_enumeration(self, module, config: ScanConfig, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        # Scoping and deduplication across tools is left to the coordinator.
+        start = time.monotonic()
+        subdomains = module.run_tool(payload['tool'], config.target)
+        return {'subdomains': subdomains, 'elapsed': round(time.monotonic() - start, 3)}, {}
+
+    def run_probe(self, module, config: ScanConfig, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        probed_at = datetime.now()
+        hosts = module.run(payload['hosts'])['live_hosts']
+        for host in hosts:
+            host.probed_at = probed_at
+        probed = [Subdomain(name, probed_at=probed_at) for name in payload['hosts']]
+        return {'live': len(hosts)}, {'hosts': hosts + probed}
+
+    def run_shard(self, module, config: ScanConfig, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        findings, attempts, error = module.run_shard(payload['urls'])
+        if error is not None:
+            # Partial output is dropped; the job is retried as a whole.
+            raise error
+        seen = set()
+        unique = []
+        module.merge_findings(findings, seen, unique, module.categorize_vulnerabilities([]))
+        return {'findings': len(unique), 'attempts': attempts}, {'findings': unique, 'shard': payload['shard']}
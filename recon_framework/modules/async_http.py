@@ -0,0 +1,123 @@
+import asyncio
+import html
+import re
+import time
+from typing import List, Dict, Optional, Callable
+from core.exceptions import ModuleException
+from core.ratelimit import TokenBucket
+
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+class AsyncHTTPProber:
+    """In-process HTTP prober built on aiohttp.
+
+    A fixed pool of worker coroutines pulls targets from a queue, so memory
+    stays flat for large target lists. Connections are pooled and kept
+    alive by a single TCPConnector that enforces both the global and the
+    per-host concurrency limit. Results mirror the httpx JSON fields the
+    rest of the framework reads.
+    """
+    def __init__(self, concurrency: int = 10, per_host: int = 2, timeout: float = 10,
+                 headers: Optional[Callable[[], Dict[str, str]]] = None, proxy: Optional[str] = None,
+                 rate_limit: Optional[float] = None, max_body: int = 65536, limiter: Optional[TokenBucket] = None):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.headers = headers or (lambda: {})
+        self.proxy = proxy
+        self.limiter = limiter or (TokenBucket(rate_limit) if rate_limit else None)
+        self.max_body = max_body
+        self.latencies = []
+        self.errors = 0
+
+    def probe(self, targets: List[str]) -> List[Dict]:
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise ModuleException('aiohttp is required for the native HTTP backend')
+        return asyncio.run(self.probe_all(targets))
+
+    async def probe_all(self, targets: List[str]) -> List[Dict]:
+        import aiohttp
+        queue = asyncio.Queue()
+        for target in targets:
+            queue.put_nowait(target)
+        results = []
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ssl=False, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(self._worker(session, queue, results)) for _ in range(min(self.concurrency, len(targets)))]
+            await asyncio.gather(*workers)
+        return results
+
+    async def _worker(self, session, queue: asyncio.Queue, results: List[Dict]):
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result = await self.probe_target(session, target)
+            if result is not None:
+                results.append(result)
+
+    async def probe_target(self, session, target: str) -> Optional[Dict]:
+        urls = [target] if '://' in target else [f'https://{target}', f'http://{target}']
+        for url in urls:
+            result = await self.fetch(session, url)
+            if result is not None:
+                result['input'] = target
+                return result
+        return None
+
+    async def fetch(self, session, url: str) -> Optional[Dict]:
+        await self._throttle()
+        start = time.perf_counter()
+        try:
+            async with session.get(url, headers=self.headers(), proxy=self.proxy, allow_redirects=True) as resp:
+                head = b''
+                length = 0
+                async for chunk in resp.content.iter_chunked(16384):
+                    if len(head) < self.max_body:
+                        head += chunk[:self.max_body - len(head)]
+                    length += len(chunk)
+                elapsed = time.perf_counter() - start
+                self.latencies.append(elapsed)
+                return {
+                    'url': url,
+                    'final_url': str(resp.url),
+                    'status_code': resp.status,
+                    'title': self.extract_title(head),
+                    'content_length': length,
+                    'webserver': resp.headers.get('Server'),
+                    'content_type': resp.headers.get('Content-Type', '').split(';')[0],
+                    'technologies': [],
+                    'response_time': round(elapsed, 4)
+                }
+        except Exception:
+            self.errors += 1
+            self.latencies.append(time.perf_counter() - start)
+            return None
+
+    async def _throttle(self):
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+
+    @staticmethod
+    def extract_title(body: bytes) -> str:
+        match = TITLE_RE.search(body)
+        if not match:
+            return ''
+        title = match.group(1).decode('utf-8', errors='replace')
+        return ' '.join(html.unescape(title).split())
+
+    def stats(self) -> Dict:
+        if not self.latencies:
+            return {'requests': 0, 'errors': self.errors}
+        ordered = sorted(self.latencies)
+        return {
+            'requests': len(ordered),
+            'errors': self.errors,
+            'latency_p50': round(ordered[len(ordered) // 2], 4),
+            'latency_p95': round(ordered[int(len(ordered) * 0.95)], 4),
+            'latency_max': round(ordered[-1], 4)
+        }
@@ -1,51 +1,299 @@
+import os
+import signal
 import subprocess
-import json
 import tempfile
+import threading
+import time
 import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from core.logger import get_logger
 from core.exceptions import ModuleException
+from utils.jsonlines import JSONLinesParser
 
 class BaseModule(ABC):
-    def __init__(self, config: Dict, stealth_manager=None):
+    # Stage metadata read by the scan planner: the registry name, the scan
+    # data keys run() takes as positional arguments, the keys the stage
+    # publishes for later stages and the scan results key (default
+    # '<name>_results').
+    name: Optional[str] = None
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    results_key: Optional[str] = None
+
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None):
         self.config = config
         self.stealth_manager = stealth_manager
+        self.cache = cache
+        self.process_slots = process_slots
+        self.metrics = metrics
         self.logger = get_logger(self.__class__.__name__)
         self.results = []
         self.errors = []
+        self.malformed_lines = 0
+        self._line_parser = None
 
     @abstractmethod
     def run(self, target: str):
         pass
 
-    def execute_tool(self, command: List[str], timeout: int = 300) -> subprocess.CompletedProcess:
+    @classmethod
+    def enabled(cls, config: Dict) -> bool:
+        """Whether the stage runs under config; disabled stages are left out of the plan."""
+        return True
+
+    def run_stage(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run as a scan stage on the values of self.inputs and return the stage results."""
+        return self.run(*(data[key] for key in self.inputs))
+
+    def stage_outputs(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """The values of self.outputs to publish from the stage results."""
+        return {key: results[key] for key in self.outputs}
+
+    def store(self, database, scan_id: int, results: Dict[str, Any]):
+        """Persist stage results; modules that own a table override this."""
+        pass
+
+    def incomplete(self, results: Dict[str, Any]) -> bool:
+        """Whether the stage finished with part of its work failed, so it must run again on resume."""
+        return False
+
+    def execute_tool(self, command: List[str], timeout: int = 300, use_cache: bool = True) -> subprocess.CompletedProcess:
+        key = self.cache.key(command) if self.cache and use_cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.logger.info(f"Cache hit for command: {' '.join(command)}")
+                return subprocess.CompletedProcess(command, 0, cached, '')
+        with self.process_slot():
+            result = self._run_process(command, timeout)
+        if key and result.returncode == 0:
+            self.cache.put(key, result.stdout)
+        return result
+
+    def _run_process(self, command: List[str], timeout: int) -> subprocess.CompletedProcess:
+        delay = self.stealth_manager.apply_delay() if self.stealth_manager else 0.0
+        self.logger.info(f"Executing command: {' '.join(command)}")
+        start = time.perf_counter()
+        proc = self._spawn(command)
+        output = {}
+        readers = [
+            threading.Thread(target=lambda: output.__setitem__('stdout', proc.stdout.read()), daemon=True),
+            threading.Thread(target=lambda: output.__setitem__('stderr', proc.stderr.read()), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            self._kill_process_group(proc)
+
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
         try:
-            if self.stealth_manager:
-                self.stealth_manager.apply_delay()
-            self.logger.info('Executing command: %s', ' '.join(command))
-            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
-            if result.returncode != 0 and result.stderr:
-                self.logger.warning(f"stderr: {result.stderr}")
-            return result
-        except subprocess.TimeoutExpired:
-            self.logger.error('Timeout expired for command: %s', ' '.join(command))
+            usage = self._reap(proc)
+        finally:
+            timer.cancel()
+            if proc.returncode is None:
+                self._kill_process_group(proc)
+                self._reap(proc)
+            for reader in readers:
+                reader.join()
+            proc.stdout.close()
+            proc.stderr.close()
+        stdout = output.get('stdout', '')
+        self.record_process(command, time.perf_counter() - start, usage, stdout.count('\n'), delay)
+        if timed_out.is_set():
+            self.logger.error(f"Timeout expired for command: {' '.join(command)}")
             raise ModuleException('Timeout executing tool')
+        result = subprocess.CompletedProcess(command, proc.returncode, stdout, output.get('stderr', ''))
+        if result.returncode != 0 and result.stderr:
+            self.logger.warning(f"stderr: {result.stderr}")
+        return result
+
+    def _spawn(self, command: List[str], binary: bool = False, **kwargs) -> subprocess.Popen:
+        if not binary:
+            kwargs.update(text=True, errors='replace')
+        try:
+            return subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                start_new_session=True, **kwargs
+            )
         except FileNotFoundError:
-            self.logger.error('Tool not found: %s', command[0])
+            self.logger.error(f'Tool not found: {command[0]}')
             raise ModuleException('Tool not found')
         except Exception as e:
-            self.logger.error('Execution failed: %s', e)
+            self.logger.error(f'Execution failed: {e}')
             raise ModuleException(str(e))
 
-    def parse_json_output(self, output: str) -> List[Dict]:
-        items = []
-        for line in output.strip().split('\n'):
-            if line.strip():
-                try:
-                    items.append(json.loads(line))
-                except json.JSONDecodeError:
-                    self.logger.warning('Failed to parse line: %s', line)
+    @staticmethod
+    def _reap(proc: subprocess.Popen):
+        """Wait for the child and return its resource usage from wait4()."""
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            proc.wait()
+            return None
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return usage
+
+    def record_process(self, command: List[str], wall_time: float, usage, items_out: Optional[int] = None, delay: float = 0.0):
+        if self.metrics is not None:
+            self.metrics.record_process(os.path.basename(command[0]), wall_time, usage, items_out, delay)
+
+    def rate_limit_args(self, processes: int = 1) -> List[str]:
+        """-rate-limit arguments for a tool run as one of processes concurrent processes."""
+        rate = self.stealth_manager.tool_rate_limit(processes) if self.stealth_manager else None
+        return ['-rate-limit', str(rate)] if rate else []
+
+    def stream_lines(self, command: List[str], timeout: int = 300, use_cache: bool = True,
+                     binary: bool = False, check: bool = False) -> Iterator[Union[str, bytes]]:
+        """Yield non-empty stdout lines as the tool emits them, as bytes if binary is set.
+
+        Output already yielded is kept by the caller if the tool times out,
+        or exits with a non-zero status when check is set; ModuleException
+        is raised once the stream ends. Complete, successful runs are
+        written through to the tool cache when one is configured.
+        """
+        key = self.cache.key(command) if self.cache and use_cache else None
+        writer = None
+        if key:
+            cached = self.cache.iter_lines(key, binary)
+            if cached is not None:
+                self.logger.info(f"Cache hit for command: {' '.join(command)}")
+                yield from cached
+                return
+            writer = self.cache.writer(key)
+        with self.process_slot():
+            if writer is None:
+                yield from self._stream_process(command, timeout, {}, binary, check)
+                return
+            status = {}
+            try:
+                for line in self._stream_process(command, timeout, status, binary, check):
+                    writer.write_line(line)
+                    yield line
+            except BaseException:
+                writer.abort()
+                raise
+        if status.get('returncode') == 0:
+            writer.commit()
+        else:
+            writer.abort()
+
+    @contextmanager
+    def process_slot(self):
+        """Hold one of the shared external process slots, if a limit is set."""
+        if self.process_slots is None:
+            yield
+            return
+        with self.process_slots:
+            yield
+
+    def _stream_process(self, command: List[str], timeout: int, status: Dict, binary: bool = False,
+                        check: bool = False) -> Iterator[Union[str, bytes]]:
+        delay = self.stealth_manager.apply_delay() if self.stealth_manager else 0.0
+        self.logger.info(f"Streaming command: {' '.join(command)}")
+        start = time.perf_counter()
+        proc = self._spawn(command, binary, bufsize=-1 if binary else 1)
+
+        stderr_tail = deque(maxlen=50)
+        stderr_reader = threading.Thread(target=self._drain_stream, args=(proc.stderr, stderr_tail), daemon=True)
+        stderr_reader.start()
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            self._kill_process_group(proc)
+
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        usage = None
+        lines = 0
+        try:
+            for line in proc.stdout:
+                line = line.strip()
+                if line:
+                    lines += 1
+                    yield line
+            usage = self._reap(proc)
+        finally:
+            timer.cancel()
+            if proc.returncode is None:
+                self._kill_process_group(proc)
+                usage = self._reap(proc)
+            proc.stdout.close()
+            stderr_reader.join()
+            self.record_process(command, time.perf_counter() - start, usage, lines, delay)
+        status['returncode'] = proc.returncode
+        if timed_out.is_set():
+            self.logger.error(f"Timeout expired for command: {' '.join(command)}")
+            raise ModuleException('Timeout executing tool')
+        if proc.returncode != 0 and stderr_tail:
+            tail = b''.join(stderr_tail).decode(errors='replace') if binary else ''.join(stderr_tail)
+            self.logger.warning(f"stderr: {tail}")
+        if check and proc.returncode != 0:
+            raise ModuleException(f'{os.path.basename(command[0])} exited with status {proc.returncode}')
+
+    def json_parser(self, fields: Optional[Tuple[str, ...]] = None, name: str = 'tool') -> JSONLinesParser:
+        return JSONLinesParser(fields, backend=self.config.get('json_backend', 'auto'), logger=self.logger, name=name)
+
+    def stream_tool(self, command: List[str], timeout: int = 300, use_cache: bool = True) -> Iterator[Dict]:
+        """Yield JSON records from a JSON-lines tool as they arrive."""
+        parser = self.json_parser(name=os.path.basename(command[0]))
+        try:
+            yield from parser.iter_stream(self.stream_lines(command, timeout, use_cache, binary=True))
+        finally:
+            self.finish_parser(parser)
+
+    def stream_records(self, command: List[str], record_cls, timeout: int = 300, use_cache: bool = True,
+                       check: bool = False) -> Iterator:
+        """Yield a record_cls for each JSON object a JSON-lines tool prints.
+
+        Lines are read and parsed as bytes, and each object is projected to
+        record_cls.JSON_FIELDS before the record is built from it. check
+        is passed on to stream_lines.
+        """
+        parser = self.json_parser(record_cls.JSON_FIELDS, os.path.basename(command[0]))
+        try:
+            for line in self.stream_lines(command, timeout, use_cache, binary=True, check=check):
+                data = parser.parse_line(line)
+                if data is not None:
+                    yield record_cls.from_parsed(data, line)
+        finally:
+            self.finish_parser(parser)
+
+    def finish_parser(self, parser: JSONLinesParser):
+        self.malformed_lines += parser.malformed
+        parser.log_summary()
+
+    @staticmethod
+    def _kill_process_group(proc: subprocess.Popen):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _drain_stream(stream, tail: deque):
+        for line in stream:
+            tail.append(line)
+        stream.close()
+
+    def parse_json_line(self, line: Union[str, bytes]) -> Optional[Dict]:
+        # One parser per module, so malformed-line logging is rate limited across calls.
+        if self._line_parser is None:
+            self._line_parser = self.json_parser()
+        return self._line_parser.parse_line(line)
+
+    def parse_json_output(self, output: Union[str, bytes], fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """Parse buffered JSON-lines output line by line, without splitting it into a list first."""
+        parser = self.json_parser(fields, name='output')
+        items = list(parser.iter_buffer(output))
+        self.finish_parser(parser)
         return items
 
     def write_temp_file(self, content: str, suffix: str = '.tmp') -> str:
@@ -0,0 +1,179 @@
+import random
+import secrets
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from modules.base_module import BaseModule
+from modules.registry import register_module
+
+class DNSClient:
+    """Minimal UDP client for A-record lookups against explicit resolvers.
+
+    Used instead of the system resolver when dns_resolvers is configured,
+    e.g. to point a scan at a local stub resolver.
+    """
+    def __init__(self, servers: List[str], timeout: float = 2.0, retries: int = 2):
+        self.servers = [self._parse_server(s) for s in servers]
+        self.timeout = timeout
+        self.retries = retries
+
+    @staticmethod
+    def _parse_server(server: str) -> Tuple[str, int]:
+        host, _, port = server.partition(':')
+        return host, int(port or 53)
+
+    def resolve(self, name: str) -> Tuple[List[str], Optional[int]]:
+        """Return (addresses, ttl); an empty list means the name does not resolve."""
+        query_id = random.getrandbits(16)
+        packet = self.build_query(query_id, name)
+        for attempt in range(self.retries + 1):
+            server = self.servers[attempt % len(self.servers)]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(self.timeout)
+                try:
+                    sock.sendto(packet, server)
+                    data, _ = sock.recvfrom(4096)
+                except OSError:
+                    continue
+            if len(data) >= 12 and struct.unpack('>H', data[:2])[0] == query_id:
+                return self.parse_response(data)
+        raise OSError(f'No response from resolvers for {name}')
+
+    @staticmethod
+    def build_query(query_id: int, name: str) -> bytes:
+        header = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+        qname = b''.join(bytes([len(label)]) + label.encode('idna') for label in name.rstrip('.').split('.'))
+        return header + qname + b'\x00' + struct.pack('>HH', 1, 1)
+
+    @classmethod
+    def parse_response(cls, data: bytes) -> Tuple[List[str], Optional[int]]:
+        _, flags, qdcount, ancount, _, _ = struct.unpack('>HHHHHH', data[:12])
+        if flags & 0x000F:
+            return [], None
+        offset = 12
+        for _ in range(qdcount):
+            offset = cls._skip_name(data, offset) + 4
+        addresses = []
+        ttl = None
+        for _ in range(ancount):
+            offset = cls._skip_name(data, offset)
+            rtype, _, rttl, rdlength = struct.unpack('>HHIH', data[offset:offset + 10])
+            offset += 10
+            if rtype == 1 and rdlength == 4:
+                addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+                ttl = rttl if ttl is None else min(ttl, rttl)
+            offset += rdlength
+        return addresses, ttl
+
+    @staticmethod
+    def _skip_name(data: bytes, offset: int) -> int:
+        while True:
+            length = data[offset]
+            if length == 0:
+                return offset + 1
+            if length & 0xC0 == 0xC0:
+                return offset + 2
+            offset += length + 1
+
+@register_module
+class DNSModule(BaseModule):
+    """Resolves enumerated subdomains and drops dead and wildcard names.
+
+    Lookups run on a bounded thread pool and are memoised in a TTL cache.
+    Wildcard DNS is detected per parent zone by resolving a random label;
+    names that only resolve to that zone's wildcard addresses are filtered.
+    As a stage it replaces the subdomains later stages see with the live
+    names.
+    """
+    name = 'resolve'
+    inputs = ('subdomains', 'target')
+    outputs = ('subdomains',)
+    results_key = 'dns_results'
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None, resolver=None):
+        super().__init__(config, stealth_manager, cache, process_slots, metrics)
+        self.workers = max(1, config.get('dns_workers') or config.get('threads', 10))
+        self.cache_ttl = config.get('dns_cache_ttl', 300)
+        servers = config.get('dns_resolvers') or []
+        if resolver is not None:
+            self.resolver = resolver
+        elif servers:
+            self.resolver = DNSClient(servers, timeout=config.get('dns_timeout', 2.0)).resolve
+        else:
+            self.resolver = self.system_resolve
+        self.dns_cache = {}
+        self.dns_cache_lock = threading.Lock()
+
+    @classmethod
+    def enabled(cls, config: Dict) -> bool:
+        return config.get('resolve_dns', True)
+
+    def stage_outputs(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        return {'subdomains': results['live_names']}
+
+    def run(self, subdomains: List[str], target: Optional[str] = None) -> Dict[str, Any]:
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            addresses = dict(zip(subdomains, pool.map(self.resolve, subdomains)))
+            zones = sorted({self.parent_zone(name) for name in subdomains if self.in_scope(self.parent_zone(name), target)})
+            wildcards = {zone: ips for zone, ips in zip(zones, pool.map(self.detect_wildcard, zones)) if ips}
+
+        resolved = {}
+        unresolved = []
+        wildcard_filtered = []
+        for name, ips in addresses.items():
+            if not ips:
+                unresolved.append(name)
+            elif set(ips) <= wildcards.get(self.parent_zone(name), set()):
+                wildcard_filtered.append(name)
+            else:
+                resolved[name] = ips
+        self.logger.info(f'Resolved {len(resolved)}/{len(subdomains)} subdomains, '
+                         f'{len(wildcard_filtered)} filtered as wildcard')
+        return {
+            'resolved': resolved,
+            'live_names': sorted(resolved),
+            'unresolved': sorted(unresolved),
+            'wildcard_filtered': sorted(wildcard_filtered),
+            'wildcard_zones': {zone: sorted(ips) for zone, ips in wildcards.items()},
+            'total_resolved': len(resolved)
+        }
+
+    def resolve(self, name: str) -> List[str]:
+        name = name.rstrip('.').lower()
+        now = time.monotonic()
+        with self.dns_cache_lock:
+            cached = self.dns_cache.get(name)
+            if cached and cached[0] > now:
+                return cached[1]
+        try:
+            ips, ttl = self.resolver(name)
+        except Exception as e:
+            self.logger.debug(f'Resolution failed for {name}: {e}')
+            ips, ttl = [], None
+        ttl = self.cache_ttl if ttl is None else min(ttl, self.cache_ttl)
+        with self.dns_cache_lock:
+            self.dns_cache[name] = (now + ttl, ips)
+        return ips
+
+    def detect_wildcard(self, zone: str) -> set:
+        return set(self.resolve(f'{secrets.token_hex(6)}-wildcard-probe.{zone}'))
+
+    @staticmethod
+    def system_resolve(name: str) -> Tuple[List[str], Optional[int]]:
+        try:
+            infos = socket.getaddrinfo(name, None, socket.AF_INET, socket.SOCK_STREAM)
+        except socket.gaierror:
+            return [], None
+        return sorted({info[4][0] for info in infos}), None
+
+    @staticmethod
+    def parent_zone(name: str) -> str:
+        return name.rstrip('.').lower().partition('.')[2]
+
+    @staticmethod
+    def in_scope(zone: str, target: Optional[str]) -> bool:
+        if not zone:
+            return False
+        return target is None or zone == target or zone.endswith(f'.{target}')
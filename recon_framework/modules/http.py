@@ -1,33 +1,83 @@
 import os
 import tempfile
-from typing import List, Dict
+from typing import List, Dict, Any, Iterable, Iterator
 from modules.base_module import BaseModule
+from modules.registry import register_module
+from modules.async_http import AsyncHTTPProber
+from core.records import LiveHost
+from utils.signatures import SignatureSet, load_signatures
 
+@register_module
 class HTTPModule(BaseModule):
-    def run(self, targets: List[str]) -> Dict[str, List[Dict]]:
+    name = 'probe'
+    inputs = ('subdomains',)
+    outputs = ('urls',)
+    results_key = 'http_results'
+
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None):
+        super().__init__(config, stealth_manager, cache, process_slots, metrics)
+        self.backend = config.get('http_backend', 'httpx')
+        self.probe_stats = None
+
+    def run(self, targets: List[str]) -> Dict[str, List[LiveHost]]:
+        hosts = list(self.iter_probe(targets))
+        results = {
+            'live_hosts': hosts,
+            'total_live': len(hosts)
+        }
+        if self.probe_stats is not None:
+            results['probe_stats'] = self.probe_stats
+        return results
+
+    def stage_outputs(self, results: Dict[str, Any]) -> Dict[str, List[str]]:
+        return {'urls': [host.url for host in results['live_hosts'] if host.url]}
+
+    def iter_probe(self, targets: List[str]) -> Iterator[LiveHost]:
+        """Yield live hosts for targets as the configured backend confirms them, classified."""
+        classify = self.signatures.classify
+        for host in self.iter_backend(targets):
+            host.interesting = classify(host)
+            yield host
+
+    def iter_backend(self, targets: List[str]) -> Iterator[LiveHost]:
+        if self.backend == 'native':
+            yield from self.run_native(targets)
+            return
         targets_file = self.write_targets_file(targets)
         try:
-            hosts = self.run_httpx(targets_file)
-            analyzed = self.analyze_responses(hosts)
-            return {
-                'live_hosts': hosts,
-                'analyzed_results': analyzed,
-                'total_live': len(hosts)
-            }
+            yield from self.iter_httpx(targets_file)
         finally:
             if os.path.exists(targets_file):
                 os.unlink(targets_file)
 
-    def run_httpx(self, targets_file: str) -> List[Dict]:
+    def run_httpx(self, targets_file: str) -> List[LiveHost]:
+        return list(self.iter_httpx(targets_file))
+
+    def iter_httpx(self, targets_file: str) -> Iterator[LiveHost]:
+        return self.stream_records(self.httpx_command(targets_file), LiveHost)
+
+    def httpx_command(self, targets_file: str) -> List[str]:
         cmd = [
             'httpx', '-l', targets_file, '-json', '-silent',
             '-follow-redirects', '-status-code', '-title', '-tech-detect',
             '-content-length', '-timeout', str(self.config.get('timeout', 10))
         ]
-        if self.config.get('mode') == 'stealth':
-            cmd.extend(['-rate-limit', '10'])
-        result = self.execute_tool(cmd)
-        return self.parse_json_output(result.stdout)
+        cmd.extend(self.rate_limit_args())
+        return cmd
+
+    def run_native(self, targets: List[str]) -> List[LiveHost]:
+        prober = AsyncHTTPProber(
+            concurrency=self.config.get('threads', 10),
+            per_host=self.config.get('per_host_limit', 2),
+            timeout=self.config.get('timeout', 10),
+            headers=self.stealth_manager.get_headers if self.stealth_manager else None,
+            proxy=(self.stealth_manager.get_proxy() or {}).get('http') if self.stealth_manager else None,
+            limiter=self.stealth_manager.bucket if self.stealth_manager else None
+        )
+        self.logger.info(f'Probing {len(targets)} targets with the native prober')
+        hosts = [LiveHost.from_dict(host) for host in prober.probe(targets)]
+        self.probe_stats = prober.stats()
+        return hosts
 
     def write_targets_file(self, targets: List[str]) -> str:
         with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
@@ -35,22 +85,17 @@ class HTTPModule(BaseModule):
                 f.write(f"{t}\n")
             return f.name
 
-    def analyze_responses(self, responses: List[Dict]) -> List[Dict]:
-        analyzed = []
-        for r in responses:
-            info = {
-                'url': r.get('url'),
-                'status_code': r.get('status_code'),
-                'title': r.get('title'),
-                'content_length': r.get('content_length'),
-                'technologies': r.get('technologies', []),
-                'interesting': []
-            }
-            if r.get('status_code') == 200:
-                info['interesting'].append('HTTP 200 OK')
-            if r.get('title') and any(k in r['title'].lower() for k in ['admin', 'login', 'dashboard']):
-                info['interesting'].append('Admin/Login page detected')
-            if r.get('technologies'):
-                info['interesting'].append('Technologies: ' + ', '.join(r['technologies']))
-            analyzed.append(info)
-        return analyzed
+    @property
+    def signatures(self) -> SignatureSet:
+        """The bundled signatures followed by those of the signature_files profiles, compiled once."""
+        return load_signatures(self.config.get('signature_files') or ())
+
+    def classify(self, hosts: Iterable[LiveHost]):
+        """Store on each host the reasons the scan's signatures give for a closer look.
+
+        Probed hosts are classified as they are yielded; this covers hosts
+        loaded back from the database.
+        """
+        classify = self.signatures.classify
+        for host in hosts:
+            host.interesting = classify(host)
@@ -0,0 +1,151 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from modules.base_module import BaseModule
+from modules.registry import register_module
+from core.ratelimit import TokenBucket
+from core.records import Secret
+
+# One alternative per secret type; the group name is the stored secret_type.
+SECRET_PATTERNS = {
+    'aws_access_key': r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b',
+    'google_api_key': r'\bAIza[0-9A-Za-z_\-]{35}\b',
+    'github_token': r'\bgh[pousr]_[0-9A-Za-z]{36}\b',
+    'slack_token': r'\bxox[abposr]-[0-9A-Za-z\-]{10,72}\b',
+    'stripe_secret_key': r'\b[rs]k_live_[0-9A-Za-z]{24,99}\b',
+    'private_key': r'-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----',
+    'jwt': r'\beyJ[0-9A-Za-z_\-]{10,}\.eyJ[0-9A-Za-z_\-]{10,}\.[0-9A-Za-z_\-]{10,}',
+}
+
+SECRET_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in SECRET_PATTERNS.items()))
+SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*?\bsrc\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+@register_module
+class SecretsModule(BaseModule):
+    """Extracts credential-like strings from live hosts and their JavaScript.
+
+    Each live URL is fetched together with the scripts it references on the
+    same host; bodies are matched against all patterns in one regex pass.
+    Scripts shared by several hosts are only fetched once. Requests draw
+    from their own slice of the scan's rate budget, so the stage can run
+    alongside nuclei without exceeding it.
+    """
+    name = 'secrets'
+    inputs = ('urls',)
+    outputs = ('secrets',)
+
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None):
+        super().__init__(config, stealth_manager, cache, process_slots, metrics)
+        self.workers = max(1, config.get('secrets_workers') or config.get('threads', 10))
+        self.max_scripts = config.get('secrets_max_scripts', 20)
+        self.max_bytes = config.get('secrets_max_bytes', 2 * 1024 * 1024)
+        self.timeout = config.get('timeout', 10)
+        # Targets often serve self-signed certificates, so TLS is not verified unless asked.
+        self.verify_tls = config.get('secrets_verify_tls', False)
+        if not self.verify_tls:
+            import urllib3
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        rate = stealth_manager.tool_share() if stealth_manager else None
+        self.bucket = TokenBucket(rate or 0)
+        self.fetched = set()
+        self.fetched_lock = threading.Lock()
+        self._own_session = None
+
+    def run(self, urls: List[str]) -> Dict[str, Any]:
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            per_host = list(pool.map(self.scan_host, urls))
+        seen = set()
+        found = []
+        for secrets in per_host:
+            for secret in secrets:
+                if secret.dedup_key() not in seen:
+                    seen.add(secret.dedup_key())
+                    found.append(secret)
+        self.logger.info(f'Found {len(found)} secrets in {len(self.fetched)} documents from {len(urls)} hosts')
+        return {
+            'secrets': found,
+            'total_secrets': len(found),
+            'documents_scanned': len(self.fetched),
+            'errors': len(self.errors)
+        }
+
+    def store(self, database, scan_id: int, results: Dict[str, Any]):
+        database.add_secrets_many(scan_id, results['secrets'])
+
+    def scan_host(self, url: str) -> List[Secret]:
+        body = self.fetch(url) if self.claim(url) else None
+        if body is None:
+            return []
+        found = list(self.find_secrets(url, url, body))
+        for script in self.script_urls(url, body)[:self.max_scripts]:
+            if not self.claim(script):
+                continue
+            script_body = self.fetch(script)
+            if script_body is not None:
+                found.extend(self.find_secrets(url, script, script_body))
+        return found
+
+    @staticmethod
+    def script_urls(page_url: str, body: str) -> List[str]:
+        """Absolute URLs of the scripts a page loads from its own host, in page order."""
+        host = urlparse(page_url).hostname
+        scripts = (urljoin(page_url, src) for src in SCRIPT_SRC_RE.findall(body))
+        return list(dict.fromkeys(s for s in scripts if urlparse(s).hostname == host))
+
+    @staticmethod
+    def find_secrets(target: str, file_path: str, body: str) -> Iterator[Secret]:
+        line = 1
+        position = 0
+        for match in SECRET_RE.finditer(body):
+            line += body.count('\n', position, match.start())
+            position = match.start()
+            yield Secret(target, match.lastgroup, match.group(), file_path, line)
+
+    def claim(self, url: str) -> bool:
+        """Mark url as fetched; False if another host already fetched it."""
+        with self.fetched_lock:
+            if url in self.fetched:
+                return False
+            self.fetched.add(url)
+            return True
+
+    def fetch(self, url: str) -> Optional[str]:
+        self.bucket.acquire()
+        try:
+            with self.session.get(url, headers=self.headers(), proxies=self.proxies(), timeout=self.timeout,
+                                  stream=True, verify=self.verify_tls) as response:
+                if response.status_code >= 400:
+                    return None
+                body, truncated = self.read_limited(response.iter_content(65536))
+                if truncated:
+                    self.logger.debug(f'{url} truncated at {self.max_bytes} bytes')
+                return body.decode(response.encoding or 'utf-8', errors='replace')
+        except Exception as e:
+            self.logger.debug(f'Fetching {url} failed: {e}')
+            self.errors.append(f'{url}: {e}')
+            return None
+
+    def read_limited(self, chunks: Iterator[bytes]) -> Tuple[bytes, bool]:
+        body = bytearray()
+        for chunk in chunks:
+            body += chunk
+            if len(body) >= self.max_bytes:
+                return bytes(body[:self.max_bytes]), True
+        return bytes(body), False
+
+    def headers(self) -> Dict[str, str]:
+        return self.stealth_manager.get_headers() if self.stealth_manager else {}
+
+    def proxies(self) -> Optional[Dict[str, str]]:
+        return self.stealth_manager.get_proxy() if self.stealth_manager else None
+
+    @property
+    def session(self):
+        if self.stealth_manager:
+            return self.stealth_manager.session
+        if self._own_session is None:
+            import requests
+            self._own_session = requests.Session()
+        return self._own_session
@@ -0,0 +1,40 @@
+import importlib
+from typing import Dict, Iterable, List, Type
+
+# Built-in stages, imported on first use so that planning a scan does not
+# load modules the profile never runs.
+BUILTIN_MODULES = {
+    'enumerate': 'modules.subdomain',
+    'resolve': 'modules.dns',
+    'probe': 'modules.http',
+    'scan': 'modules.vulnerability',
+    'secrets': 'modules.js_secrets',
+}
+
+_registry: Dict[str, Type] = {}
+
+def register_module(cls: Type) -> Type:
+    """Class decorator that makes a BaseModule subclass available as a scan stage under cls.name."""
+    if not getattr(cls, 'name', None):
+        raise ValueError(f'{cls.__name__} has no stage name')
+    existing = _registry.get(cls.name)
+    if existing is not None and existing is not cls:
+        raise ValueError(f"Stage '{cls.name}' is already registered by {existing.__name__}")
+    _registry[cls.name] = cls
+    return cls
+
+def get_module(name: str) -> Type:
+    if name not in _registry and name in BUILTIN_MODULES:
+        importlib.import_module(BUILTIN_MODULES[name])
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown module '{name}'") from None
+
+def load_plugins(paths: Iterable[str]):
+    """Import third-party modules so their @register_module decorators run."""
+    for path in paths:
+        importlib.import_module(path)
+
+def available_modules() -> List[str]:
+    return sorted(set(_registry) | set(BUILTIN_MODULES))
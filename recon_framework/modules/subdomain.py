@@ -1,25 +1,41 @@
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from modules.base_module import BaseModule
+from modules.registry import register_module
+from utils.domains import DomainSet
 
+@register_module
 class SubdomainModule(BaseModule):
-    def __init__(self, config: Dict, stealth_manager=None):
-        super().__init__(config, stealth_manager)
+    name = 'enumerate'
+    inputs = ('target',)
+    outputs = ('subdomains',)
+    results_key = 'subdomain_results'
+
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None):
+        super().__init__(config, stealth_manager, cache, process_slots, metrics)
         self.tools = ['subfinder', 'amass', 'assetfinder']
         self.wordlists = config.get('wordlists', [])
 
-    def run(self, target: str) -> Dict[str, List[str]]:
+    def run(self, target: str) -> Dict[str, Any]:
         if not self.validate_target(target):
             raise ValueError(f'Invalid target: {target}')
-        all_subdomains = set()
+        all_subdomains = DomainSet(target)
         tool_results = {}
-        for tool in self.tools:
-            try:
-                subs = self.run_tool(tool, target)
-                tool_results[tool] = subs
-                all_subdomains.update(subs)
-            except Exception as e:
-                self.logger.error(f'{tool} failed: {e}')
-                self.errors.append(f'{tool}: {e}')
+        with ThreadPoolExecutor(max_workers=self.max_workers()) as pool:
+            futures = {pool.submit(self.run_tool_timed, tool, target): tool for tool in self.tools}
+            for future in as_completed(futures):
+                tool = futures[future]
+                subs, elapsed, error = future.result()
+                tool_results[tool] = {'count': len(subs), 'elapsed': round(elapsed, 3)}
+                if error is not None:
+                    self.logger.error(f'{tool} failed: {error}')
+                    self.errors.append(f'{tool}: {error}')
+                    tool_results[tool]['error'] = str(error)
+                    continue
+                added = all_subdomains.add_many(subs)
+                tool_results[tool]['new'] = len(added)
+                self.logger.info(f'{tool} found {len(subs)} subdomains ({len(added)} new) in {elapsed:.1f}s')
         final_subdomains = sorted(all_subdomains)
         return {
             'subdomains': final_subdomains,
@@ -27,6 +43,19 @@ class SubdomainModule(BaseModule):
             'total_count': len(final_subdomains)
         }
 
+    def max_workers(self) -> int:
+        if not self.config.get('parallel_tools', True):
+            return 1
+        return max(1, min(len(self.tools), self.config.get('threads', 1)))
+
+    def run_tool_timed(self, tool: str, target: str) -> Tuple[List[str], float, Optional[Exception]]:
+        start = time.monotonic()
+        try:
+            subs = self.run_tool(tool, target)
+        except Exception as e:
+            return [], time.monotonic() - start, e
+        return subs, time.monotonic() - start, None
+
     def run_tool(self, tool: str, target: str) -> List[str]:
         if tool == 'subfinder':
             return self.run_subfinder(target)
@@ -36,30 +65,54 @@ class SubdomainModule(BaseModule):
             return self.run_assetfinder(target)
         return []
 
+    def iter_tool(self, tool: str, target: str) -> Iterator[str]:
+        """Yield subdomains from a single tool as it reports them."""
+        cmd = self.tool_command(tool, target)
+        if cmd is None:
+            return
+        yield from self.stream_lines(cmd)
+
+    def tool_command(self, tool: str, target: str) -> Optional[List[str]]:
+        if tool == 'subfinder':
+            return self.subfinder_command(target)
+        if tool == 'amass':
+            return self.amass_command(target)
+        if tool == 'assetfinder':
+            return self.assetfinder_command(target)
+        return None
+
     def run_subfinder(self, target: str) -> List[str]:
-        cmd = ['subfinder', '-d', target, '-silent']
-        if self.config.get('api_keys'):
-            config_file = self.create_subfinder_config()
-            cmd.extend(['-config', config_file])
-        result = self.execute_tool(cmd)
+        result = self.execute_tool(self.subfinder_command(target))
         return [line.strip() for line in result.stdout.splitlines() if line.strip()]
 
     def run_amass(self, target: str) -> List[str]:
-        cmd = ['amass', 'enum', '-d', target, '-silent']
-        if self.config.get('mode') == 'stealth':
-            cmd.append('-passive')
-        result = self.execute_tool(cmd)
+        result = self.execute_tool(self.amass_command(target))
         return [line.strip() for line in result.stdout.splitlines() if line.strip()]
 
     def run_assetfinder(self, target: str) -> List[str]:
-        cmd = ['assetfinder', target]
         try:
-            result = self.execute_tool(cmd)
+            result = self.execute_tool(self.assetfinder_command(target))
             return [line.strip() for line in result.stdout.splitlines() if line.strip()]
         except Exception as e:
             self.logger.warning(f'assetfinder failed: {e}')
             return []
 
+    def subfinder_command(self, target: str) -> List[str]:
+        cmd = ['subfinder', '-d', target, '-silent']
+        if self.config.get('api_keys'):
+            config_file = self.create_subfinder_config()
+            cmd.extend(['-config', config_file])
+        return cmd
+
+    def amass_command(self, target: str) -> List[str]:
+        cmd = ['amass', 'enum', '-d', target, '-silent']
+        if self.config.get('mode') == 'stealth':
+            cmd.append('-passive')
+        return cmd
+
+    def assetfinder_command(self, target: str) -> List[str]:
+        return ['assetfinder', target]
+
     def create_subfinder_config(self) -> str:
         import tempfile
         import yaml
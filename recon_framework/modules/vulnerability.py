@@ -1,24 +1,143 @@
+import hashlib
+import math
 import os
 import tempfile
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from modules.base_module import BaseModule
+from modules.registry import register_module
+from core.records import Finding
 
+@register_module
 class VulnerabilityModule(BaseModule):
-    def run(self, targets: List[str]) -> Dict[str, List[Dict]]:
+    name = 'scan'
+    inputs = ('urls',)
+    outputs = ('vulnerabilities',)
+    results_key = 'vulnerability_results'
+
+    def __init__(self, config: Dict, stealth_manager=None, cache=None, process_slots=None, metrics=None):
+        super().__init__(config, stealth_manager, cache, process_slots, metrics)
+        self.concurrent_shards = 1
+        # Set by the engine to checkpoint each shard as it finishes and to
+        # skip shards, and reuse findings, from before a resume.
+        self.on_shard: Optional[Callable[[str, List[Finding], bool], None]] = None
+        self.completed_shards = set()
+        self.resumed_findings: List[Finding] = []
+
+    def run(self, targets: List[str]) -> Dict[str, Any]:
+        """Scan targets with nuclei, split into shards run by parallel processes.
+
+        Each shard gets a timeout proportional to its size and is retried on
+        its own when it fails; findings from every shard, including partial
+        output of shards that never succeeded, are merged and deduplicated.
+        Shards listed in completed_shards are skipped and their findings
+        taken from resumed_findings.
+        """
+        shards = self.split_shards(targets)
+        todo = [index for index, shard in enumerate(shards) if self.shard_key(shard) not in self.completed_shards]
+        workers = self.shard_workers(len(todo))
+        self.concurrent_shards = workers
+        seen = set()
+        vulns = []
+        categorized = self.categorize_vulnerabilities([])
+        self.merge_findings(self.resumed_findings, seen, vulns, categorized)
+        failed = []
+        retried = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.run_shard, shards[index]): index for index in todo}
+            for future in as_completed(futures):
+                index = futures[future]
+                findings, attempts, error = future.result()
+                retried += attempts - 1
+                if error is not None:
+                    self.logger.error(f'nuclei shard {index} failed after {attempts} attempts: {error}')
+                    self.errors.append(f'shard {index}: {error}')
+                    failed.append(index)
+                new = self.merge_findings(findings, seen, vulns, categorized)
+                if self.on_shard is not None:
+                    self.on_shard(self.shard_key(shards[index]), new, error is None)
+        return {
+            'vulnerabilities': vulns,
+            'categorized': categorized,
+            'total_vulns': len(vulns),
+            'shards': {'total': len(shards), 'resumed': len(shards) - len(todo), 'workers': workers,
+                       'retried': retried, 'failed': sorted(failed)}
+        }
+
+    def incomplete(self, results: Dict[str, Any]) -> bool:
+        return bool(results['shards']['failed'])
+
+    def merge_findings(self, findings: List[Finding], seen: set, vulns: List[Finding],
+                       categorized: Dict[str, List[Finding]]) -> List[Finding]:
+        """Add findings not seen before to vulns and categorized; return the ones added."""
+        new = []
+        for vuln in findings:
+            key = vuln.dedup_key()
+            if key in seen:
+                continue
+            seen.add(key)
+            new.append(vuln)
+            self.categorize_vulnerability(vuln, categorized)
+        vulns.extend(new)
+        return new
+
+    @staticmethod
+    def shard_key(shard: List[str]) -> str:
+        """Identifies a shard by its hosts, so a resume matches shards even if sizing changed."""
+        return hashlib.sha1('\n'.join(shard).encode()).hexdigest()
+
+    def split_shards(self, targets: List[str]) -> List[List[str]]:
+        if not targets:
+            return []
+        size = self.config.get('nuclei_shard_size') or math.ceil(len(targets) / self.shard_workers(len(targets)))
+        size = max(1, min(size, self.config.get('nuclei_max_shard_size', 500)))
+        return [targets[i:i + size] for i in range(0, len(targets), size)]
+
+    def shard_workers(self, shards: int) -> int:
+        workers = self.config.get('nuclei_workers') or min(self.config.get('threads', 1), os.cpu_count() or 1)
+        if self.stealth_manager:
+            # Every shard needs at least one request per second of the stage's share.
+            workers = self.stealth_manager.max_concurrency(workers, self.stealth_manager.tool_share())
+        return max(1, min(workers, shards))
+
+    def shard_timeout(self, size: int) -> int:
+        return self.config.get('nuclei_timeout_base', 120) + self.config.get('nuclei_timeout_per_host', 5) * size
+
+    def run_shard(self, shard: List[str]) -> Tuple[List[Finding], int, Exception]:
+        """Return (findings, attempts, error), keeping the most complete output seen."""
+        attempts = self.config.get('nuclei_retries', 1) + 1
+        best = []
+        error = None
+        for attempt in range(1, attempts + 1):
+            findings = []
+            try:
+                for vuln in self.iter_scan(shard, timeout=self.shard_timeout(len(shard))):
+                    findings.append(vuln)
+                return findings, attempt, None
+            except Exception as e:
+                error = e
+                self.logger.warning(f'nuclei shard of {len(shard)} hosts failed (attempt {attempt}/{attempts}): {e}')
+                if len(findings) > len(best):
+                    best = findings
+        return best, attempts, error
+
+    def iter_scan(self, targets: List[str], timeout: int = 600) -> Iterator[Finding]:
+        """Yield nuclei findings for targets as they are reported."""
         targets_file = self.write_targets_file(targets)
         try:
-            vulns = self.run_nuclei(targets_file)
-            categorized = self.categorize_vulnerabilities(vulns)
-            return {
-                'vulnerabilities': vulns,
-                'categorized': categorized,
-                'total_vulns': len(vulns)
-            }
+            yield from self.iter_nuclei(targets_file, timeout)
         finally:
             if os.path.exists(targets_file):
                 os.unlink(targets_file)
 
-    def run_nuclei(self, targets_file: str) -> List[Dict]:
+    def run_nuclei(self, targets_file: str) -> List[Finding]:
+        return list(self.iter_nuclei(targets_file))
+
+    def iter_nuclei(self, targets_file: str, timeout: int = 600) -> Iterator[Finding]:
+        # A crashed nuclei run raises, so its shard is retried and never checkpointed.
+        return self.stream_records(self.nuclei_command(targets_file), Finding, timeout=timeout, check=True)
+
+    def nuclei_command(self, targets_file: str) -> List[str]:
         cmd = [
             'nuclei', '-l', targets_file, '-json', '-silent',
             '-timeout', str(self.config.get('timeout', 10))
@@ -28,10 +147,8 @@ class VulnerabilityModule(BaseModule):
             cmd.extend(['-severity', ','.join(severity)])
         if self.config.get('nuclei_templates'):
             cmd.extend(['-t', self.config['nuclei_templates']])
-        if self.config.get('mode') == 'stealth':
-            cmd.extend(['-rate-limit', '5'])
-        result = self.execute_tool(cmd, timeout=600)
-        return self.parse_json_output(result.stdout)
+        cmd.extend(self.rate_limit_args(self.concurrent_shards))
+        return cmd
 
     def write_targets_file(self, targets: List[str]) -> str:
         with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
@@ -39,10 +156,13 @@ class VulnerabilityModule(BaseModule):
                 f.write(f"{t}\n")
             return f.name
 
-    def categorize_vulnerabilities(self, vulns: List[Dict]) -> Dict[str, List[Dict]]:
+    def categorize_vulnerabilities(self, vulns: List[Finding]) -> Dict[str, List[Finding]]:
         categories = {'critical': [], 'high': [], 'medium': [], 'low': [], 'info': []}
         for v in vulns:
-            sev = v.get('info', {}).get('severity', 'info').lower()
-            if sev in categories:
-                categories[sev].append(v)
+            self.categorize_vulnerability(v, categories)
         return categories
+
+    def categorize_vulnerability(self, vuln: Finding, categories: Dict[str, List[Finding]]):
+        sev = (vuln.severity or 'info').lower()
+        if sev in categories:
+            categories[sev].append(vuln)
@@ -0,0 +1,204 @@
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+FORMATS = ('auto', 'parquet', 'arrow', 'jsonl')
+
+# Column name and type per dataset; 'list' columns hold JSON arrays in the
+# database and are exported as lists of strings.
+DATASETS = {
+    'subdomains': (
+        [('scan_id', 'int'), ('scan_started_at', 'str'), ('target', 'str'), ('name', 'str'), ('ip_address', 'str'),
+         ('probed_at', 'str'), ('first_seen', 'str'), ('last_seen', 'str')],
+        """SELECT h.scan_id, s.started_at, h.target, h.name, h.ip_address, h.probed_at, h.first_seen, h.last_seen
+        FROM scan_hosts h JOIN scans s ON s.id = h.scan_id WHERE {where} ORDER BY h.scan_id"""
+    ),
+    'live_hosts': (
+        [('scan_id', 'int'), ('scan_started_at', 'str'), ('target', 'str'), ('name', 'str'), ('url', 'str'),
+         ('status_code', 'int'), ('title', 'str'), ('technologies', 'list'), ('content_length', 'int'),
+         ('webserver', 'str'), ('probed_at', 'str')],
+        """SELECT h.scan_id, s.started_at, h.target, h.name, h.url, h.status_code, h.title, h.technologies,
+               h.content_length, h.webserver, h.probed_at
+        FROM scan_hosts h JOIN scans s ON s.id = h.scan_id WHERE h.url IS NOT NULL AND {where} ORDER BY h.scan_id"""
+    ),
+    'findings': (
+        [('scan_id', 'int'), ('scan_started_at', 'str'), ('target', 'str'), ('host', 'str'), ('template_id', 'str'),
+         ('severity', 'str'), ('severity_rank', 'int'), ('description', 'str'), ('matched_at', 'str'),
+         ('discovered_at', 'str'), ('raw_output', 'str')],
+        """SELECT v.scan_id, s.started_at, s.target, v.target, v.template_id, v.severity, v.severity_rank,
+               v.description, v.matched_at, v.discovered_at, {raw}
+        FROM vulnerabilities v JOIN scans s ON s.id = v.scan_id WHERE {where} ORDER BY v.scan_id"""
+    ),
+}
+
+def load_arrow():
+    """pyarrow with its parquet and ipc modules, or None if it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+class ScanExporter:
+    """Streams scan data out of the database into files for offline analysis.
+
+    Rows are read in chunks of chunk_size and written as they arrive, so
+    memory use is bounded by the chunk, not by the database. Parquet and
+    Arrow IPC output need pyarrow (one file per dataset, one row group or
+    record batch per chunk, zstd compressed); without it datasets are
+    written as gzip JSON lines, split into files of rows_per_file rows.
+    """
+    def __init__(self, database, chunk_size: int = 10000, rows_per_file: int = 1000000):
+        self.database = database
+        self.chunk_size = chunk_size
+        self.rows_per_file = rows_per_file
+
+    @staticmethod
+    def resolve_format(format: str) -> str:
+        if format not in FORMATS:
+            raise ValueError(f'Unsupported format: {format}')
+        if format == 'jsonl':
+            return format
+        if load_arrow() is None:
+            if format != 'auto':
+                raise ValueError(f'{format} export requires pyarrow (pip install recon_framework[export])')
+            return 'jsonl'
+        return 'parquet' if format == 'auto' else format
+
+    def export(self, output_dir: str, format: str = 'auto', datasets: Optional[Sequence[str]] = None,
+               targets: Sequence[str] = (), since: Optional[datetime] = None, until: Optional[datetime] = None,
+               raw: bool = False) -> Dict[str, Any]:
+        """Export datasets of the scans matching the filters and return the manifest written with them.
+
+        since is inclusive and until exclusive, both compared with the
+        scan start time; findings carry the raw tool output only with raw.
+        """
+        format = self.resolve_format(format)
+        datasets = list(datasets or DATASETS)
+        unknown = [name for name in datasets if name not in DATASETS]
+        if unknown:
+            raise ValueError(f'Unknown dataset: {", ".join(unknown)}')
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        where, params = self.scan_filter(targets, since, until)
+        manifest = {
+            'format': format,
+            'created_at': datetime.now().isoformat(),
+            'filters': {
+                'targets': list(targets), 'since': since.isoformat() if since else None,
+                'until': until.isoformat() if until else None
+            },
+            'datasets': {}
+        }
+        with self.database.get_connection() as conn:
+            for name in datasets:
+                columns, query = DATASETS[name]
+                sql = query.format(where=where, raw='v.raw_output' if raw else 'NULL')
+                chunks = self.iter_chunks(conn.execute(sql, params))
+                manifest['datasets'][name] = self.write_dataset(output_path, name, columns, chunks, format)
+        with open(output_path / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    @staticmethod
+    def scan_filter(targets: Sequence[str], since: Optional[datetime], until: Optional[datetime]) -> Tuple[str, Tuple]:
+        clauses = ['1 = 1']
+        params = []
+        if targets:
+            clauses.append(f's.target IN ({", ".join("?" * len(targets))})')
+            params.extend(targets)
+        if since is not None:
+            clauses.append('s.started_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('s.started_at < ?')
+            params.append(until)
+        return ' AND '.join(clauses), tuple(params)
+
+    def iter_chunks(self, cursor) -> Iterator[List[Tuple]]:
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+
+    def write_dataset(self, output_path: Path, name: str, columns: List[Tuple[str, str]],
+                      chunks: Iterable[List[Tuple]], format: str) -> Dict[str, Any]:
+        lists = [i for i, (_, kind) in enumerate(columns) if kind == 'list']
+        if lists:
+            chunks = (self.decode_lists(rows, lists) for rows in chunks)
+        if format == 'jsonl':
+            files, rows = self.write_jsonl(output_path, name, [column for column, _ in columns], chunks)
+        else:
+            files, rows = self.write_arrow(output_path, name, columns, chunks, format)
+        return {'rows': rows, 'files': [str(path) for path in files], 'bytes': sum(path.stat().st_size for path in files)}
+
+    @staticmethod
+    def decode_lists(rows: List[Tuple], positions: List[int]) -> List[Tuple]:
+        decoded = []
+        for row in rows:
+            row = list(row)
+            for i in positions:
+                row[i] = json.loads(row[i]) if row[i] else []
+            decoded.append(tuple(row))
+        return decoded
+
+    def write_jsonl(self, output_path: Path, name: str, columns: List[str],
+                    chunks: Iterable[List[Tuple]]) -> Tuple[List[Path], int]:
+        files = []
+        total = 0
+        out = None
+        in_file = 0
+        try:
+            for rows in chunks:
+                while rows:
+                    if out is None or in_file >= self.rows_per_file:
+                        if out is not None:
+                            out.close()
+                        files.append(output_path / f'{name}-{len(files):05d}.jsonl.gz')
+                        out = gzip.open(files[-1], 'wb', compresslevel=6)
+                        in_file = 0
+                    part, rows = rows[:self.rows_per_file - in_file], rows[self.rows_per_file - in_file:]
+                    out.write(''.join(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in part).encode())
+                    in_file += len(part)
+                    total += len(part)
+        finally:
+            if out is not None:
+                out.close()
+        if not files:
+            # An empty dataset still gets a (empty) file, so readers find every dataset.
+            files.append(output_path / f'{name}-00000.jsonl.gz')
+            gzip.open(files[0], 'wb').close()
+        return files, total
+
+    @staticmethod
+    def write_arrow(output_path: Path, name: str, columns: List[Tuple[str, str]],
+                    chunks: Iterable[List[Tuple]], format: str) -> Tuple[List[Path], int]:
+        pa = load_arrow()
+        types = {'int': pa.int64(), 'str': pa.string(), 'list': pa.list_(pa.string())}
+        schema = pa.schema([(column, types[kind]) for column, kind in columns])
+        path = output_path / f'{name}.{"parquet" if format == "parquet" else "arrow"}'
+        if format == 'parquet':
+            writer = pa.parquet.ParquetWriter(str(path), schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(str(path), schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+        total = 0
+        try:
+            for rows in chunks:
+                arrays = [
+                    pa.array([None if value is None else str(value) for value in values] if kind == 'str' else values, type=types[kind])
+                    for (_, kind), values in zip(columns, zip(*rows))
+                ]
+                batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+                if format == 'parquet':
+                    writer.write_table(pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+                total += len(rows)
+        finally:
+            writer.close()
+        return [path], total
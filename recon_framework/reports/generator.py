@@ -1,61 +1,144 @@
 import json
 from datetime import datetime
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterable, Iterator, Tuple
+from core.records import Finding, LiveHost, Secret, record_from_row, json_default
+from utils.signatures import load_signatures
 
 class ReportGenerator:
-    def __init__(self, database):
+    """Renders scan reports straight from database cursors.
+
+    Row sets are read in chunks of chunk_size and streamed into the output
+    file, so memory use does not grow with the size of the scan.
+    """
+    def __init__(self, database, chunk_size: int = 1000):
         self.database = database
+        self.chunk_size = chunk_size
         self.template_dir = Path(__file__).parent / 'templates'
-        self.env = Environment(loader=FileSystemLoader(str(self.template_dir)))
+        self._env = None
+
+    @property
+    def env(self):
+        # jinja2 is only needed for HTML output.
+        if self._env is None:
+            from jinja2 import Environment, FileSystemLoader, select_autoescape
+            self._env = Environment(loader=FileSystemLoader(str(self.template_dir)), autoescape=select_autoescape(['html']))
+        return self._env
 
     def generate_report(self, target: str, output_dir: str, format: str = 'html') -> str:
-        data = self.gather_report_data(target)
+        if format not in ('html', 'json'):
+            raise ValueError(f'Unsupported format: {format}')
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
-        if format == 'html':
-            return self.generate_html_report(data, output_path)
-        elif format == 'json':
+        with self.database.get_connection() as conn:
+            data = self.report_data(conn, target)
+            if format == 'html':
+                return self.generate_html_report(data, output_path)
             return self.generate_json_report(data, output_path)
-        else:
-            raise ValueError(f'Unsupported format: {format}')
 
-    def gather_report_data(self, target: str) -> Dict[str, Any]:
-        with self.database.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM scans WHERE target=? ORDER BY started_at DESC LIMIT 1", (target,))
-            scan = cur.fetchone()
-            if not scan:
-                raise ValueError(f'No scan found for {target}')
-            scan_id = scan['id']
-            cur.execute("SELECT * FROM subdomains WHERE scan_id=? ORDER BY subdomain", (scan_id,))
-            subs = cur.fetchall()
-            cur.execute("SELECT * FROM vulnerabilities WHERE scan_id=? ORDER BY severity DESC", (scan_id,))
-            vulns = cur.fetchall()
+    def report_data(self, conn, target: str) -> Dict[str, Any]:
+        """Report data with subdomains, vulnerabilities and secrets as lazy row iterators."""
+        scan = conn.execute("SELECT * FROM scans WHERE target=? ORDER BY started_at DESC LIMIT 1", (target,)).fetchone()
+        if not scan:
+            raise ValueError(f'No scan found for {target}')
+        scan_id = scan['id']
+        # Live hosts are classified with the signatures the scan was run with.
+        classify = load_signatures(json.loads(scan['config'] or '{}').get('signature_files') or ()).classify
+
+        def host_record(row):
+            record = record_from_row(row)
+            if isinstance(record, LiveHost):
+                record.interesting = classify(record)
+            return record
+
         return {
             'scan': dict(scan),
             'target': target,
-            'subdomains': [dict(row) for row in subs],
-            'vulnerabilities': [dict(row) for row in vulns],
+            'subdomains': self.iter_rows(conn, "SELECT * FROM scan_hosts WHERE scan_id=? ORDER BY name", (scan_id,), host_record),
+            'vulnerabilities': self.iter_rows(conn, "SELECT * FROM vulnerabilities WHERE scan_id=? ORDER BY severity_rank DESC", (scan_id,), Finding.from_row),
+            'secrets': self.iter_rows(conn, "SELECT * FROM secrets WHERE scan_id=? ORDER BY secret_type, target", (scan_id,), Secret.from_row),
             'generated_at': datetime.now().isoformat(),
-            'summary': {
-                'total_subdomains': len(subs),
-                'live_hosts': len([s for s in subs if s['status_code']]),
-                'total_vulnerabilities': len(vulns)
-            }
+            'summary': self.summarize(conn, scan_id)
+        }
+
+    def gather_report_data(self, target: str) -> Dict[str, Any]:
+        with self.database.get_connection() as conn:
+            data = self.report_data(conn, target)
+            data['subdomains'] = list(data['subdomains'])
+            data['vulnerabilities'] = list(data['vulnerabilities'])
+            data['secrets'] = list(data['secrets'])
+        return data
+
+    def iter_rows(self, conn, query: str, params: Tuple, factory: Callable = dict) -> Iterator:
+        cur = conn.execute(query, params)
+        while True:
+            rows = cur.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield factory(row)
+
+    @staticmethod
+    def summarize(conn, scan_id: int) -> Dict[str, Any]:
+        subs = conn.execute(
+            """SELECT COUNT(*) AS total, COUNT(o.http_state_id) AS live, COUNT(a.id) AS new
+            FROM asset_observations o LEFT JOIN assets a ON a.id = o.asset_id AND a.first_scan_id = o.scan_id
+            WHERE o.scan_id=?""", (scan_id,)
+        ).fetchone()
+        by_severity = {
+            row['severity'] or 'unknown': row['count']
+            for row in conn.execute(
+                "SELECT severity, COUNT(*) AS count FROM vulnerabilities WHERE scan_id=? GROUP BY severity_rank, severity ORDER BY severity_rank DESC",
+                (scan_id,)
+            )
+        }
+        secrets = conn.execute("SELECT COUNT(*) FROM secrets WHERE scan_id=?", (scan_id,)).fetchone()[0]
+        return {
+            'total_subdomains': subs['total'],
+            'live_hosts': subs['live'],
+            'new_subdomains': subs['new'],
+            'total_vulnerabilities': sum(by_severity.values()),
+            'vulnerabilities_by_severity': by_severity,
+            'total_secrets': secrets
         }
 
     def generate_html_report(self, data: Dict[str, Any], output_path: Path) -> str:
         template = self.env.get_template('report.html')
-        html = template.render(data=data)
         report_file = output_path / f"recon_report_{data['target']}.html"
+        stream = template.stream(data=data)
+        stream.enable_buffering(100)
         with open(report_file, 'w') as f:
-            f.write(html)
+            stream.dump(f)
         return str(report_file)
 
     def generate_json_report(self, data: Dict[str, Any], output_path: Path) -> str:
         report_file = output_path / f"recon_report_{data['target']}.json"
         with open(report_file, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+            f.write('{\n')
+            for key in ('scan', 'target', 'generated_at', 'summary'):
+                f.write(f'  {json.dumps(key)}: {json.dumps(data[key], default=str)},\n')
+            self._write_json_array(f, 'subdomains', data['subdomains'])
+            f.write(',\n')
+            self._write_json_array(f, 'vulnerabilities', data['vulnerabilities'])
+            f.write(',\n')
+            self._write_json_array(f, 'secrets', data['secrets'])
+            f.write('\n}\n')
+        return str(report_file)
+
+    @staticmethod
+    def _write_json_array(f, key: str, rows: Iterable):
+        f.write(f'  {json.dumps(key)}: [')
+        separator = '\n    '
+        for row in rows:
+            f.write(separator)
+            f.write(json.dumps(row, default=json_default))
+            separator = ',\n    '
+        f.write('\n  ]' if separator != '\n    ' else ']')
+
+    def generate_delta_report(self, target: str, delta: Dict[str, Any], output_dir: str) -> str:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        report_file = output_path / f"recon_delta_{target}.json"
+        with open(report_file, 'w') as f:
+            json.dump({'target': target, 'generated_at': datetime.now().isoformat(), **delta}, f, indent=2, default=str)
         return str(report_file)
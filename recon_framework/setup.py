@@ -9,8 +9,13 @@ setup(
         'pyyaml>=6.0',
         'jinja2>=3.0.0',
         'requests>=2.25.0',
-        'loguru>=0.6.0',
-        'weasyprint>=56.0'
+        'loguru>=0.6.0'
     ],
+    extras_require={
+        'native-http': ['aiohttp>=3.8'],
+        'pdf': ['weasyprint>=56.0'],
+        'fast-json': ['orjson>=3.6'],
+        'export': ['pyarrow>=10']
+    },
     entry_points={'console_scripts': ['recon=recon_framework.cli.main:cli']}
 )
@@ -0,0 +1,149 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+def scope_pattern(target: Optional[str]) -> 're.Pattern':
+    """Multiline pattern capturing the canonical name from each in-scope line.
+
+    Lines are expected lowercased; leading wildcard labels, trailing dots
+    and surrounding whitespace are matched outside the captured group.
+    """
+    labels = r'(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\.)*'
+    if target:
+        suffix = re.escape(target.strip().rstrip('.').lower())
+    else:
+        suffix = r'[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?'
+    return re.compile(rf'^[ \t]*(?:\*\.)*({labels}{suffix})\.*[ \t\r]*$', re.MULTILINE)
+
+def normalize_names(names: List[str], scope: 're.Pattern') -> List[str]:
+    """Canonicalize a batch of names and keep the in-scope ones.
+
+    The batch is joined into one string so lowercasing, wildcard and
+    trailing-dot stripping and the scope check run as one regex pass
+    instead of a Python-level loop per name.
+    """
+    if not names:
+        return []
+    return scope.findall('\n'.join(names).lower())
+
+def normalize_name(name: str, scope: 're.Pattern') -> Optional[str]:
+    found = normalize_names([name], scope)
+    return found[0] if len(found) == 1 else None
+
+# Index keys pack a 38-bit name hash above a 26-bit position, which
+# allows up to 67M names per set.
+_INDEX_BITS = 26
+_INDEX_MASK = (1 << _INDEX_BITS) - 1
+_HASH_MASK = (1 << (64 - _INDEX_BITS)) - 1
+
+class DomainSet:
+    """Deduplicated, scope-filtered set of host names with a compact layout.
+
+    Names are appended to one bytes buffer indexed by an array of offsets,
+    so a million names cost their UTF-8 length plus a few bytes each
+    instead of a str object and a hash-table slot. Membership goes through
+    a sorted array of packed (hash, position) keys searched with bisect;
+    names added since the last compaction sit in a small set that is
+    folded into the index every chunk_size names. Iteration follows
+    insertion order.
+    """
+    def __init__(self, target: Optional[str] = None, chunk_size: int = 65536):
+        self.scope = scope_pattern(target)
+        self.chunk_size = max(1, chunk_size)
+        self._blob = bytearray()
+        self._offsets = array('q', [0])
+        self._index = array('Q')
+        self._pending = set()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pending or self._indexed(name)
+
+    def __iter__(self) -> Iterator[str]:
+        blob = self._blob
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            yield blob[offsets[i]:offsets[i + 1]].decode()
+
+    def add(self, name: str) -> Optional[str]:
+        """Add one raw name; return its canonical form if it was new and in scope."""
+        added = self.add_many([name])
+        return added[0] if added else None
+
+    def add_many(self, names: Iterable[str]) -> List[str]:
+        """Add raw names; return the canonical in-scope names that were not seen before."""
+        added = []
+        batch = []
+        for name in names:
+            batch.append(name)
+            if len(batch) >= self.chunk_size:
+                self._add_batch(batch, added)
+                batch = []
+        self._add_batch(batch, added)
+        return added
+
+    def _add_batch(self, batch: List[str], added: List[str]):
+        pending = self._pending
+        indexed = self._indexed if self._index else None
+        blob = self._blob
+        offsets = self._offsets
+        for name in dict.fromkeys(normalize_names(batch, self.scope)):
+            if name in pending or (indexed and indexed(name)):
+                continue
+            if len(offsets) > _INDEX_MASK:
+                raise OverflowError('DomainSet is full')
+            pending.add(name)
+            blob += name.encode()
+            offsets.append(len(blob))
+            added.append(name)
+            if len(pending) >= self.chunk_size:
+                self.compact()
+                pending = self._pending
+                indexed = self._indexed
+
+    def compact(self):
+        """Fold pending names into the sorted index.
+
+        The index is merged in place from the back: each new key finds
+        its slot with bisect and the indexed keys above it move up with
+        one slice copy, so only the pending keys become Python ints.
+        """
+        if not self._pending:
+            return
+        # Pending names are the last ones appended.
+        first = len(self._offsets) - 1 - len(self._pending)
+        new_keys = sorted(self._key(self._name(i), i) for i in range(first, len(self._offsets) - 1))
+        index = self._index
+        end = len(index)
+        index.extend(new_keys)
+        for j in range(len(new_keys) - 1, -1, -1):
+            key = new_keys[j]
+            position = bisect_right(index, key, 0, end)
+            if position < end:
+                index[position + j + 1:end + j + 1] = index[position:end]
+            index[position + j] = key
+            end = position
+        self._pending = set()
+
+    def _name(self, position: int) -> str:
+        return self._blob[self._offsets[position]:self._offsets[position + 1]].decode()
+
+    @staticmethod
+    def _key(name: str, position: int) -> int:
+        return ((hash(name) & _HASH_MASK) << _INDEX_BITS) | position
+
+    def _indexed(self, name: str) -> bool:
+        index = self._index
+        prefix = (hash(name) & _HASH_MASK) << _INDEX_BITS
+        i = bisect_left(index, prefix)
+        while i < len(index):
+            key = index[i]
+            if key & ~_INDEX_MASK != prefix:
+                return False
+            if self._name(key & _INDEX_MASK) == name:
+                return True
+            i += 1
+        return False
@@ -0,0 +1,111 @@
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+Line = Union[bytes, str]
+
+BACKENDS = ('auto', 'orjson', 'json')
+
+def load_backend(name: str = 'auto') -> Tuple[str, Callable[[Line], Any]]:
+    """Return (backend name, loads) for name; 'auto' prefers orjson when it is installed."""
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown JSON backend: {name}')
+    if name != 'json':
+        try:
+            import orjson
+        except ImportError:
+            if name == 'orjson':
+                raise
+        else:
+            return 'orjson', orjson.loads
+    # json.loads sniffs the encoding of bytes in Python; lines are UTF-8, so
+    # decode them directly and skip its argument checks.
+    decode = json.JSONDecoder().decode
+
+    def loads(line: Line) -> Any:
+        return decode(line.decode() if isinstance(line, bytes) else line)
+    return 'json', loads
+
+def iter_lines(buffer: Line) -> Iterator[Line]:
+    """Lines of a bytes or str buffer, sliced one at a time instead of split into a list."""
+    newline = b'\n' if isinstance(buffer, bytes) else '\n'
+    start = 0
+    while True:
+        end = buffer.find(newline, start)
+        if end == -1:
+            yield buffer[start:]
+            return
+        yield buffer[start:end]
+        start = end + 1
+
+class JSONLinesParser:
+    """Parses JSON-lines tool output from bytes or text, buffered or streamed.
+
+    Lines go to the backend's loads as they are, so bytes are never decoded
+    separately. With fields set, each object is projected to those keys.
+    Malformed lines are counted: the first log_first are logged one by one,
+    after that at most one summary every log_interval seconds, so a noisy
+    tool cannot flood the log.
+    """
+    def __init__(self, fields: Optional[Sequence[str]] = None, backend: str = 'auto', logger=None,
+                 name: str = 'tool', log_first: int = 5, log_interval: float = 30.0):
+        self.fields = tuple(fields) if fields else None
+        self.backend, self._loads = load_backend(backend)
+        self.logger = logger
+        self.name = name
+        self.log_first = log_first
+        self.log_interval = log_interval
+        self.lines = 0
+        self.malformed = 0
+        self._last_log = 0.0
+
+    def parse_line(self, line: Line) -> Optional[Dict[str, Any]]:
+        """The object on line, projected to fields; None (and counted) if it is not a JSON object."""
+        self.lines += 1
+        try:
+            data = self._loads(line)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            self._malformed(line)
+            return None
+        if self.fields is None:
+            return data
+        return {key: data[key] for key in self.fields if key in data}
+
+    def iter_stream(self, lines: Iterable[Line]) -> Iterator[Dict[str, Any]]:
+        """Parse lines from any iterable, such as a binary file or a process pipe, skipping blank ones."""
+        for line in lines:
+            line = line.strip()
+            if line:
+                data = self.parse_line(line)
+                if data is not None:
+                    yield data
+
+    def iter_buffer(self, buffer: Line) -> Iterator[Dict[str, Any]]:
+        return self.iter_stream(iter_lines(buffer))
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.backend, 'lines': self.lines, 'malformed': self.malformed}
+
+    def log_summary(self):
+        if self.malformed and self.logger is not None:
+            self.logger.warning(f'{self.name}: {self.malformed} of {self.lines} lines were not valid JSON objects')
+
+    def _malformed(self, line: Line):
+        self.malformed += 1
+        if self.logger is None:
+            return
+        now = time.monotonic()
+        if self.malformed <= self.log_first:
+            self._last_log = now
+            self.logger.warning(f'Failed to parse {self.name} line: {self._preview(line)}')
+        elif now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.logger.warning(f'{self.name}: {self.malformed} malformed lines so far, latest: {self._preview(line)}')
+
+    @staticmethod
+    def _preview(line: Line, limit: int = 200) -> str:
+        if isinstance(line, bytes):
+            line = line[:limit].decode('utf-8', errors='replace')
+        return line[:limit]
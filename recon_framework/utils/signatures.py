@@ -0,0 +1,255 @@
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_SIGNATURES = Path(__file__).parent.parent / 'config' / 'signatures.yaml'
+
+# Text fields rules can match on, in the order they are laid out in the
+# text a response is scanned as. Patterns never contain the separators, so
+# a match cannot span two fields or two technologies.
+TEXT_FIELDS = ('title', 'tech', 'webserver')
+FIELD_SEPARATOR = '\x00'
+VALUE_SEPARATOR = '\x01'
+# A text condition of '*' only requires the field to be non-empty.
+ANY_VALUE = '*'
+# Signatures matching on content length alone are indexed by buckets of
+# this many bytes, as long as their range spans few enough of them.
+LENGTH_BUCKET = 1024
+MAX_LENGTH_BUCKETS = 64
+
+class PatternAutomaton:
+    """Aho-Corasick automaton over a set of literal strings.
+
+    search() reports every occurrence of every pattern in a single pass
+    over the text, at a cost that depends on the text and the number of
+    matches but not on how many patterns there are.
+    """
+    def __init__(self, patterns: Sequence[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[int, ...]] = [()]
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                following = self.goto[node].get(char)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto[node][char] = following
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                node = following
+            self.output[node] += (index,)
+        # Breadth first, so a node's failure link is complete before its children need it.
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end position, pattern index) for each occurrence of a pattern in text."""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for index in output[node]:
+                    yield position, index
+
+class Signature:
+    """One rule: every condition it lists must hold for a response to match."""
+    __slots__ = ('name', 'reason', 'status', 'min_length', 'max_length', 'text', 'required', 'formatted')
+
+    def __init__(self, name: str, reason: Optional[str] = None, status=None, content_length: Optional[Dict] = None,
+                 **text: Any):
+        unknown = set(text) - set(TEXT_FIELDS)
+        if unknown:
+            raise ValueError(f"Signature '{name}': unknown condition {', '.join(sorted(unknown))}")
+        self.name = name
+        self.reason = reason or name
+        self.formatted = '{' in self.reason
+        self.status = self.parse_status(name, status)
+        content_length = content_length or {}
+        self.min_length = content_length.get('min')
+        self.max_length = content_length.get('max')
+        # Lowercased patterns per text field; the bit of each field listed is set in required.
+        self.text: Dict[str, List[str]] = {}
+        self.required = 0
+        for bit, field in enumerate(TEXT_FIELDS):
+            if text.get(field) is None:
+                continue
+            patterns = [text[field]] if isinstance(text[field], str) else list(text[field])
+            if not patterns or any(not isinstance(p, str) or not p for p in patterns):
+                raise ValueError(f"Signature '{name}': {field} needs non-empty strings")
+            if any(FIELD_SEPARATOR in p or VALUE_SEPARATOR in p for p in patterns):
+                raise ValueError(f"Signature '{name}': {field} patterns cannot contain control characters")
+            self.text[field] = [p.lower() for p in patterns]
+            self.required |= 1 << bit
+
+    @staticmethod
+    def parse_status(name: str, status) -> Optional[frozenset]:
+        """A status code, a 'low-high' range or a list of either, as a set of codes."""
+        if status is None:
+            return None
+        codes = set()
+        for entry in status if isinstance(status, list) else [status]:
+            try:
+                if isinstance(entry, str) and '-' in entry:
+                    low, high = (int(part) for part in entry.split('-', 1))
+                    codes.update(range(low, high + 1))
+                else:
+                    codes.add(int(entry))
+            except ValueError:
+                raise ValueError(f"Signature '{name}': invalid status {entry!r}") from None
+        return frozenset(codes)
+
+    def length_buckets(self) -> Optional[range]:
+        """The content length buckets the signature can match, if its range is narrow enough to index."""
+        if self.min_length is None or self.max_length is None:
+            return None
+        first, last = self.min_length // LENGTH_BUCKET, self.max_length // LENGTH_BUCKET
+        if last - first >= MAX_LENGTH_BUCKETS:
+            return None
+        return range(first, last + 1)
+
+    def accepts(self, host, matched: int) -> bool:
+        """Whether host matches, given the bits of the text fields already found to match."""
+        if matched != self.required:
+            return False
+        if self.status is not None and host.status_code not in self.status:
+            return False
+        if self.min_length is not None or self.max_length is not None:
+            length = host.content_length
+            if length is None:
+                return False
+            if self.min_length is not None and length < self.min_length:
+                return False
+            if self.max_length is not None and length > self.max_length:
+                return False
+        return True
+
+    def describe(self, host) -> str:
+        if not self.formatted:
+            return self.reason
+        return self.reason.format_map({
+            'url': host.url, 'status_code': host.status_code, 'title': host.title or '',
+            'technologies': ', '.join(host.technologies), 'webserver': host.webserver or '',
+            'content_length': host.content_length
+        })
+
+class SignatureSet:
+    """Classifies probed hosts against a list of signatures in one pass per host.
+
+    All text patterns of all signatures are compiled into one automaton
+    and a host's title, technologies and server header are scanned as one
+    string, so only signatures with a matching pattern are looked at.
+    Signatures without text patterns are indexed by status code and, for
+    bounded content length ranges, length bucket; only those with neither
+    a status nor a bounded length are checked for every host.
+    """
+    def __init__(self, signatures: Iterable[Signature]):
+        self.signatures = list(signatures)
+        patterns: Dict[str, int] = {}
+        # Per pattern: (field bit, signature index) pairs it satisfies.
+        self.targets: List[List[Tuple[int, int]]] = []
+        self.presence: List[List[Tuple[int, int]]] = [[] for _ in TEXT_FIELDS]
+        # Signatures without text patterns, by status code (None for any)
+        # and by (status code, length bucket).
+        self.by_status: Dict[Optional[int], List[int]] = {}
+        self.by_length: Dict[Tuple[Optional[int], int], List[int]] = {}
+        for index, signature in enumerate(self.signatures):
+            for bit, field in enumerate(TEXT_FIELDS):
+                for pattern in signature.text.get(field, ()):
+                    if pattern == ANY_VALUE:
+                        self.presence[bit].append((1 << bit, index))
+                        continue
+                    if pattern not in patterns:
+                        patterns[pattern] = len(patterns)
+                        self.targets.append([])
+                    self.targets[patterns[pattern]].append((1 << bit, index))
+            if signature.required:
+                continue
+            buckets = signature.length_buckets()
+            for code in signature.status if signature.status is not None else (None,):
+                if buckets is None:
+                    self.by_status.setdefault(code, []).append(index)
+                    continue
+                for bucket in buckets:
+                    self.by_length.setdefault((code, bucket), []).append(index)
+        self.automaton = PatternAutomaton(list(patterns))
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> 'SignatureSet':
+        """Load the signatures of one or more YAML profiles, in order."""
+        import yaml
+        signatures = []
+        for path in paths:
+            with open(path) as f:
+                data = yaml.safe_load(f) or {}
+            for entry in data.get('signatures') or []:
+                if not isinstance(entry, dict) or not entry.get('name'):
+                    raise ValueError(f'{path}: every signature needs a name')
+                try:
+                    signatures.append(Signature(**entry))
+                except ValueError as e:
+                    raise ValueError(f'{path}: {e}') from None
+                except TypeError as e:
+                    raise ValueError(f"{path}: signature '{entry['name']}': {e}") from None
+        return cls(signatures)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def match(self, host) -> List[Signature]:
+        """Signatures host matches, in the order they were defined."""
+        values = (host.title or '', VALUE_SEPARATOR.join(host.technologies), host.webserver or '')
+        matched: Dict[int, int] = {}
+        ends = []
+        offset = 0
+        for value in values:
+            offset += len(value)
+            ends.append(offset)
+            offset += 1
+        field = 0
+        for position, pattern in self.automaton.search(FIELD_SEPARATOR.join(values).lower()):
+            while position >= ends[field]:
+                field += 1
+            for bit, index in self.targets[pattern]:
+                if bit == 1 << field:
+                    matched[index] = matched.get(index, 0) | bit
+        for bit, value in enumerate(values):
+            if value:
+                for mask, index in self.presence[bit]:
+                    matched[index] = matched.get(index, 0) | mask
+        candidates = set(matched)
+        for code in (host.status_code, None):
+            candidates.update(self.by_status.get(code, ()))
+            if host.content_length is not None:
+                candidates.update(self.by_length.get((code, host.content_length // LENGTH_BUCKET), ()))
+        return [self.signatures[index] for index in sorted(candidates)
+                if self.signatures[index].accepts(host, matched.get(index, 0))]
+
+    def classify(self, host) -> List[str]:
+        """Reasons host deserves a closer look, one per matching signature, without duplicates."""
+        return list(dict.fromkeys(signature.describe(host) for signature in self.match(host)))
+
+_loaded_sets: Dict[Tuple[str, ...], SignatureSet] = {}
+
+def load_signatures(files: Iterable[str] = ()) -> SignatureSet:
+    """The bundled config/signatures.yaml followed by the given profiles, loaded once per list."""
+    key = tuple(str(path) for path in files)
+    if key not in _loaded_sets:
+        _loaded_sets[key] = SignatureSet.from_files([str(DEFAULT_SIGNATURES), *key])
+    return _loaded_sets[key]
+
+def default_signatures() -> SignatureSet:
+    """The bundled config/signatures.yaml, loaded once."""
+    return load_signatures()